@@ -0,0 +1,220 @@
+"""생성된 기사 결과 캐시 (콘텐츠 주소 기반)
+
+같은 사진 재업로드나 타임아웃 후 재시도처럼 입력이 완전히 같은 요청은
+다시 생성하지 않는다. 키는 모델 입력 이미지, 프롬프트, 생성 파라미터의
+SHA-256 해시이며, 메모리 LRU와 SQLite 영구 저장소(용량 기반 제거) 2단으로
+구성된다. 동시에 들어온 동일 요청은 하나의 생성 작업과 스트림을 공유하며,
+기다리던 요청이 모두 떠나면(클라이언트 연결 종료 등) 생성 취소를 요청한다.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from database import ConnectionPool
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 생성 함수 형식: producer(on_chunk, cancel) -> 기사 텍스트
+# (on_chunk는 어느 스레드에서든 호출 가능, cancel이 설정되면 생성을 멈춰야 함)
+Producer = Callable[[Callable[[str], None], threading.Event], Awaitable[str]]
+
+
+class _Flight:
+    """진행 중인 생성 1건 - 여러 요청이 같은 텍스트 스트림과 결과를 공유"""
+
+    def __init__(self, key: str, loop: asyncio.AbstractEventLoop):
+        self.key = key
+        self.loop = loop
+        self.chunks: List[str] = []
+        self.subscribers: List[Callable[[str], None]] = []
+        self.future: asyncio.Future = loop.create_future()
+        self.cancel = threading.Event()
+        self.waiters = 0
+
+    def publish(self, chunk: str):
+        self.chunks.append(chunk)
+        for callback in self.subscribers:
+            callback(chunk)
+
+    def subscribe(self, callback: Callable[[str], None]):
+        # 늦게 합류한 요청에는 지금까지 생성된 텍스트를 먼저 전달
+        for chunk in self.chunks:
+            callback(chunk)
+        self.subscribers.append(callback)
+
+
+class ArticleCache:
+    """메모리 LRU + SQLite 영구 캐시 + 동일 요청 단일 실행(single-flight)"""
+
+    def __init__(self, db_path: str, memory_entries: int = 256,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._disk_bytes = 0
+        # 디스크 쓰기와 _disk_bytes 갱신이 한 스레드에서만 일어나도록 워커 1개
+        self._db = ConnectionPool(db_path, workers=1)
+        self._init_db()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, prompt: Any, params: Dict[str, Any]) -> str:
+        """이미지 바이트 + 프롬프트 + 생성 파라미터 해시"""
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(image_bytes).digest())
+        digest.update(json.dumps(prompt, ensure_ascii=False, sort_keys=True).encode())
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _init_db(self):
+        conn = self._db.connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS article_cache (
+                key TEXT PRIMARY KEY,
+                article TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_article_cache_access ON article_cache (last_access)")
+        conn.commit()
+        self._disk_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM article_cache").fetchone()[0]
+
+    def _remember(self, key: str, article: str):
+        self._memory[key] = article
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        conn = self._db.connection()
+        row = conn.execute("SELECT article FROM article_cache WHERE key = ?", (key,)).fetchone()
+        if row:
+            with conn:
+                conn.execute("UPDATE article_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        return row[0] if row else None
+
+    def _disk_put(self, key: str, article: str):
+        size = len(article.encode())
+        now = time.time()
+        conn = self._db.connection()
+        with conn:
+            previous = conn.execute("SELECT size FROM article_cache WHERE key = ?", (key,)).fetchone()
+            conn.execute("""
+                INSERT OR REPLACE INTO article_cache (key, article, size, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            """, (key, article, size, now, now))
+            self._disk_bytes += size - (previous[0] if previous else 0)
+
+            # 용량 초과 시 가장 오래 사용되지 않은 항목부터 제거
+            while self._disk_bytes > self.max_disk_bytes:
+                row = conn.execute(
+                    "SELECT key, size FROM article_cache ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                if not row:
+                    break
+                conn.execute("DELETE FROM article_cache WHERE key = ?", (row[0],))
+                self._disk_bytes -= row[1]
+                metrics.inc("article_cache_evictions")
+
+    async def get(self, key: str) -> Optional[str]:
+        """메모리 → 디스크 순으로 조회 (디스크 결과는 메모리로 승격)"""
+        article = self._memory.get(key)
+        if article is not None:
+            self._memory.move_to_end(key)
+            return article
+        try:
+            article = await self._db.run(self._disk_get, key)
+        except Exception as e:
+            logger.warning(f"기사 캐시 조회 실패: {e}")
+            return None
+        if article is not None:
+            self._remember(key, article)
+        return article
+
+    async def put(self, key: str, article: str):
+        self._remember(key, article)
+        try:
+            await self._db.run(self._disk_put, key, article)
+        except Exception as e:
+            logger.warning(f"기사 캐시 저장 실패: {e}")
+
+    def close(self):
+        self._db.close()
+
+    async def get_or_generate(self, key: str, producer: Producer,
+                              on_text: Optional[Callable[[str], None]] = None,
+                              coalesce: bool = True) -> Tuple[str, str]:
+        """캐시 조회 후 없으면 생성 - (기사, "hit" | "miss" | "coalesced") 반환
+
+        on_text는 이벤트 루프 스레드에서 텍스트 조각마다 호출된다.
+        캐시 적중 시에는 전체 기사를 한 번에 전달한다.
+        coalesce가 False이면(요청별 마감 시간처럼 생성 조건이 요청마다 다를 때)
+        진행 중인 생성에 합류하지도, 다른 요청이 이 생성에 합류하게 하지도 않는다.
+        완성된 기사는 같은 키로 캐시에 저장된다.
+        """
+        article = await self.get(key)
+        if article is not None:
+            metrics.inc("article_cache_hits")
+            if on_text:
+                on_text(article)
+            return article, "hit"
+
+        flight = self._flights.get(key) if coalesce else None
+        if flight is not None:
+            metrics.inc("article_cache_coalesced")
+            if on_text:
+                flight.subscribe(on_text)
+            return await self._wait(flight), "coalesced"
+
+        metrics.inc("article_cache_misses")
+        loop = asyncio.get_running_loop()
+        flight = _Flight(key, loop)
+        if coalesce:
+            self._flights[key] = flight
+        if on_text:
+            flight.subscribe(on_text)
+        # 생성은 요청과 분리된 태스크에서 실행해 첫 요청이 끊겨도 합류한 요청은 결과를 받음
+        asyncio.ensure_future(self._run_flight(key, flight, producer))
+        return await self._wait(flight), "miss"
+
+    async def _wait(self, flight: _Flight) -> str:
+        """생성 결과 대기 - 마지막 대기자가 취소되면 생성도 취소"""
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.future)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                logger.info(f"대기 중인 요청이 없어 생성 취소: {flight.key[:12]}")
+                flight.cancel.set()
+                # 이후 같은 요청은 취소된 생성에 합류하지 않고 새로 생성
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+
+    async def _run_flight(self, key: str, flight: _Flight, producer: Producer):
+        try:
+            article = await producer(
+                lambda chunk: flight.loop.call_soon_threadsafe(flight.publish, chunk),
+                flight.cancel
+            )
+            flight.future.set_result(article)
+            await self.put(key, article)
+        except asyncio.CancelledError:
+            flight.future.cancel()
+            raise
+        except BaseException as e:
+            flight.future.set_exception(e)
+            # 대기자가 없을 때 "exception was never retrieved" 경고 방지
+            flight.future.exception()
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -0,0 +1,145 @@
+"""이미지→기사 생성 요청 동적 배치 처리
+
+동시에 대기 중인 생성 요청을 하나의 model.generate() 호출로 묶어
+프리필과 디코드 행렬 연산을 배치로 수행한다. 각 요청의 스트리밍 텍스트는
+BatchTextStreamer가 행별로 분리해 해당 요청의 콜백으로만 전달하며,
+EOS/토큰 예산에 도달한 행은 배치가 끝나기 전에 결과를 돌려받는다.
+취소되었거나 마감 시간이 지난 요청은 다음 토큰에서 멈추고(실행 전이면 프리필도
+하지 않고) GenerationStopped를 결과로 받는다.
+
+InferenceExecutor.submit_batched()의 runner로 사용한다.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+from metrics import metrics
+from streaming import BatchTextStreamer, GenerationStopped, TokenTimer, record_stop, stop_reason
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GenerationRequest:
+    """생성 요청 1건 (채팅 메시지, 토큰 예산, 스트리밍 콜백, 취소 신호, 마감 시각)"""
+    messages: List[Dict[str, Any]]
+    max_new_tokens: int = 1000
+    on_text: Optional[Callable[[str], None]] = None
+    timer: Optional[TokenTimer] = None
+    cancel: Optional[threading.Event] = None
+    # time.monotonic() 기준 마감 시각
+    deadline: Optional[float] = None
+
+
+class _FinishedRows(StoppingCriteria):
+    """스트리머가 끝났다고 표시한 행을 generate()에서도 종료 처리"""
+
+    def __init__(self, streamer: BatchTextStreamer):
+        self.streamer = streamer
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.tensor(self.streamer.finished, dtype=torch.bool, device=input_ids.device)
+
+
+def _eos_token_ids(model) -> List[int]:
+    eos = model.generation_config.eos_token_id
+    if eos is None:
+        return []
+    return list(eos) if isinstance(eos, (list, tuple)) else [eos]
+
+
+def generate_batch(model, processor, requests: List[GenerationRequest],
+                   complete: Callable[[int, Any], None], prefix_cache=None,
+                   draft=None, greedy: bool = False):
+    """요청 묶음을 한 번의 generate()로 처리하고 행별로 complete(i, article) 호출
+
+    prefix_cache(PrefixKVCache)가 주어지면 단일 요청은 시스템 프롬프트 접두부
+    KV 캐시에서 이어서 프리필한다. 배치는 왼쪽 패딩으로 행마다 접두부 위치가
+    달라지므로 전체 프리필을 사용한다.
+
+    draft(DraftModel)가 주어지면 단일 요청은 보조 모델 assisted decoding으로
+    생성한다 (보조 모델도 이미지를 직접 프리필해야 하므로 접두부 캐시는 쓰지 않음).
+    greedy이면 모델 generation_config의 샘플링 설정 대신 그리디 디코딩을 사용한다.
+    """
+    started = time.monotonic()
+    # 대기 중에 취소되었거나 마감 시간이 지난 요청은 프리필 없이 바로 종료
+    active = []
+    for index, request in enumerate(requests):
+        reason = stop_reason(request.cancel, request.deadline, started)
+        if reason is not None:
+            record_stop(reason)
+            complete(index, GenerationStopped(reason))
+        else:
+            active.append(index)
+    if not active:
+        return
+    complete_row = complete
+    if len(active) < len(requests):
+        # 남은 요청만 배치로 실행하고 결과는 원래 행 번호로 전달
+        requests = [requests[index] for index in active]
+
+        def complete(index: int, result: Any):
+            complete_row(active[index], result)
+
+    inputs = processor.apply_chat_template(
+        [request.messages for request in requests],
+        add_generation_prompt=True,
+        tokenize=True,
+        return_dict=True,
+        return_tensors="pt",
+        padding=True,
+    ).to(model.device, dtype=model.dtype)
+
+    streamer = BatchTextStreamer(
+        processor.tokenizer,
+        on_text=[request.on_text for request in requests],
+        timers=[request.timer for request in requests],
+        budgets=[request.max_new_tokens for request in requests],
+        eos_token_ids=_eos_token_ids(model),
+        on_finished=complete,
+        cancel_events=[request.cancel for request in requests],
+        deadlines=[request.deadline for request in requests],
+    )
+
+    generate_kwargs: Dict[str, Any] = {}
+    if greedy:
+        generate_kwargs["do_sample"] = False
+    assisted = draft is not None and len(requests) == 1
+    if assisted:
+        generate_kwargs["assistant_model"] = draft.model
+        draft_begin = draft.begin()
+    elif prefix_cache is not None and len(requests) == 1:
+        past_key_values = prefix_cache.prefill(inputs)
+        if past_key_values is not None:
+            # 직접 만든 캐시를 넘길 때는 generation_config의 cache_implementation을 꺼야 함
+            generate_kwargs.update(past_key_values=past_key_values, cache_implementation=None)
+
+    with torch.inference_mode():
+        model.generate(
+            **inputs,
+            max_new_tokens=max(request.max_new_tokens for request in requests),
+            streamer=streamer,
+            stopping_criteria=StoppingCriteriaList([_FinishedRows(streamer)]),
+            **generate_kwargs,
+        )
+
+    elapsed = time.monotonic() - started
+    generated = sum(len(ids) for ids in streamer.token_ids)
+    metrics.inc("batches")
+    metrics.inc("batched_requests", len(requests))
+    metrics.observe("batch_generation", elapsed)
+    logger.info(
+        f"배치 생성 완료: {len(requests)}건, {generated}토큰, "
+        f"{generated / elapsed if elapsed > 0 else 0:.1f} tokens/sec"
+    )
+    if assisted:
+        stats = draft.record(draft_begin, streamer.received, streamer.steps)
+        logger.info(
+            f"보조 모델 제안 {stats['proposed']}토큰 중 {stats['accepted']}토큰 수락 "
+            f"(수락률 {stats['acceptance_rate']}, 검증 단계당 {stats['tokens_per_step']}토큰)"
+        )
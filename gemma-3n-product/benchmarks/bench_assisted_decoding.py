@@ -0,0 +1,73 @@
+"""보조(draft) 모델 assisted decoding 벤치마크
+
+같은 이미지/프롬프트를 그리디 디코딩으로 본 모델 단독 생성과 보조 모델 assisted
+생성으로 각각 실행해 디코드 처리량, 속도 향상, 보조 모델 제안 토큰 수락률을
+출력하고, 두 결과 텍스트가 같은지 확인한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_assisted_decoding.py --draft google/gemma-3n-e2b-it --runs 3 --max-new-tokens 256
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from batch_scheduler import GenerationRequest, generate_batch
+from draft_model import DraftModel, check_compatible
+from image_processing import model_image_size, resize_for_model
+from model_loader import INFERENCE_MODES, load_pipeline
+from prompts import build_messages
+from streaming import TokenTimer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="google/gemma-3n-e4b-it")
+    parser.add_argument("--draft", default="google/gemma-3n-e2b-it", help="보조 모델 (같은 토크나이저)")
+    parser.add_argument("--draft-tokens", type=int, default=5, help="시작 제안 토큰 수")
+    parser.add_argument("--mode", default="bf16", choices=INFERENCE_MODES)
+    parser.add_argument("--image", default=None, help="테스트 이미지 (기본: 합성 이미지)")
+    parser.add_argument("--submessage", default="촬영 방향: portrait, 모바일 카메라로 촬영된 이미지입니다.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    pipe = load_pipeline(args.model, args.mode)
+    draft_model = load_pipeline(args.draft, args.mode).model
+    check_compatible(pipe.model, draft_model)
+    draft = DraftModel(draft_model, args.draft_tokens)
+
+    img = Image.open(args.image) if args.image else Image.new("RGB", (1080, 1920), (90, 120, 160))
+    messages = build_messages(resize_for_model(img, model_image_size(pipe.processor.image_processor)), args.submessage)
+
+    def generate(use_draft):
+        outputs = {}
+        timer = TokenTimer()
+        request = GenerationRequest(messages=messages, max_new_tokens=args.max_new_tokens, timer=timer)
+        started = time.perf_counter()
+        generate_batch(pipe.model, pipe.processor, [request], outputs.__setitem__,
+                       draft=draft if use_draft else None, greedy=True)
+        return outputs[0], timer.tokens / (time.perf_counter() - started)
+
+    results = {}
+    for name, use_draft in (("greedy", False), ("assisted", True)):
+        generate(use_draft)  # 워밍업
+        runs = [generate(use_draft) for _ in range(args.runs)]
+        results[name] = (runs[0][0], [tokens_per_second for _, tokens_per_second in runs])
+
+    baseline = statistics.median(results["greedy"][1])
+    assisted = statistics.median(results["assisted"][1])
+    print(f"본 모델 단독 그리디: {baseline:6.2f} tokens/s")
+    print(f"보조 모델 assisted: {assisted:6.2f} tokens/s (속도 향상 {assisted / baseline:.2f}x)")
+    stats = draft.stats()
+    print(f"제안 토큰 수락률: {stats['acceptance_rate']} ({stats['accepted']}/{stats['proposed']})")
+    print(f"그리디 결과와 동일: {'예' if results['greedy'][0] == results['assisted'][0] else '아니오'}")
+
+
+if __name__ == "__main__":
+    main()
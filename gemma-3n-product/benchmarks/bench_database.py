@@ -0,0 +1,193 @@
+"""SQLite 데이터 접근 계층 처리량 벤치마크
+
+기존 방식(요청마다 sqlite3.connect, rollback 저널, 이벤트 루프에서 직접 실행)과
+database.py(스레드별 영구 연결, WAL, pragma 조정, 전용 스레드 풀)의
+기사 조회/검증 추가 처리량을 동시 요청 수를 바꿔 가며 비교한다.
+verify_hot은 이미 --hot-votes개의 검증이 쌓인 기사 하나에 투표가 몰리는 경우로,
+기존 방식은 투표마다 전체 검증을 다시 평균 내고 database.py는 집계를 O(1)로 갱신한다.
+verify_group은 투표 1건씩 보내는 클라이언트들을 VerificationWriter의 그룹 커밋
+(synchronous=FULL, 커밋 후 응답)으로 처리한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_database.py --articles 2000 --requests 4000 --concurrency 1,8,32
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from verification_writer import VerificationWriter, validate_vote
+
+
+# 변경 전 gemma3n_backend.py의 조회/검증 함수 (요청마다 연결을 새로 엶)
+def legacy_get_article_by_id(path, article_id):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM articles WHERE id = ?", (article_id,))  # image_data 포함
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def legacy_add_verification(path, article_id, user_id, user_location, verification_type):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO verifications (article_id, user_id, user_location, verification_type, confidence_score, comment)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (article_id, user_id, user_location, verification_type, 0.0, ""))
+    cursor.execute("""
+        UPDATE articles
+        SET verification_count = verification_count + 1,
+            verification_score = (
+                SELECT AVG(CASE
+                    WHEN verification_type = 'truth' THEN 1.0
+                    WHEN verification_type = 'fake' THEN 0.0
+                    ELSE 0.5
+                END)
+                FROM verifications
+                WHERE article_id = ?
+            )
+        WHERE id = ?
+    """, (article_id, article_id))
+    conn.commit()
+    conn.close()
+    return True
+
+
+def seed(path, articles, hot_votes, legacy):
+    """합성 기사 데이터 생성 (1번 기사에 hot_votes개 검증)
+
+    기존 방식 DB는 이미지를 articles.image_data BLOB으로, 새 방식은 해시만 저장한다.
+    """
+    database.db = database.ConnectionPool(path)
+    database.init_database()
+    conn = database.db.connection()
+    with conn:
+        if legacy:
+            conn.execute("ALTER TABLE articles ADD COLUMN image_data BLOB")
+            conn.executemany(
+                "INSERT INTO articles (request_id, title, content, image_data) VALUES (?, ?, ?, ?)",
+                [(f"req_{i}", f"기사 {i}", "본문 " * 300, os.urandom(64 * 1024)) for i in range(articles)]
+            )
+        else:
+            conn.executemany(
+                "INSERT INTO articles (request_id, title, content, image_hash) VALUES (?, ?, ?, ?)",
+                [(f"req_{i}", f"기사 {i}", "본문 " * 300, os.urandom(32).hex()) for i in range(articles)]
+            )
+        conn.executemany(
+            "INSERT INTO verifications (article_id, user_id, verification_type) VALUES (1, ?, ?)",
+            [(f"user_{i}", ("truth", "fake", "unsure")[i % 3]) for i in range(hot_votes)]
+        )
+    if legacy:
+        # 기존 스키마에는 집계 트리거가 없음 (검증 인덱스는 남겨 AVG 재계산을 유리하게 둠)
+        with conn:
+            conn.execute("DROP TRIGGER IF EXISTS trg_verifications_stats")
+    database.db.close()
+    if legacy:
+        # 기존 방식 측정이 기본 rollback 저널에서 시작하도록 되돌림
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+
+async def run_legacy(path, ops, concurrency):
+    # 기존 핸들러처럼 이벤트 루프에서 직접 실행 (동시성 = 실행 중인 코루틴 수)
+    async def handler(op):
+        kind, article_id = op
+        if kind == "read":
+            legacy_get_article_by_id(path, article_id)
+        else:
+            legacy_add_verification(path, article_id, "bench", "서울", "truth")
+    await run_ops(handler, ops, concurrency)
+
+
+async def run_pooled(ops, concurrency):
+    async def handler(op):
+        kind, article_id = op
+        if kind == "read":
+            await database.db.run(database.get_article_by_id, article_id)
+        else:
+            await database.db.run(database.add_verification, article_id, "bench", "서울", "truth")
+    await run_ops(handler, ops, concurrency)
+
+
+async def run_group(path, ops, concurrency):
+    writer = VerificationWriter(path)
+    writer.start()
+
+    async def handler(op):
+        _, article_id = op
+        row = validate_vote({"article_id": article_id, "user_id": "bench",
+                             "user_location": "서울", "verification_type": "truth"})
+        await writer.submit([row])
+    await run_ops(handler, ops, concurrency)
+    await writer.stop()
+
+
+async def run_ops(handler, ops, concurrency):
+    queue = list(reversed(ops))
+
+    async def client():
+        while queue:
+            await handler(queue.pop())
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+def make_ops(kind, count, articles):
+    if kind == "verify_hot":
+        return [("verify", 1)] * count
+    if kind == "verify_group":
+        kind = "verify"
+    rng = random.Random(0)
+    return [(kind, rng.randint(1, articles)) for _ in range(count)]
+
+
+def report(label, ops, elapsed):
+    print(f"  {label:<8} {len(ops) / elapsed:10.0f} req/s  ({elapsed * 1000:.0f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--hot-votes", type=int, default=100000, help="verify_hot 기사에 미리 쌓인 검증 수")
+    parser.add_argument("--workers", type=int, default=database.DB_WORKERS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            for kind in ("read", "verify", "verify_hot", "verify_group"):
+                ops = make_ops(kind, args.requests, args.articles)
+                print(f"[{kind}] 동시 요청 {concurrency}")
+
+                legacy_path = os.path.join(tmp, f"legacy_{kind}_{concurrency}.db")
+                seed(legacy_path, args.articles, args.hot_votes, legacy=True)
+                started = time.perf_counter()
+                asyncio.run(run_legacy(legacy_path, ops, concurrency))
+                report("legacy", ops, time.perf_counter() - started)
+
+                pooled_path = os.path.join(tmp, f"pooled_{kind}_{concurrency}.db")
+                seed(pooled_path, args.articles, args.hot_votes, legacy=False)
+                database.db = database.ConnectionPool(pooled_path, workers=args.workers)
+                started = time.perf_counter()
+                if kind == "verify_group":
+                    asyncio.run(run_group(pooled_path, ops, concurrency))
+                else:
+                    asyncio.run(run_pooled(ops, concurrency))
+                report("pooled", ops, time.perf_counter() - started)
+                database.db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""이미지 지각 해시 인덱스 조회 벤치마크
+
+무작위 64비트 해시 N개로 PerceptualHashIndex를 만들고, 저장된 해시에서 몇 비트를
+뒤집은 질의(재압축/자르기로 생긴 변형 가정)와 무관한 해시 질의의 조회 지연 시간
+(p50/p99)과 재현율, 그리고 같은 질의를 전체 선형 탐색했을 때의 시간을 출력한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_image_hash_index.py --images 1000000 --queries 1000 --max-distance 6
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_hash_index import HASH_BITS, PerceptualHashIndex, hamming
+
+
+def flip_bits(value: int, count: int) -> int:
+    for bit in random.sample(range(HASH_BITS), count):
+        value ^= 1 << bit
+    return value
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--max-distance", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    hashes = [random.getrandbits(HASH_BITS) for _ in range(args.images)]
+    index = PerceptualHashIndex()
+    started = time.perf_counter()
+    for article_id, value in enumerate(hashes):
+        index.add(article_id, value)
+    print(f"인덱스 구축: {args.images}건, {time.perf_counter() - started:.1f}초")
+
+    # 변형 질의: 저장된 해시에서 0~max_distance 비트를 뒤집음 - 원본을 찾아야 함
+    found = 0
+    near_samples = []
+    for _ in range(args.queries):
+        article_id = random.randrange(args.images)
+        query = flip_bits(hashes[article_id], random.randint(0, args.max_distance))
+        started = time.perf_counter()
+        matches = index.search(query, args.max_distance)
+        near_samples.append(time.perf_counter() - started)
+        found += any(match_id == article_id for _, match_id in matches)
+
+    # 무관한 질의: 대부분 결과 없음 (새 이미지 업로드의 일반적인 경우)
+    miss_samples = []
+    for _ in range(args.queries):
+        query = random.getrandbits(HASH_BITS)
+        started = time.perf_counter()
+        index.search(query, args.max_distance)
+        miss_samples.append(time.perf_counter() - started)
+
+    for name, samples in (("변형 질의", near_samples), ("무관한 질의", miss_samples)):
+        print(f"{name}: p50 {statistics.median(samples) * 1000:.3f}ms, p99 {percentile(samples, 0.99) * 1000:.3f}ms")
+    print(f"재현율: {found / args.queries * 100:.1f}% (거리 {args.max_distance} 이내)")
+
+    # 비교: 선형 탐색 1회
+    query = random.getrandbits(HASH_BITS)
+    started = time.perf_counter()
+    sum(1 for value in hashes if hamming(query, value) <= args.max_distance)
+    print(f"선형 탐색 1회: {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
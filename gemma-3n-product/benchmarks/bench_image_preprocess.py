@@ -0,0 +1,138 @@
+"""업로드 이미지 → 비전 프로세서 입력 경로 벤치마크
+
+기존 경로(1920x1080 축소 → JPEG 인코딩 → base64 data URL → 디코딩 → 프로세서 리사이즈)와
+새 수집 단계(draft 모드 디코딩, 단일 transpose, 프로세서 해상도로 한 번 리사이즈한
+PIL 이미지 직접 전달)의 요청당 지연 시간과 최대 RSS를 비교한다. 각 경로는 별도
+프로세스에서 측정한다. 마지막으로 ImageIngestPool 워커 수에 따른 동시 업로드
+처리량을 측정한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_image_preprocess.py [--image phone.jpg] [--megapixels 12]
+"""
+import argparse
+import asyncio
+import base64
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from transformers import AutoImageProcessor
+
+from image_processing import ImageIngestPool, model_image_size, prepare_model_image, prepare_stored_jpeg
+
+
+def synthetic_jpeg(megapixels: float) -> bytes:
+    """휴대폰 사진 크기(4:3)의 노이즈 JPEG 생성"""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    img = Image.effect_noise((width, height), 64).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def legacy_path(upload: bytes, image_processor):
+    with Image.open(io.BytesIO(upload)) as img:
+        if img.size[0] > img.size[1]:
+            img = img.rotate(90, expand=True)
+        img.thumbnail((1920, 1080), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=85)
+    data_url = f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+    decoded = Image.open(io.BytesIO(base64.b64decode(data_url.split(",", 1)[1]))).convert("RGB")
+    return image_processor(images=decoded, return_tensors="pt")
+
+
+def ingest_path(upload: bytes, image_processor):
+    """draft 디코딩 + 단일 transpose + 모델 해상도 직접 리사이즈, 저장용 JPEG 별도 생성"""
+    model_image = prepare_model_image(upload, model_image_size(image_processor))
+    features = image_processor(images=model_image, return_tensors="pt")
+    # 서버에서는 저장용 JPEG을 다른 워커에서 모델 실행과 병렬로 만듦 (임계 경로 밖)
+    prepare_stored_jpeg(upload)
+    return features
+
+
+def critical_path(upload: bytes, image_processor):
+    """새 경로 중 모델 실행 전에 끝나야 하는 부분만"""
+    model_image = prepare_model_image(upload, model_image_size(image_processor))
+    return image_processor(images=model_image, return_tensors="pt")
+
+
+MODES = {"legacy": legacy_path, "ingest": ingest_path, "ingest_critical": critical_path}
+
+
+def run_mode(mode, model, upload, runs, results):
+    image_processor = AutoImageProcessor.from_pretrained(model)
+    fn = MODES[mode]
+    fn(upload, image_processor)  # 워밍업
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(upload, image_processor)
+        samples.append(time.perf_counter() - started)
+    # Linux ru_maxrss 단위는 KB
+    results[mode] = (samples, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+async def ingest_throughput(upload: bytes, size, workers: int, uploads: int) -> float:
+    pool = ImageIngestPool(workers)
+    pool.start()
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            coro
+            for _ in range(uploads)
+            for coro in (pool.prepare_model_image(upload, size), pool.prepare_stored_jpeg(upload))
+        ])
+        return uploads / (time.perf_counter() - started)
+    finally:
+        pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="google/gemma-3n-e4b-it")
+    parser.add_argument("--image", default=None, help="테스트 사진 (기본: 합성 JPEG)")
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--uploads", type=int, default=32, help="처리량 측정용 동시 업로드 수")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            upload = f.read()
+    else:
+        upload = synthetic_jpeg(args.megapixels)
+    print(f"업로드 크기: {len(upload) / 1024 / 1024:.1f}MB")
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager:
+        results = manager.dict()
+        for mode in MODES:
+            process = ctx.Process(target=run_mode, args=(mode, args.model, upload, args.runs, results))
+            process.start()
+            process.join()
+        results = dict(results)
+
+    for mode, (samples, peak_rss_mb) in results.items():
+        print(f"{mode:16s} 중앙값 {statistics.median(samples) * 1000:7.1f}ms, 최대 RSS {peak_rss_mb:7.1f}MB")
+    legacy, _ = results["legacy"]
+    critical, _ = results["ingest_critical"]
+    print(f"임계 경로 단축: {(statistics.median(legacy) - statistics.median(critical)) * 1000:.1f}ms/요청")
+    print(f"최대 RSS 차이: {results['legacy'][1] - results['ingest'][1]:.1f}MB")
+
+    # 동시 업로드 처리량: 프로세스 풀 워커 수에 따른 확장성
+    size = model_image_size(AutoImageProcessor.from_pretrained(args.model))
+    for workers in sorted({1, os.cpu_count() or 1}):
+        print(f"워커 {workers}개: {asyncio.run(ingest_throughput(upload, size, workers, args.uploads)):.1f} uploads/sec")
+
+
+if __name__ == "__main__":
+    main()
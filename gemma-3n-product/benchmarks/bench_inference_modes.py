@@ -0,0 +1,106 @@
+"""추론 모드(bf16 / int8, torch.compile 여부)별 CPU 생성 성능 벤치마크
+
+모드마다 별도 프로세스에서 모델을 올리고 다음을 측정한다:
+- 로드 시간 (가중치 로드 + 양자화, 워밍업/컴파일 시간은 따로 표시)
+- 최대 RSS
+- 프리필 지연 시간 (요청 시작 → 첫 토큰)
+- 디코드 처리량 (첫 토큰 이후 초당 토큰 수)
+또한 각 모드의 생성 결과가 bf16 결과와 같은지 표시해 정확도 손실을 가늠한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_inference_modes.py --modes bf16,int8,bf16+compile --runs 3 --max-new-tokens 64
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_mode(spec, model, image_path, submessage, runs, max_new_tokens, results):
+    from PIL import Image
+
+    from batch_scheduler import GenerationRequest, generate_batch
+    from image_processing import model_image_size, resize_for_model
+    from model_loader import load_pipeline
+    from prompts import build_messages
+    from streaming import TokenTimer
+
+    mode, _, option = spec.partition("+")
+    started = time.perf_counter()
+    pipe = load_pipeline(model, mode, compile_model=option == "compile")
+    load_seconds = time.perf_counter() - started
+
+    img = Image.open(image_path) if image_path else Image.new("RGB", (1080, 1920), (90, 120, 160))
+    messages = build_messages(resize_for_model(img, model_image_size(pipe.processor.image_processor)), submessage)
+
+    def generate(timer=None):
+        outputs = {}
+        request = GenerationRequest(messages=messages, max_new_tokens=max_new_tokens, timer=timer)
+        generate_batch(pipe.model, pipe.processor, [request], outputs.__setitem__)
+        return outputs[0]
+
+    # 워밍업 (compile 모드는 여기서 그래프 컴파일)
+    started = time.perf_counter()
+    text = generate()
+    warmup_seconds = time.perf_counter() - started
+
+    prefill, decode = [], []
+    for _ in range(runs):
+        timer = TokenTimer()
+        generate(timer)
+        prefill.append(timer.ttft)
+        if timer.mean_inter_token:
+            decode.append(1 / timer.mean_inter_token)
+
+    # Linux ru_maxrss 단위는 KB
+    results[spec] = {
+        "load": load_seconds,
+        "warmup": warmup_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "prefill": prefill,
+        "decode": decode,
+        "text": text,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="google/gemma-3n-e4b-it")
+    parser.add_argument("--image", default=None, help="테스트 이미지 (기본: 합성 이미지)")
+    parser.add_argument("--submessage", default="촬영 방향: portrait, 모바일 카메라로 촬영된 이미지입니다.")
+    parser.add_argument("--modes", default="bf16,int8", help="쉼표로 구분, 모드 뒤에 +compile 추가 가능")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    # 모드마다 새 프로세스에서 측정 (최대 RSS와 컴파일 캐시가 섞이지 않도록)
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Manager() as manager:
+        results = manager.dict()
+        for spec in args.modes.split(","):
+            process = ctx.Process(target=run_mode, args=(
+                spec, args.model, args.image, args.submessage, args.runs, args.max_new_tokens, results
+            ))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                print(f"{spec}: 실패 (종료 코드 {process.exitcode})")
+        results = dict(results)
+
+    reference = results.get("bf16", {}).get("text")
+    for spec, result in results.items():
+        decode = f"{statistics.median(result['decode']):6.2f} tokens/s" if result["decode"] else "     -"
+        same = "-" if reference is None else ("같음" if result["text"] == reference else "다름")
+        print(f"{spec:14s} 로드 {result['load']:6.1f}s (워밍업 {result['warmup']:6.1f}s), "
+              f"최대 RSS {result['peak_rss_mb']:8.0f}MB, "
+              f"프리필 {statistics.median(result['prefill']) * 1000:7.0f}ms, 디코드 {decode}, "
+              f"bf16 대비 출력 {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""주변 기사 조회(R*Tree) 벤치마크
+
+합성 기사 N건(기본 100만, 한국 주변에 도시 밀집 분포)을 임시 DB에 좌표와 함께 넣고,
+GET /articles/nearby가 쓰는 get_articles_nearby의 반경별 지연 시간(p50/p95)을
+이전 방식(모든 행의 위치 텍스트를 파싱해 거리 계산)과 비교한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_nearby.py --articles 1000000 --runs 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from geo import haversine_km, parse_coordinates
+
+# 기사가 몰리는 도시 중심 (위도, 경도)
+CITIES = [(37.5665, 126.9780), (35.1796, 129.0756), (35.8714, 128.6014), (37.4563, 126.7052),
+          (35.1595, 126.8526), (36.3504, 127.3845), (35.5384, 129.3114), (33.4996, 126.5312)]
+
+
+def synthetic_location(rng: random.Random):
+    """도시 중심 주변 정규 분포(약 10km) 또는 전국 균등 분포 좌표"""
+    if rng.random() < 0.8:
+        lat, lon = rng.choice(CITIES)
+        return lat + rng.gauss(0, 0.1), lon + rng.gauss(0, 0.1)
+    return rng.uniform(33.0, 38.5), rng.uniform(125.0, 130.0)
+
+
+def seed(count: int, batch: int = 10_000):
+    rng = random.Random(0)
+    conn = database.db.connection()
+    started = time.perf_counter()
+    for start in range(0, count, batch):
+        rows = []
+        for index in range(start, min(count, start + batch)):
+            lat, lon = synthetic_location(rng)
+            rows.append((f"bench_{index}", "제목", "본문", f"{lat:.6f},{lon:.6f}", lat, lon))
+        with conn:
+            conn.executemany(
+                "INSERT INTO articles (request_id, title, content, location, latitude, longitude) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+    return time.perf_counter() - started
+
+
+def measure(fn, runs):
+    fn()  # 워밍업 (페이지 캐시)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def scan_nearby(conn, lat, lon, radius_km, limit):
+    """비교용: 모든 기사의 위치 텍스트를 파싱해 거리 계산"""
+    matches = []
+    for article_id, location in conn.execute("SELECT id, location FROM articles"):
+        coordinates = parse_coordinates(location)
+        if coordinates is None:
+            continue
+        distance = haversine_km(lat, lon, *coordinates)
+        if distance <= radius_km:
+            matches.append((distance, article_id))
+    return sorted(matches)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--radii", default="1,5,20", help="측정할 반경 목록 (km)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nearby.db")
+        database.db = database.ConnectionPool(path)
+        database.init_database()
+
+        elapsed = seed(args.articles)
+        print(f"기사 {args.articles}건 삽입 (R*Tree 트리거 포함): {elapsed:.1f}초, "
+              f"{args.articles / elapsed:.0f} rows/s, DB {os.path.getsize(path) / 1024 / 1024:.0f}MB")
+
+        lat, lon = CITIES[0]
+        for radius in (float(value) for value in args.radii.split(",")):
+            found = len(database.get_articles_nearby(lat, lon, radius, args.limit))
+            p50, p95 = measure(lambda: database.get_articles_nearby(lat, lon, radius, args.limit), args.runs)
+            print(f"R*Tree 반경 {radius:5.1f}km ({found:3d}건) p50 {p50 * 1000:8.2f}ms, p95 {p95 * 1000:8.2f}ms")
+
+        conn = database.db.connection()
+        p50, _ = measure(lambda: scan_nearby(conn, lat, lon, 5.0, args.limit), max(1, args.runs // 25))
+        print(f"전체 스캔 반경   5.0km           p50 {p50 * 1000:8.2f}ms")
+        database.db.close()
+
+
+if __name__ == "__main__":
+    main()
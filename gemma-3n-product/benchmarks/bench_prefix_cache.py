@@ -0,0 +1,88 @@
+"""시스템 프롬프트 접두부 KV 캐시 프리필 지연 시간 벤치마크
+
+접두부 캐시 없이 전체 프롬프트를 프리필하는 경우와, 사전 계산한 시스템
+프롬프트 KV 캐시에서 이어서 프리필하는 경우의 첫 토큰까지 시간을 비교한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_prefix_cache.py --runs 5 [--image photo.jpg]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from PIL import Image
+from transformers import pipeline
+
+from image_processing import model_image_size, resize_for_model
+from prefix_cache import PrefixKVCache
+from prompts import build_messages, system_prompt_variants
+
+
+def load_model_image(path, size):
+    img = Image.open(path) if path else Image.new("RGB", (1080, 1920), (90, 120, 160))
+    return resize_for_model(img, size)
+
+
+def measure(fn, runs):
+    fn()  # 워밍업
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="google/gemma-3n-e4b-it")
+    parser.add_argument("--image", default=None, help="테스트 이미지 (기본: 합성 이미지)")
+    parser.add_argument("--submessage", default="촬영 방향: portrait, 모바일 카메라로 촬영된 이미지입니다.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    pipe = pipeline("image-text-to-text", model=args.model, device="cpu", torch_dtype=torch.bfloat16)
+    model, processor = pipe.model, pipe.processor
+
+    started = time.perf_counter()
+    prefix_cache = PrefixKVCache(model, processor, system_prompt_variants())
+    print(f"접두부 캐시 생성: {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    image = load_model_image(args.image, model_image_size(processor.image_processor))
+    messages = build_messages(image, args.submessage)
+    inputs = processor.apply_chat_template(
+        messages, add_generation_prompt=True, tokenize=True, return_dict=True, return_tensors="pt"
+    ).to(model.device, dtype=model.dtype)
+    entry = prefix_cache.match(inputs["input_ids"][0])
+    print(f"프롬프트 토큰: {inputs['input_ids'].shape[1]}, "
+          f"캐시된 접두부: {len(entry.token_ids) if entry else 0}")
+
+    def without_cache():
+        with torch.inference_mode():
+            model.generate(**inputs, max_new_tokens=1, do_sample=False)
+
+    def with_cache():
+        past_key_values = prefix_cache.prefill(inputs)
+        with torch.inference_mode():
+            model.generate(**inputs, max_new_tokens=1, do_sample=False,
+                           past_key_values=past_key_values, cache_implementation=None)
+
+    results = {
+        "접두부 캐시 없음": measure(without_cache, args.runs),
+        "접두부 캐시 사용": measure(with_cache, args.runs),
+    }
+    for name, samples in results.items():
+        print(f"{name}: 평균 {statistics.mean(samples) * 1000:.0f}ms, "
+              f"중앙값 {statistics.median(samples) * 1000:.0f}ms ({len(samples)}회)")
+    baseline = statistics.median(results["접두부 캐시 없음"])
+    cached = statistics.median(results["접두부 캐시 사용"])
+    print(f"프리필 단축: {(baseline - cached) * 1000:.0f}ms ({(1 - cached / baseline) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
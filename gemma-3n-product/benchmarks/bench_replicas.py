@@ -0,0 +1,79 @@
+"""모델 복제본 수에 따른 전체 생성 처리량 벤치마크
+
+같은 코어 예산을 복제본 N개로 나눠(복제본당 코어 = 전체 / N) ModelReplicaPool로
+동시 요청을 처리하고, 복제본 수별 초당 요청/토큰 수와 1개 대비 확장 효율을 출력한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_replicas.py --replicas 1,2,4,8 --requests 32 --max-new-tokens 64
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from transformers import AutoProcessor
+
+from batch_scheduler import GenerationRequest
+from image_processing import model_image_size, resize_for_model
+from model_replicas import ModelReplicaPool
+from prompts import build_messages
+from streaming import TokenTimer
+
+
+async def run(pool, messages, requests, max_new_tokens):
+    pool.start()
+    # 모든 복제본이 모델을 올릴 때까지 대기 (로딩 시간은 측정에서 제외)
+    while pool.ready_replicas() < len(pool.stats()["replicas"]):
+        await asyncio.sleep(0.5)
+
+    timers = [TokenTimer() for _ in range(requests)]
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        pool.submit(GenerationRequest(messages=messages, max_new_tokens=max_new_tokens, timer=timer))
+        for timer in timers
+    ))
+    elapsed = time.perf_counter() - started
+    pool.stop(timeout=30)
+    return elapsed, sum(timer.tokens for timer in timers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="google/gemma-3n-e4b-it")
+    parser.add_argument("--image", default=None, help="테스트 이미지 (기본: 합성 이미지)")
+    parser.add_argument("--replicas", default="1,2,4")
+    parser.add_argument("--cores", type=int, default=len(os.sched_getaffinity(0)), help="전체 코어 예산")
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+
+    processor = AutoProcessor.from_pretrained(args.model)
+    img = Image.open(args.image) if args.image else Image.new("RGB", (1080, 1920), (90, 120, 160))
+    messages = build_messages(resize_for_model(img, model_image_size(processor.image_processor)),
+                              "촬영 방향: portrait, 모바일 카메라로 촬영된 이미지입니다.")
+
+    baseline = None
+    for replicas in [int(r) for r in args.replicas.split(",")]:
+        pool = ModelReplicaPool(
+            args.model,
+            replicas=replicas,
+            threads_per_replica=max(1, args.cores // replicas),
+            max_batch_size=args.batch_size,
+            batch_window=0.02,
+            max_queue_size=args.requests
+        )
+        elapsed, tokens = asyncio.run(run(pool, messages, args.requests, args.max_new_tokens))
+        throughput = tokens / elapsed
+        baseline = baseline or throughput / replicas
+        print(f"복제본 {replicas}개 x {max(1, args.cores // replicas)}코어: "
+              f"{args.requests / elapsed:.2f} req/s, {throughput:.1f} tokens/s "
+              f"(확장 효율 {throughput / (baseline * replicas) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""기사 목록/상세 응답 캐시 벤치마크
+
+합성 기사 N건을 임시 DB에 넣고, GET /articles 첫 페이지와 GET /articles/{id} 응답을
+기존 방식(매번 SQLite 조회 + jsonable_encoder + json 직렬화)과 응답 캐시 적중
+(직렬화된 바이트 재사용)으로 만들 때의 요청당 시간을 비교한다. 첫 페이지의 본문 크기와
+gzip/brotli 압축 크기, 투표 1건 뒤 캐시가 다시 채워지는지도 출력한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_response_cache.py --articles 100000 --runs 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+
+import database
+from response_cache import ResponseCache
+
+
+def seed(count: int, batch: int = 10_000):
+    rng = random.Random(0)
+    conn = database.db.connection()
+    for start in range(0, count, batch):
+        with conn:
+            conn.executemany(
+                "INSERT INTO articles (request_id, title, content, image_hash, location) VALUES (?, ?, ?, ?, ?)",
+                [(f"bench_{i}", f"기사 제목 {i}", "기사 본문 문장입니다. " * rng.randint(20, 60),
+                  f"{rng.getrandbits(256):064x}", "37.5665,126.9780 (중구, 서울)")
+                 for i in range(start, min(count, start + batch))]
+            )
+
+
+def make_request(headers=None) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": "/articles", "query_string": b"",
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    })
+
+
+def measure(fn, runs):
+    fn()  # 워밍업
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.db = database.ConnectionPool(os.path.join(tmp, "feed.db"))
+        database.init_database()
+        seed(args.articles)
+        cache = ResponseCache(database.content_versions)
+        request = make_request({"accept-encoding": "gzip, br"})
+
+        def legacy_feed():
+            page = database.get_articles_page(limit=args.limit)
+            return json.dumps(jsonable_encoder(page), ensure_ascii=False).encode("utf-8")
+
+        def cached_feed():
+            entry = cache.get("feed")
+            if entry is None:
+                sequence = database.content_versions.current()
+                page = database.get_articles_page(limit=args.limit)
+                entry = cache.put("feed", page, sequence,
+                                  article_ids=[article["id"] for article in page["articles"]], listing=True)
+            return cache.respond(entry, request)
+
+        def legacy_article():
+            return json.dumps(jsonable_encoder(database.get_article_by_id(1)), ensure_ascii=False).encode("utf-8")
+
+        def cached_article():
+            entry = cache.get("article")
+            if entry is None:
+                sequence = database.content_versions.current()
+                entry = cache.put("article", database.get_article_by_id(1), sequence, article_ids=[1])
+            return cache.respond(entry, request)
+
+        for name, legacy, cached in (("목록 첫 페이지", legacy_feed, cached_feed),
+                                     ("기사 상세", legacy_article, cached_article)):
+            before = measure(legacy, args.runs)
+            after = measure(cached, args.runs)
+            print(f"{name}: 기존 {before * 1e6:8.1f}us, 캐시 적중 {after * 1e6:8.1f}us ({before / after:.0f}배)")
+
+        entry = cache.get("feed")
+        sizes = {encoding: len(entry.encoded(encoding, 0)[0]) for encoding in ("identity", "gzip", "br")}
+        print(f"첫 페이지 본문: {sizes['identity'] / 1024:.1f}KB, gzip {sizes['gzip'] / 1024:.1f}KB, "
+              f"br {sizes['br'] / 1024:.1f}KB")
+        not_modified = cache.respond(entry, make_request({"if-none-match": entry.etag}))
+        print(f"If-None-Match 일치: {not_modified.status_code}")
+
+        # 첫 페이지에 있는 기사에 투표 1건 → 다음 조회는 캐시를 다시 채움
+        newest = entry.article_ids[0]
+        database.add_verification(newest, "bench", "", "truth", 0.9)
+        print(f"투표 후 캐시 적중: {'예' if cache.get('feed') is not None else '아니오 (다시 생성)'}")
+        database.db.close()
+
+
+if __name__ == "__main__":
+    main()
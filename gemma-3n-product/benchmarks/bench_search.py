@@ -0,0 +1,106 @@
+"""기사 전문 검색(FTS5) 벤치마크
+
+합성 한국어 기사 N건(기본 100만)을 임시 DB에 넣어 트리거로 FTS5 인덱스를 유지하면서
+삽입 처리량과 DB 크기를 측정하고, 흔한/드문/여러 단어 검색어와 다음 페이지(커서)
+조회의 지연 시간(p50/p95)을 기존 방식의 LIKE '%...%' 전체 스캔과 비교한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_search.py --articles 1000000 --runs 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+TOPICS = ["화재", "집회", "지진", "폭우", "교통사고", "선거", "축제", "정전", "산불", "침수",
+          "시청", "경찰", "소방", "주민", "도로", "학교", "병원", "공항", "항구", "시장"]
+PARTICLES = ["", "가", "이", "는", "은", "를", "을", "에서", "으로", "의", "와"]
+SYLLABLES = [chr(code) for code in range(0xAC00, 0xD7A4, 37)]
+
+
+def synthetic_article(rng: random.Random, rare_word: str, rare_every: int, index: int):
+    """주제어(Zipf 분포) + 임의 음절 단어 + 조사로 된 약 300자 본문"""
+    words = []
+    for _ in range(60):
+        if rng.random() < 0.3:
+            word = TOPICS[min(int(rng.paretovariate(1.2)) - 1, len(TOPICS) - 1)]
+        else:
+            word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        words.append(word + rng.choice(PARTICLES))
+    if index % rare_every == 0:
+        words.insert(rng.randrange(len(words)), rare_word + "에서")
+    content = " ".join(words) + "."
+    return f"bench_{index}", content.split(" ", 6)[-1][:40], content
+
+
+def seed(count: int, rare_word: str, rare_every: int, batch: int = 10_000):
+    rng = random.Random(0)
+    conn = database.db.connection()
+    started = time.perf_counter()
+    for start in range(0, count, batch):
+        with conn:
+            conn.executemany(
+                "INSERT INTO articles (request_id, title, content) VALUES (?, ?, ?)",
+                [synthetic_article(rng, rare_word, rare_every, i) for i in range(start, min(count, start + batch))]
+            )
+    return time.perf_counter() - started
+
+
+def measure(fn, runs):
+    fn()  # 워밍업 (페이지 캐시)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rare_word = "싱크홀"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.db")
+        database.db = database.ConnectionPool(path)
+        database.init_database()
+
+        elapsed = seed(args.articles, rare_word, rare_every=10_000)
+        print(f"기사 {args.articles}건 삽입 (FTS 트리거 포함): {elapsed:.1f}초, "
+              f"{args.articles / elapsed:.0f} rows/s, DB {os.path.getsize(path) / 1024 / 1024:.0f}MB")
+
+        first_page = database.search_articles("화재", limit=args.limit)
+        queries = {
+            "흔한 단어 '화재'": lambda: database.search_articles("화재", limit=args.limit),
+            f"드문 단어 '{rare_word}'": lambda: database.search_articles(rare_word, limit=args.limit),
+            "두 단어 '화재 주민'": lambda: database.search_articles("화재 주민", limit=args.limit),
+            "'화재' 2페이지": lambda: database.search_articles(
+                "화재", limit=args.limit, cursor=first_page["next_cursor"]),
+        }
+        for name, fn in queries.items():
+            p50, p95 = measure(fn, args.runs)
+            print(f"FTS5 {name:18s} p50 {p50 * 1000:8.1f}ms, p95 {p95 * 1000:8.1f}ms")
+
+        # 비교: 기존 방식의 LIKE 전체 스캔 (드문 단어는 끝까지 읽어야 함)
+        conn = database.db.connection()
+        p50, _ = measure(lambda: conn.execute(
+            "SELECT id FROM articles WHERE title LIKE ? OR content LIKE ? LIMIT ?",
+            (f"%{rare_word}%", f"%{rare_word}%", args.limit)).fetchall(), max(1, args.runs // 5))
+        print(f"LIKE 드문 단어 '{rare_word}'      p50 {p50 * 1000:8.1f}ms")
+        database.db.close()
+
+
+if __name__ == "__main__":
+    main()
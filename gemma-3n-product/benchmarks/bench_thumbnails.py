@@ -0,0 +1,70 @@
+"""기사 이미지 축소본 벤치마크
+
+업로드 사진으로 저장용 JPEG(최대 1920x1080)을 만든 뒤 축소본(가로 160/480/1080,
+WebP와 JPEG)을 생성하는 시간과, 크기/형식별 파일 크기를 원본 저장 JPEG과 비교한다.
+목록 화면 카드 N개를 그릴 때 내려받는 바이트도 함께 출력한다.
+
+사용법 (gemma-3n-product 디렉토리에서):
+    python benchmarks/bench_thumbnails.py [--image phone.jpg] [--runs 10] [--cards 20]
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from image_processing import THUMBNAIL_FORMATS, THUMBNAIL_WIDTHS, encode_thumbnails, prepare_stored_jpeg
+
+
+def synthetic_photo(width: int = 4032, height: int = 3024) -> bytes:
+    """그라데이션 + 약한 노이즈로 된 휴대폰 사진 크기 JPEG (순수 노이즈보다 실제 사진에 가까운 압축률)"""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 24)
+    img = Image.merge("RGB", (gradient, Image.blend(gradient, noise, 0.3), noise.point(lambda v: v // 2)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default=None, help="테스트 사진 (기본: 합성 이미지)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--cards", type=int, default=20, help="목록 한 화면의 기사 카드 수")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            upload = f.read()
+    else:
+        upload = synthetic_photo()
+    stored = prepare_stored_jpeg(upload)
+    print(f"저장용 JPEG: {Image.open(io.BytesIO(stored)).size}, {len(stored) / 1024:.1f}KB")
+
+    encode_thumbnails(stored)  # 워밍업
+    samples = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        thumbnails = encode_thumbnails(stored)
+        samples.append(time.perf_counter() - started)
+    print(f"축소본 {len(thumbnails)}개 생성: 중앙값 {statistics.median(samples) * 1000:.1f}ms")
+
+    for width in THUMBNAIL_WIDTHS:
+        sizes = ", ".join(
+            f"{image_format} {len(thumbnails[(width, image_format)]) / 1024:6.1f}KB"
+            for image_format in THUMBNAIL_FORMATS
+        )
+        print(f"가로 {width:4d}: {sizes}")
+
+    card = thumbnails[(480, "webp")]
+    print(f"카드 {args.cards}개 전송량: 원본 {len(stored) * args.cards / 1024:.0f}KB → "
+          f"480 WebP {len(card) * args.cards / 1024:.0f}KB ({len(stored) / len(card):.1f}배 감소)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,814 @@
+"""SQLite 데이터 접근 계층
+
+요청마다 sqlite3.connect()를 새로 여는 대신 DB 전용 스레드 풀의 스레드별
+연결을 재사용한다. 연결은 WAL 저널링과 조정된 pragma(synchronous, mmap_size,
+cache_size)로 열리고, sqlite3 모듈의 구문 캐시(cached_statements)로 같은 SQL은
+한 번만 준비된다. async 핸들러는 `await db.run(fn, ...)`으로 호출해
+디스크 I/O가 이벤트 루프를 막지 않게 한다.
+"""
+import asyncio
+import base64
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from geo import bounding_boxes, haversine_km, parse_coordinates
+
+logger = logging.getLogger(__name__)
+
+# 데이터베이스 설정
+DATABASE_PATH = os.getenv("DATABASE_PATH", "truthsync_articles.db")
+DB_WORKERS = int(os.getenv("DB_WORKERS", "4"))
+
+# 연결마다 적용하는 pragma
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+class ConnectionPool:
+    """DB 전용 스레드 풀 + 스레드별 영구 연결"""
+
+    def __init__(self, path: str, workers: int = 4, cached_statements: int = 256,
+                 pragmas: Tuple[str, ...] = ()):
+        self.path = path
+        self.cached_statements = cached_statements
+        # 기본 pragma 뒤에 적용 (예: 쓰기 전용 연결의 synchronous = FULL)
+        self.pragmas = CONNECTION_PRAGMAS + tuple(pragmas)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"sqlite-{os.path.basename(path)}")
+
+    def connection(self) -> sqlite3.Connection:
+        """현재 스레드의 연결 (없으면 생성)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 연결은 만든 스레드에서만 사용하고, close()만 종료 시 다른 스레드에서 호출
+            conn = sqlite3.connect(self.path, cached_statements=self.cached_statements, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """DB 함수를 DB 스레드 풀에서 실행하고 결과를 기다림"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+db = ConnectionPool(DATABASE_PATH, workers=DB_WORKERS)
+
+
+class ContentVersions:
+    """기사 쓰기 순번 (응답 캐시 무효화용)
+
+    쓰기가 커밋될 때마다 순번을 올리고, 바뀐 기사에는 그 순번을, 기사 추가/삭제
+    (목록 구성과 전체 개수가 바뀌는 쓰기)에는 목록 순번을 기록한다. 응답을 만들기
+    전에 읽은 순번보다 뒤에 바뀐 것이 있으면 그 응답은 오래된 것이다.
+
+    기사별 순번은 최근에 바뀐 max_articles개만 기억한다. 잊은 기사의 순번은
+    잊은 항목 중 가장 최근 순번(floor)으로 간주하므로, floor보다 먼저 만든
+    응답은 바뀌지 않았더라도 오래된 것으로 판단될 수 있다 (안전한 쪽으로 틀림).
+    """
+
+    def __init__(self, max_articles: int = 10000):
+        self.max_articles = max_articles
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._listing = 0
+        self._floor = 0
+        # 기사 ID → 마지막으로 바뀐 순번 (순번 오름차순으로 삽입 순서 유지)
+        self._articles: Dict[int, int] = {}
+
+    def current(self) -> int:
+        return self._sequence
+
+    def bump(self, article_ids: Iterable[int] = (), listing: bool = False):
+        with self._lock:
+            self._sequence += 1
+            for article_id in article_ids:
+                self._articles.pop(article_id, None)
+                self._articles[article_id] = self._sequence
+            while len(self._articles) > self.max_articles:
+                self._floor = self._articles.pop(next(iter(self._articles)))
+            if listing:
+                self._listing = self._sequence
+
+    def changed_since(self, sequence: int, article_ids: Iterable[int] = (), listing: bool = False) -> bool:
+        if listing and self._listing > sequence:
+            return True
+        articles = self._articles
+        floor = self._floor
+        return any(articles.get(article_id, floor) > sequence for article_id in article_ids)
+
+
+content_versions = ContentVersions()
+
+# 검증 타입 (verifications.verification_type CHECK 제약과 동일)
+VERIFICATION_TYPES = ("truth", "fake", "unsure")
+
+# 목록/상세 조회에서 읽는 메타데이터 열 (이미지 본문은 ImageStore에서 따로 제공)
+ARTICLE_COLUMNS = (
+    "id, request_id, title, content, image_hash, submessage, location, latitude, longitude, orientation, "
+    "created_at, updated_at, status, verification_score, verification_count, "
+    "truth_count, fake_count, unsure_count, confidence_sum"
+)
+
+# 전문 검색: 단어 단위(unicode61) 토큰화 + 2/3글자 접두어 인덱스
+# 한국어는 조사가 붙어 "화재가", "화재로"처럼 저장되므로 검색어마다 접두어 검색("화재"*)을 한다.
+# trigram은 3글자 미만 검색어(대부분의 두 음절 단어)를 인덱스로 찾지 못해 사용하지 않는다.
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2"
+SEARCH_PREFIXES = "2 3"
+# BM25 열 가중치 (title, content) - 제목 일치를 본문보다 높게
+SEARCH_COLUMN_WEIGHTS = (5.0, 1.0)
+SEARCH_MAX_TERMS = 8
+
+# 검증 집계 열 (verifications INSERT 트리거가 O(1)로 갱신)
+VERIFICATION_STAT_COLUMNS = (
+    ("truth_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("fake_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("unsure_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("confidence_sum", "REAL NOT NULL DEFAULT 0.0"),
+)
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row["name"] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def ensure_column(conn: sqlite3.Connection, table: str, column: str, declaration: str) -> bool:
+    """열이 없으면 추가하고 True 반환"""
+    if column not in _table_columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        return True
+    return False
+
+
+def init_database():
+    """데이터베이스 초기화 및 테이블 생성"""
+    try:
+        conn = db.connection()
+        with conn:
+            # 기사 테이블 생성
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    request_id TEXT UNIQUE NOT NULL,
+                    title TEXT,
+                    content TEXT NOT NULL,
+                    image_hash TEXT,
+                    submessage TEXT,
+                    location TEXT,
+                    latitude REAL,
+                    longitude REAL,
+                    orientation TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    status TEXT DEFAULT 'published',
+                    verification_score REAL DEFAULT 0.0,
+                    verification_count INTEGER DEFAULT 0,
+                    truth_count INTEGER NOT NULL DEFAULT 0,
+                    fake_count INTEGER NOT NULL DEFAULT 0,
+                    unsure_count INTEGER NOT NULL DEFAULT 0,
+                    confidence_sum REAL NOT NULL DEFAULT 0.0
+                )
+            """)
+
+            # 검증 테이블 생성
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS verifications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    article_id INTEGER NOT NULL,
+                    user_id TEXT,
+                    user_location TEXT,
+                    user_latitude REAL,
+                    user_longitude REAL,
+                    verification_type TEXT CHECK(verification_type IN ('truth', 'fake', 'unsure')),
+                    confidence_score REAL,
+                    comment TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (article_id) REFERENCES articles (id)
+                )
+            """)
+
+            # 사용자 테이블 생성
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT UNIQUE NOT NULL,
+                    username TEXT,
+                    email TEXT,
+                    location TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # 이전 스키마(image_data BLOB만 있는 DB)에 이미지 해시 열 추가
+            ensure_column(conn, "articles", "image_hash", "TEXT")
+
+            # 이전 스키마에 좌표 열 추가 (추가된 경우 기존 위치 텍스트에서 백필)
+            coordinates_added = ensure_column(conn, "articles", "latitude", "REAL")
+            ensure_column(conn, "articles", "longitude", "REAL")
+            ensure_column(conn, "verifications", "user_latitude", "REAL")
+            ensure_column(conn, "verifications", "user_longitude", "REAL")
+
+            # 이전 스키마에 검증 집계 열 추가 (추가된 경우 기존 투표로 재계산)
+            stats_added = False
+            for column, declaration in VERIFICATION_STAT_COLUMNS:
+                stats_added |= ensure_column(conn, "articles", column, declaration)
+
+            # 검증 1건마다 기사 집계를 상수 시간에 갱신
+            # 점수는 기존 AVG(truth=1, fake=0, unsure=0.5)와 같은 (truth + 0.5 * unsure) / count
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_verifications_stats AFTER INSERT ON verifications
+                BEGIN
+                    UPDATE articles
+                    SET truth_count = truth_count + (NEW.verification_type = 'truth'),
+                        fake_count = fake_count + (NEW.verification_type = 'fake'),
+                        unsure_count = unsure_count + (NEW.verification_type = 'unsure'),
+                        confidence_sum = confidence_sum + COALESCE(NEW.confidence_score, 0.0),
+                        verification_count = verification_count + 1,
+                        verification_score = (
+                            truth_count + (NEW.verification_type = 'truth')
+                            + 0.5 * (unsure_count + (NEW.verification_type = 'unsure'))
+                        ) / (verification_count + 1)
+                    WHERE id = NEW.article_id;
+                END
+            """)
+
+            # 피드(최신순 keyset 페이지)와 기사별 검증 목록 인덱스
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_articles_created ON articles (created_at DESC, id DESC)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_verifications_article_created "
+                "ON verifications (article_id, created_at DESC, id DESC)"
+            )
+
+            # 기사 이미지 지각 해시 (중복/유사 이미지 검색 인덱스의 영구 저장소)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS article_phashes (
+                    article_id INTEGER PRIMARY KEY,
+                    phash INTEGER NOT NULL
+                )
+            """)
+
+            # 기사 제목/본문 전문 검색 인덱스 (articles를 원본으로 하는 external content 테이블)
+            fts_created = not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+            ).fetchone()
+            conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                    title, content,
+                    content = 'articles', content_rowid = 'id',
+                    tokenize = '{SEARCH_TOKENIZER}', prefix = '{SEARCH_PREFIXES}'
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_fts_insert AFTER INSERT ON articles
+                BEGIN
+                    INSERT INTO articles_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_fts_delete AFTER DELETE ON articles
+                BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, title, content)
+                    VALUES ('delete', OLD.id, OLD.title, OLD.content);
+                END
+            """)
+            # 검증 집계 갱신(UPDATE)마다 재색인하지 않도록 제목/본문 변경에만 반응
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_fts_update AFTER UPDATE OF title, content ON articles
+                BEGIN
+                    INSERT INTO articles_fts (articles_fts, rowid, title, content)
+                    VALUES ('delete', OLD.id, OLD.title, OLD.content);
+                    INSERT INTO articles_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+                END
+            """)
+            if fts_created:
+                # 기존 기사 색인
+                conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+
+            # 기사 좌표 R*Tree (점을 크기 0인 상자로 저장, 반경 검색의 경계 상자 필터)
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_geo USING rtree(
+                    id, min_lat, max_lat, min_lon, max_lon
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_geo_insert AFTER INSERT ON articles
+                WHEN NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+                BEGIN
+                    INSERT INTO articles_geo VALUES (NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_geo_update AFTER UPDATE OF latitude, longitude ON articles
+                BEGIN
+                    DELETE FROM articles_geo WHERE id = OLD.id;
+                    INSERT INTO articles_geo
+                    SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude
+                    WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_geo_delete AFTER DELETE ON articles
+                BEGIN
+                    DELETE FROM articles_geo WHERE id = OLD.id;
+                END
+            """)
+
+            # 전체 기사 수는 COUNT(*) 대신 트리거로 유지하는 카운터에서 읽음
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS row_counts (
+                    table_name TEXT PRIMARY KEY,
+                    row_count INTEGER NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO row_counts (table_name, row_count) "
+                "SELECT 'articles', COUNT(*) FROM articles"
+            )
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_count_insert AFTER INSERT ON articles
+                BEGIN
+                    UPDATE row_counts SET row_count = row_count + 1 WHERE table_name = 'articles';
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_articles_count_delete AFTER DELETE ON articles
+                BEGIN
+                    UPDATE row_counts SET row_count = row_count - 1 WHERE table_name = 'articles';
+                END
+            """)
+
+        if stats_added:
+            rebuild_verification_stats()
+        if coordinates_added:
+            backfill_coordinates()
+
+        logger.info("데이터베이스 초기화 완료")
+
+    except Exception as e:
+        logger.error(f"데이터베이스 초기화 실패: {e}")
+
+
+def migrate_image_blobs(image_store, batch_size: int = 100) -> int:
+    """이전 스키마의 articles.image_data BLOB을 이미지 저장소로 옮기고 해시로 대체
+
+    옮긴 기사 수를 반환한다. BLOB을 비운 페이지는 SQLite가 이후 쓰기에 재사용한다.
+    """
+    conn = db.connection()
+    if "image_data" not in _table_columns(conn, "articles"):
+        return 0
+
+    moved = 0
+    while True:
+        rows = conn.execute("""
+            SELECT id, image_data FROM articles
+            WHERE image_data IS NOT NULL
+            LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            break
+        with conn:
+            for row in rows:
+                image_hash = image_store.put(bytes(row["image_data"]))
+                conn.execute(
+                    "UPDATE articles SET image_hash = ?, image_data = NULL WHERE id = ?",
+                    (image_hash, row["id"])
+                )
+        moved += len(rows)
+
+    if moved:
+        logger.info(f"기사 이미지 BLOB 이전 완료: {moved}건")
+    return moved
+
+
+def save_article_to_db(request_id: str, content: str, image_hash: Optional[str] = None,
+                       submessage: str = "", location: str = "", orientation: str = "",
+                       phash: Optional[int] = None,
+                       coordinates: Optional[Tuple[float, float]] = None) -> bool:
+    """기사를 데이터베이스에 저장 (phash: 이미지 지각 해시, 부호 있는 64비트,
+    coordinates: 촬영 위치 (위도, 경도))"""
+    try:
+        # 제목 추출 (첫 번째 문장을 제목으로 사용)
+        title = content.split('.')[0][:100] + "..." if len(content.split('.')[0]) > 100 else content.split('.')[0]
+
+        conn = db.connection()
+        with conn:
+            latitude, longitude = coordinates or (None, None)
+            cursor = conn.execute("""
+                INSERT INTO articles (request_id, title, content, image_hash, submessage, location, latitude, longitude, orientation)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (request_id, title, content, image_hash, submessage, location, latitude, longitude, orientation))
+            if phash is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO article_phashes (article_id, phash) VALUES (?, ?)",
+                    (cursor.lastrowid, phash)
+                )
+        content_versions.bump([cursor.lastrowid], listing=True)
+
+        logger.info(f"기사 저장 완료: {request_id}")
+        return True
+
+    except Exception as e:
+        logger.error(f"기사 저장 실패: {e}")
+        return False
+
+
+def get_article_by_id(article_id: int) -> Optional[Dict[str, Any]]:
+    """ID로 기사 조회"""
+    try:
+        row = db.connection().execute(
+            f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE id = ?", (article_id,)
+        ).fetchone()
+        if row:
+            return dict(row)
+        return None
+
+    except Exception as e:
+        logger.error(f"기사 조회 실패: {e}")
+        return None
+
+
+def get_article_id_by_request_id(request_id: str) -> Optional[int]:
+    """요청 ID로 저장된 기사 ID 조회 (실패 시 예외 발생)"""
+    row = db.connection().execute(
+        "SELECT id FROM articles WHERE request_id = ?", (request_id,)
+    ).fetchone()
+    return row["id"] if row else None
+
+
+def get_all_articles(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    """모든 기사 조회 (offset 방식 - 깊은 페이지는 get_articles_page 사용)"""
+    try:
+        rows = db.connection().execute(f"""
+            SELECT {ARTICLE_COLUMNS} FROM articles
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+        """, (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    except Exception as e:
+        logger.error(f"기사 목록 조회 실패: {e}")
+        return []
+
+
+def encode_cursor(article: Dict[str, Any]) -> str:
+    """기사의 (created_at, id)를 다음 페이지 커서 문자열로 변환"""
+    payload = json.dumps([article["created_at"], article["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """커서 문자열 → (created_at, id) (형식이 잘못되면 ValueError)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, article_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return str(created_at), int(article_id)
+    except Exception as e:
+        raise ValueError(f"잘못된 커서: {cursor}") from e
+
+
+def count_articles() -> int:
+    """전체 기사 수 (트리거로 유지되는 카운터)"""
+    row = db.connection().execute(
+        "SELECT row_count FROM row_counts WHERE table_name = 'articles'"
+    ).fetchone()
+    return row["row_count"] if row else 0
+
+
+def get_articles_page(limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """최신순 기사 한 페이지를 keyset 방식으로 조회 (실패 시 예외 발생)
+
+    cursor 이후(더 오래된) 기사를 idx_articles_created 인덱스 범위 검색으로 읽으므로
+    페이지 깊이와 테이블 크기에 관계없이 비용이 일정하다.
+    """
+    conn = db.connection()
+    if cursor:
+        created_at, article_id = decode_cursor(cursor)
+        rows = conn.execute(f"""
+            SELECT {ARTICLE_COLUMNS} FROM articles
+            WHERE (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, (created_at, article_id, limit)).fetchall()
+    else:
+        rows = conn.execute(f"""
+            SELECT {ARTICLE_COLUMNS} FROM articles
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, (limit,)).fetchall()
+
+    articles = [dict(row) for row in rows]
+    return {
+        "articles": articles,
+        "next_cursor": encode_cursor(articles[-1]) if len(articles) == limit else None,
+        "total": count_articles(),
+    }
+
+
+def get_articles_nearby(latitude: float, longitude: float, radius_km: float,
+                        limit: int = 50) -> List[Dict[str, Any]]:
+    """좌표에서 radius_km 이내 기사를 가까운 순으로 (distance_km 포함, 실패 시 예외 발생)
+
+    R*Tree로 반경 원을 덮는 경계 상자 안의 점만 읽고, 상자 모서리 부분은 하버사인
+    거리로 걸러낸다. 후보 순위는 R*Tree 좌표(32비트 실수, 오차 수 m)로 매기고,
+    반환하는 기사의 거리는 원본 열로 다시 계산한다.
+    """
+    conn = db.connection()
+    candidates = []
+    for min_lat, max_lat, min_lon, max_lon in bounding_boxes(latitude, longitude, radius_km):
+        candidates += conn.execute("""
+            SELECT id, min_lat, min_lon FROM articles_geo
+            WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?
+        """, (min_lat, max_lat, min_lon, max_lon)).fetchall()
+
+    nearest = heapq.nsmallest(limit, (
+        (distance, article_id)
+        for article_id, point_lat, point_lon in candidates
+        for distance in (haversine_km(latitude, longitude, point_lat, point_lon),)
+        if distance <= radius_km
+    ))
+    if not nearest:
+        return []
+
+    ids = [article_id for _, article_id in nearest]
+    rows = conn.execute(
+        f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall()
+    articles = []
+    for row in rows:
+        article = dict(row)
+        article["distance_km"] = round(
+            haversine_km(latitude, longitude, article["latitude"], article["longitude"]), 3
+        )
+        articles.append(article)
+    articles.sort(key=lambda article: (article["distance_km"], article["id"]))
+    return articles
+
+
+def backfill_coordinates(batch_size: int = 1000) -> int:
+    """좌표 열이 없던 기존 기사/검증의 위치 텍스트에서 위도·경도를 추출해 채움
+
+    기사는 location("촬영 위치:"에서 뽑아 저장한 값), 검증은 user_location 맨 앞의
+    "위도,경도"를 파싱한다. submessage 본문의 숫자는 좌표로 쓰지 않는다.
+    기사 좌표 UPDATE는 트리거가 R*Tree에 반영한다. 채운 행 수를 반환한다.
+    """
+    conn = db.connection()
+    filled = 0
+    for table, select, update in (
+        ("articles",
+         "SELECT id, location FROM articles "
+         "WHERE id > ? AND latitude IS NULL ORDER BY id LIMIT ?",
+         "UPDATE articles SET latitude = ?, longitude = ? WHERE id = ?"),
+        ("verifications",
+         "SELECT id, user_location FROM verifications "
+         "WHERE id > ? AND user_latitude IS NULL ORDER BY id LIMIT ?",
+         "UPDATE verifications SET user_latitude = ?, user_longitude = ? WHERE id = ?"),
+    ):
+        last_id = 0
+        while True:
+            rows = conn.execute(select, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            updates = [
+                (*coordinates, row_id)
+                for row_id, text in rows
+                for coordinates in (parse_coordinates(text),)
+                if coordinates is not None
+            ]
+            with conn:
+                conn.executemany(update, updates)
+            filled += len(updates)
+        logger.info(f"{table} 좌표 백필 완료")
+    if filled:
+        logger.info(f"위치 텍스트에서 좌표 백필: {filled}건")
+    return filled
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """사용자 검색어 → FTS5 MATCH 식 (공백으로 나눈 단어마다 접두어 검색, 모두 포함)
+
+    단어는 큰따옴표로 감싼 문자열로만 넘기므로 사용자 입력의 FTS5 연산자는 해석되지 않는다.
+    """
+    terms = [term.replace('"', "") for term in query.split()]
+    terms = [term for term in terms if term][:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def encode_search_cursor(score: float, article_id: int) -> str:
+    """검색 결과의 (BM25 점수, id)를 다음 페이지 커서로 변환"""
+    payload = json.dumps([score, article_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, article_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), int(article_id)
+    except Exception as e:
+        raise ValueError(f"잘못된 커서: {cursor}") from e
+
+
+def search_articles(query: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """제목/본문 전문 검색 - BM25 관련도순 한 페이지와 하이라이트 스니펫 (실패 시 예외 발생)
+
+    (점수, id) keyset으로 다음 페이지를 이어 읽는다. 스니펫과 기사 열은 정렬이 끝난
+    현재 페이지 행에 대해서만 따로 읽어, 일치 행 전체에 대해 만들지 않는다.
+    """
+    match = build_match_query(query)
+    if match is None:
+        raise ValueError("검색어가 비어 있습니다")
+    after = decode_search_cursor(cursor) if cursor else (float("-inf"), 0)
+
+    conn = db.connection()
+    # bm25()는 값이 작을수록 관련도가 높음
+    ranked = conn.execute("""
+        SELECT id, score FROM (
+            SELECT rowid AS id, bm25(articles_fts, ?, ?) AS score
+            FROM articles_fts WHERE articles_fts MATCH ?
+        )
+        WHERE (score, id) > (?, ?)
+        ORDER BY score, id
+        LIMIT ?
+    """, (*SEARCH_COLUMN_WEIGHTS, match, *after, limit)).fetchall()
+    if not ranked:
+        return {"articles": [], "next_cursor": None}
+
+    ids = [row["id"] for row in ranked]
+    placeholders = ",".join("?" * len(ids))
+    articles = {
+        row["id"]: dict(row)
+        for row in conn.execute(f"SELECT {ARTICLE_COLUMNS} FROM articles WHERE id IN ({placeholders})", ids)
+    }
+    snippets = dict(conn.execute(f"""
+        SELECT rowid, snippet(articles_fts, -1, '<mark>', '</mark>', '…', 16)
+        FROM articles_fts WHERE articles_fts MATCH ? AND rowid IN ({placeholders})
+    """, (match, *ids)).fetchall())
+
+    results = []
+    for row in ranked:
+        article = articles.get(row["id"])
+        if article is None:
+            continue
+        article["snippet"] = snippets.get(row["id"], "")
+        article["score"] = row["score"]
+        results.append(article)
+    last = ranked[-1]
+    return {
+        "articles": results,
+        "next_cursor": encode_search_cursor(last["score"], last["id"]) if len(ranked) == limit else None,
+    }
+
+
+def add_verification(article_id: int, user_id: str, user_location: str,
+                     verification_type: str, confidence_score: float = 0.0, comment: str = "") -> bool:
+    """검증 정보 추가"""
+    try:
+        conn = db.connection()
+        with conn:
+            # 기사 집계(개수, 점수)는 trg_verifications_stats 트리거가 갱신
+            conn.execute("""
+                INSERT INTO verifications (article_id, user_id, user_location, verification_type, confidence_score, comment)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (article_id, user_id, user_location, verification_type, confidence_score, comment))
+        content_versions.bump([article_id])
+
+        logger.info(f"검증 정보 추가 완료: article_id={article_id}, type={verification_type}")
+        return True
+
+    except Exception as e:
+        logger.error(f"검증 정보 추가 실패: {e}")
+        return False
+
+
+def rebuild_verification_stats() -> int:
+    """verifications 전체에서 기사별 검증 집계를 다시 계산 (복구용) - 갱신한 기사 수 반환"""
+    conn = db.connection()
+    with conn:
+        conn.execute("""
+            UPDATE articles
+            SET truth_count = 0, fake_count = 0, unsure_count = 0, confidence_sum = 0.0,
+                verification_count = 0, verification_score = 0.0
+        """)
+        cursor = conn.execute("""
+            UPDATE articles
+            SET truth_count = stats.truth,
+                fake_count = stats.fake,
+                unsure_count = stats.unsure,
+                confidence_sum = stats.confidence,
+                verification_count = stats.total,
+                verification_score = (stats.truth + 0.5 * stats.unsure) / stats.total
+            FROM (
+                SELECT article_id,
+                       SUM(verification_type = 'truth') AS truth,
+                       SUM(verification_type = 'fake') AS fake,
+                       SUM(verification_type = 'unsure') AS unsure,
+                       COALESCE(SUM(confidence_score), 0.0) AS confidence,
+                       COUNT(*) AS total
+                FROM verifications
+                GROUP BY article_id
+            ) AS stats
+            WHERE articles.id = stats.article_id
+        """)
+    logger.info(f"검증 집계 재계산 완료: {cursor.rowcount}건")
+    return cursor.rowcount
+
+
+def get_verifications_by_article(article_id: int) -> List[Dict[str, Any]]:
+    """기사의 검증 정보 조회 (실패 시 예외 발생)"""
+    rows = db.connection().execute("""
+        SELECT * FROM verifications
+        WHERE article_id = ?
+        ORDER BY created_at DESC, id DESC
+    """, (article_id,)).fetchall()
+    return [dict(row) for row in rows]
+
+
+def delete_article_from_db(article_id: int) -> bool:
+    """기사와 관련 검증 정보 삭제 - 기사가 없으면 False (실패 시 예외 발생)"""
+    conn = db.connection()
+    with conn:
+        # 기사 존재 확인
+        if not conn.execute("SELECT id FROM articles WHERE id = ?", (article_id,)).fetchone():
+            return False
+
+        # 관련 검증 정보 삭제
+        conn.execute("DELETE FROM verifications WHERE article_id = ?", (article_id,))
+
+        # 기사 삭제
+        conn.execute("DELETE FROM article_phashes WHERE article_id = ?", (article_id,))
+        conn.execute("DELETE FROM articles WHERE id = ?", (article_id,))
+    content_versions.bump([article_id], listing=True)
+    return True
+
+
+def get_article_phashes() -> List[Tuple[int, int]]:
+    """저장된 (기사 ID, 지각 해시) 전체 (서버 시작 시 인덱스 적재용)"""
+    return db.connection().execute("SELECT article_id, phash FROM article_phashes").fetchall()
+
+
+def get_articles_missing_phash(after_id: int = 0, limit: int = 100) -> List[Tuple[int, str]]:
+    """지각 해시가 없는 이미지 기사 (id, image_hash) - after_id 이후 id 순"""
+    return db.connection().execute("""
+        SELECT a.id, a.image_hash FROM articles a
+        LEFT JOIN article_phashes p ON p.article_id = a.id
+        WHERE a.id > ? AND a.image_hash IS NOT NULL AND p.article_id IS NULL
+        ORDER BY a.id
+        LIMIT ?
+    """, (after_id, limit)).fetchall()
+
+
+def save_article_phashes(rows: List[Tuple[int, int]]):
+    """(기사 ID, 지각 해시) 일괄 저장 - 그 사이 삭제된 기사는 건너뜀"""
+    conn = db.connection()
+    with conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO article_phashes (article_id, phash)
+            SELECT id, ? FROM articles WHERE id = ?
+        """, [(phash, article_id) for article_id, phash in rows])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TruthSync 데이터베이스 관리")
+    parser.add_argument("command", choices=["rebuild-verification-stats", "backfill-coordinates"])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_database()
+    if args.command == "rebuild-verification-stats":
+        rebuild_verification_stats()
+    elif args.command == "backfill-coordinates":
+        backfill_coordinates()
+    db.close()
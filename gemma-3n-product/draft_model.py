@@ -0,0 +1,79 @@
+"""보조(draft) 모델을 이용한 assisted decoding
+
+작은 모델(예: gemma-3n-e2b-it)이 토큰 몇 개를 먼저 제안하고, 본 모델은 제안된
+토큰을 한 번의 forward로 검증해 일치하는 만큼 받아들인다. 그리디 디코딩이면
+결과는 본 모델 단독 그리디 디코딩과 같고, 수락률이 높을수록 본 모델 forward
+횟수가 줄어든다. transformers의 assisted generation은 배치 크기 1만 지원하므로
+단일 요청에만 사용한다.
+
+수락률 = 수락된 제안 토큰 / 제안 토큰. 제안 토큰 수는 후보 생성기가 단계마다
+호출하는 보조 모델 generate()가 만든 토큰 수로(프롬프트/이미지 프리필 제외),
+수락된 토큰 수는 (스트리머가 받은 토큰 - 검증 단계 수)로 계산한다.
+"""
+import logging
+from typing import Any, Dict
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DraftModel:
+    """보조 모델과 제안/수락 토큰 집계"""
+
+    def __init__(self, model, draft_tokens: int = 5):
+        self.model = model
+        self.draft_tokens = draft_tokens
+        # 시작 제안 길이 - 모두 수락되면 늘리고 거절되면 줄임 (transformers heuristic 스케줄)
+        model.generation_config.num_assistant_tokens = draft_tokens
+        model.generation_config.num_assistant_tokens_schedule = "heuristic"
+        self.proposed = 0
+        self.accepted = 0
+        self._proposed = 0
+        # 후보 생성기는 단계마다 보조 모델 generate()로 후보 토큰을 만듦 - 새로 만든 토큰 수를 셈
+        self._generate = model.generate
+        model.generate = self._counting_generate
+
+    def _counting_generate(self, *args, **kwargs):
+        output = self._generate(*args, **kwargs)
+        input_ids = kwargs.get("input_ids", args[0] if args else None)
+        sequences = getattr(output, "sequences", output)
+        if input_ids is not None:
+            self._proposed += sequences.shape[-1] - input_ids.shape[-1]
+        return output
+
+    def begin(self) -> int:
+        """생성 시작 전 제안 토큰 카운터 (record()에 그대로 전달)"""
+        return self._proposed
+
+    def record(self, begin: int, received: int, steps: int) -> Dict[str, Any]:
+        """생성 1건의 제안/수락 토큰 수를 지표에 반영"""
+        proposed = self._proposed - begin
+        accepted = max(0, received - steps)
+        self.proposed += proposed
+        self.accepted += accepted
+        metrics.inc("assisted_generations")
+        metrics.inc("draft_tokens_proposed", proposed)
+        metrics.inc("draft_tokens_accepted", accepted)
+        return {
+            "proposed": proposed,
+            "accepted": accepted,
+            "acceptance_rate": round(accepted / proposed, 3) if proposed else None,
+            "tokens_per_step": round(received / steps, 2) if steps else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "draft_tokens": self.draft_tokens,
+            "proposed": self.proposed,
+            "accepted": self.accepted,
+            "acceptance_rate": round(self.accepted / self.proposed, 3) if self.proposed else None,
+        }
+
+
+def check_compatible(model, draft_model):
+    """본 모델과 보조 모델이 같은 어휘를 쓰는지 확인 (토큰 ID를 그대로 비교하므로)"""
+    vocab = model.config.get_text_config().vocab_size
+    draft_vocab = draft_model.config.get_text_config().vocab_size
+    if vocab != draft_vocab:
+        raise ValueError(f"보조 모델 어휘 크기가 다릅니다: {draft_vocab} (본 모델 {vocab})")
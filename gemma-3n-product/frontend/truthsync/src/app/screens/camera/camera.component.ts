@@ -460,7 +460,8 @@ export class CameraComponent implements OnInit, OnDestroy, AfterViewInit {
             this.errorMessage = progressResult.error || 'AI 분석에 실패했습니다.';
             this.isStreaming = false;
           }
-        }
+        },
+        this.currentLocation
       );
       
       if (result.status === 'error') {
@@ -537,6 +538,11 @@ export class CameraComponent implements OnInit, OnDestroy, AfterViewInit {
       }
       
       formData.append('submessage', fullSubmessage);
+      // 촬영 좌표는 별도 필드로 전송 (주변 기사 검색용)
+      if (this.currentLocation) {
+        formData.append('latitude', String(this.currentLocation.latitude));
+        formData.append('longitude', String(this.currentLocation.longitude));
+      }
       console.log('위치 및 방향 정보 포함된 부연설명:', fullSubmessage);
       console.log('FormData 생성 완료');
       
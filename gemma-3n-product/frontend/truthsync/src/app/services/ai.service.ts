@@ -1,5 +1,6 @@
 import { Injectable } from '@angular/core';
 import { environment } from '../../environments/environment';
+import { LocationInfo } from './location.service';
 
 export interface AIAnalysisResult {
   text: string;
@@ -81,7 +82,11 @@ export class AIService {
     });
   }
 
-  async analyzeImage(imageData: string, submessage: string = ''): Promise<AIAnalysisResult> {
+  async analyzeImage(
+    imageData: string,
+    submessage: string = '',
+    location?: Pick<LocationInfo, 'latitude' | 'longitude'> | null
+  ): Promise<AIAnalysisResult> {
     if (!this.isModelLoaded) {
       await this.initializeModel();
     }
@@ -97,6 +102,11 @@ export class AIService {
       const formData = new FormData();
       formData.append('image', blob, 'captured_image.jpg');
       formData.append('submessage', submessage || '모바일 카메라로 촬영된 이미지입니다.');
+      // 촬영 좌표는 별도 필드로 전송 (주변 기사 검색용)
+      if (location) {
+        formData.append('latitude', String(location.latitude));
+        formData.append('longitude', String(location.longitude));
+      }
       
       // 백엔드 API 호출
       const response = await fetch(`${this.apiUrl}/generate-article`, {
@@ -132,7 +142,8 @@ export class AIService {
   async analyzeImageStreaming(
     imageData: string, 
     submessage: string = '',
-    onProgress?: (result: AIAnalysisResult) => void
+    onProgress?: (result: AIAnalysisResult) => void,
+    location?: Pick<LocationInfo, 'latitude' | 'longitude'> | null
   ): Promise<AIAnalysisResult> {
     if (!this.isModelLoaded) {
       await this.initializeModel();
@@ -162,6 +173,11 @@ export class AIService {
       const formData = new FormData();
       formData.append('image', blob, 'captured_image.jpg');
       formData.append('submessage', submessage || '모바일 카메라로 촬영된 이미지입니다.');
+      // 촬영 좌표는 별도 필드로 전송 (주변 기사 검색용)
+      if (location) {
+        formData.append('latitude', String(location.latitude));
+        formData.append('longitude', String(location.longitude));
+      }
       
       onProgress?.({
         text: '',
@@ -1,20 +1,39 @@
-from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, File, UploadFile, Form, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import logging
 import time
 import json
-from transformers import pipeline, TextStreamer
-import torch
-from PIL import Image
-import io
+from transformers import AutoImageProcessor
 import asyncio
-import base64
-import sqlite3
 from datetime import datetime
 import os
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from inference_executor import InferenceExecutor, QueueFullError
+from model_loader import ModelLoader
+from model_replicas import ModelReplicaPool
+from metrics import metrics
+from streaming import AsyncTextStream, GenerationStopped, TokenTimer
+from batch_scheduler import GenerationRequest
+from article_cache import ArticleCache
+from prompts import build_messages
+from image_processing import ImageIngestPool, model_image_size, select_thumbnail_width, THUMBNAIL_WIDTHS, THUMBNAIL_FORMATS
+from database import (
+    db, DATABASE_PATH, init_database, migrate_image_blobs, save_article_to_db, get_article_by_id, get_all_articles,
+    get_article_id_by_request_id,
+    get_articles_page, count_articles, encode_cursor,
+    get_verifications_by_article, delete_article_from_db, get_article_phashes, search_articles,
+    get_articles_nearby, content_versions
+)
+from response_cache import ResponseCache
+from geo import resolve_coordinates, validate_coordinates
+from image_store import ImageStore, etag_matches, parse_byte_range
+from image_hash_index import PerceptualHashIndex, backfill, dhash, load_index, to_signed
+from verification_writer import VerificationWriter, validate_vote
+from job_store import JobStore, new_job_id, stream_events
+from job_queue import JobWorkerPool, RetryLater, init_jobs_table, enqueue_job, get_job
+from PIL import Image
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -31,187 +50,433 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 데이터베이스 설정
-DATABASE_PATH = "truthsync_articles.db"
+# 데이터베이스 초기화
+init_database()
+init_jobs_table()
 
-def init_database():
-    """데이터베이스 초기화 및 테이블 생성"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # 기사 테이블 생성
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id TEXT UNIQUE NOT NULL,
-                title TEXT,
-                content TEXT NOT NULL,
-                image_data BLOB,
-                submessage TEXT,
-                location TEXT,
-                orientation TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'published',
-                verification_score REAL DEFAULT 0.0,
-                verification_count INTEGER DEFAULT 0
-            )
-        """)
-        
-        # 검증 테이블 생성
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS verifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                article_id INTEGER NOT NULL,
-                user_id TEXT,
-                user_location TEXT,
-                verification_type TEXT CHECK(verification_type IN ('truth', 'fake', 'unsure')),
-                confidence_score REAL,
-                comment TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (article_id) REFERENCES articles (id)
-            )
-        """)
-        
-        # 사용자 테이블 생성
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT UNIQUE NOT NULL,
-                username TEXT,
-                email TEXT,
-                location TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-        logger.info("데이터베이스 초기화 완료")
-        
-    except Exception as e:
-        logger.error(f"데이터베이스 초기화 실패: {e}")
+# 기사 이미지 저장소 (해시 기반 파일, 기사에는 해시만 저장)
+image_store = ImageStore(os.getenv("IMAGE_STORE_PATH", "truthsync_images"))
+migrate_image_blobs(image_store)
 
-def save_article_to_db(request_id: str, content: str, image_data: Optional[bytes] = None, 
-                      submessage: str = "", location: str = "", orientation: str = "") -> bool:
-    """기사를 데이터베이스에 저장"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # 제목 추출 (첫 번째 문장을 제목으로 사용)
-        title = content.split('.')[0][:100] + "..." if len(content.split('.')[0]) > 100 else content.split('.')[0]
-        
-        cursor.execute("""
-            INSERT INTO articles (request_id, title, content, image_data, submessage, location, orientation)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (request_id, title, content, image_data, submessage, location, orientation))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"기사 저장 완료: {request_id}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"기사 저장 실패: {e}")
-        return False
+# 기사 이미지 지각 해시 인덱스 (재업로드/유사 이미지를 생성 전에 찾아 기존 기사로 연결)
+image_hash_index = PerceptualHashIndex()
+# 이 해밍 거리(64비트 중) 이내면 같은 이미지로 판단 (음수면 중복 검사 안 함)
+DUPLICATE_MAX_DISTANCE = int(os.getenv("DUPLICATE_MAX_DISTANCE", "6"))
+
+# 기사 목록/상세 응답 캐시 (직렬화된 바이트, 쓰기 순번으로 무효화, ETag 304)
+response_cache = ResponseCache(
+    content_versions,
+    max_entries=int(os.getenv("RESPONSE_CACHE_ENTRIES", "512")),
+    compress_min_bytes=int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+)
+
+# 주변 기사 조회 (GET /articles/nearby) 기본/최대 반경 (km)
+NEARBY_DEFAULT_RADIUS_KM = float(os.getenv("NEARBY_DEFAULT_RADIUS_KM", "5"))
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "100"))
+
+# 이미지 처리 프로세스 풀 (모델 로딩 전에 워커를 fork)
+image_ingest_pool = ImageIngestPool(
+    workers=int(os.environ["IMAGE_WORKERS"]) if "IMAGE_WORKERS" in os.environ else None
+)
+image_ingest_pool.start()
+
+# Gemma-3n 모델 설정 - 모델은 앱 시작 후 백그라운드에서 로드 (/health/ready로 진행 상황 확인)
+MODEL_NAME = "google/gemma-3n-e4b-it"
+# 미리 받아 둔 로컬 모델 디렉토리 (기본: 허브 모델 이름)
+MODEL_PATH = os.getenv("MODEL_PATH", MODEL_NAME)
+MAX_NEW_TOKENS = 1000
+USE_PREFIX_CACHE = os.getenv("PREFIX_CACHE", "1") == "1"
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+# 추론 모드 (bf16 | int8) 및 torch.compile 사용 여부 - benchmarks/bench_inference_modes.py로 비교
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "bf16")
+MODEL_COMPILE = os.getenv("MODEL_COMPILE", "0") == "1"
+# 보조(draft) 모델 경로 (예: google/gemma-3n-e2b-it, 비우면 사용 안 함)와 시작 제안 토큰 수
+DRAFT_MODEL_PATH = os.getenv("DRAFT_MODEL_PATH") or None
+DRAFT_TOKENS = int(os.getenv("DRAFT_TOKENS", "5"))
+# 1이면 모델 generation_config의 샘플링 대신 그리디 디코딩 (보조 모델 사용 시에도 결과 동일)
+GREEDY_DECODING = os.getenv("GREEDY_DECODING", "0") == "1"
+
+# 비전 프로세서 입력 해상도 (업로드 이미지를 이 크기로 한 번만 리사이즈)
+# 이미지 프로세서 설정만 읽으므로 모델 로딩 전에도 이미지 전처리/작업 등록이 가능
+MODEL_IMAGE_SIZE = model_image_size(
+    AutoImageProcessor.from_pretrained(MODEL_PATH, local_files_only=os.path.isdir(MODEL_PATH))
+)
+
+# 추론 실행기 설정
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "8"))
+# 동시 요청을 묶어 처리할 최대 배치 크기 및 배치 수집 대기 시간
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "4"))
+BATCH_WINDOW_MS = int(os.getenv("BATCH_WINDOW_MS", "20"))
+# 모델 복제본 프로세스 수 (1이면 이 프로세스의 추론 스레드에서 실행)
+MODEL_REPLICAS = int(os.getenv("MODEL_REPLICAS", "1"))
+# 복제본 가중치를 이 프로세스에서 한 번 올려 공유 메모리로 공유 (0이면 복제본마다 로드)
+MODEL_SHARE_WEIGHTS = os.getenv("MODEL_SHARE_WEIGHTS", "1") == "1"
+
+model_loader = None
+if MODEL_REPLICAS > 1:
+    # 복제본마다 코어 묶음을 고정한 워커 프로세스에 모델을 올리고, 이 프로세스는 라우팅만 함
+    inference_executor = ModelReplicaPool(
+        MODEL_PATH,
+        replicas=MODEL_REPLICAS,
+        threads_per_replica=int(os.environ["MODEL_THREADS_PER_REPLICA"]) if "MODEL_THREADS_PER_REPLICA" in os.environ else None,
+        max_batch_size=MAX_BATCH_SIZE,
+        batch_window=BATCH_WINDOW_MS / 1000,
+        max_queue_size=INFERENCE_QUEUE_SIZE,
+        prefix_cache=USE_PREFIX_CACHE,
+        warmup=MODEL_WARMUP,
+        inference_mode=INFERENCE_MODE,
+        compile_model=MODEL_COMPILE,
+        draft_model_path=DRAFT_MODEL_PATH,
+        draft_tokens=DRAFT_TOKENS,
+        greedy=GREEDY_DECODING,
+        share_weights=MODEL_SHARE_WEIGHTS
+    )
+else:
+    # 파이프라인 로드 → 시스템 프롬프트 KV 캐시 → 워밍업 생성 (startup에서 시작)
+    model_loader = ModelLoader(
+        MODEL_PATH,
+        use_prefix_cache=USE_PREFIX_CACHE,
+        warmup=MODEL_WARMUP,
+        mode=INFERENCE_MODE,
+        compile_model=MODEL_COMPILE,
+        draft_model_path=DRAFT_MODEL_PATH,
+        draft_tokens=DRAFT_TOKENS,
+        greedy=GREEDY_DECODING
+    )
+    
+    # 모델 호출을 이벤트 루프 밖의 전용 스레드에서 실행
+    inference_executor = InferenceExecutor(
+        max_queue_size=INFERENCE_QUEUE_SIZE,
+        max_batch_size=MAX_BATCH_SIZE,
+        batch_window=BATCH_WINDOW_MS / 1000
+    )
+
+def run_generation_batch(requests: List[GenerationRequest], complete):
+    """추론 스레드에서 실행되는 배치 생성 함수"""
+    model_loader.generate(requests, complete)
+
+def model_ready() -> bool:
+    """생성 요청을 받을 수 있는지 (모델 로딩과 워밍업 완료)"""
+    if model_loader is not None:
+        return model_loader.ready
+    return inference_executor.ready_replicas() > 0
+
+def model_status() -> Dict[str, Any]:
+    """모델 로딩 단계/진행률 (복제본 풀이면 복제본별 단계)"""
+    if model_loader is not None:
+        return model_loader.status()
+    stages = [replica["stage"] for replica in inference_executor.stats()["replicas"]]
+    return {
+        "stage": "ready" if "ready" in stages else ("failed" if all(stage == "failed" for stage in stages) else "loading"),
+        "ready_replicas": stages.count("ready"),
+        "replicas": stages,
+        "model_path": MODEL_PATH,
+        "mode": INFERENCE_MODE,
+        "compiled": MODEL_COMPILE
+    }
 
-def get_article_by_id(article_id: int) -> Optional[Dict[str, Any]]:
-    """ID로 기사 조회"""
+async def submit_generation(generation_request: GenerationRequest) -> str:
+    """생성 요청 실행 - 복제본 풀이면 가장 한가한 복제본에서, 아니면 추론 스레드에서 배치로"""
+    if isinstance(inference_executor, ModelReplicaPool):
+        return await inference_executor.submit(generation_request)
+    return await inference_executor.submit_batched(run_generation_batch, generation_request)
+
+# 생성 결과 캐시 (같은 이미지 + 프롬프트 + 파라미터 재요청 시 재생성하지 않음)
+ARTICLE_CACHE_PATH = os.getenv("ARTICLE_CACHE_PATH", "truthsync_cache.db")
+article_cache = ArticleCache(
+    ARTICLE_CACHE_PATH,
+    memory_entries=int(os.getenv("ARTICLE_CACHE_ENTRIES", "256")),
+    max_disk_bytes=int(os.getenv("ARTICLE_CACHE_MAX_MB", "64")) * 1024 * 1024
+)
+
+def article_cache_key(image_bytes: bytes, messages: List[Dict[str, Any]],
+                      max_new_tokens: int = MAX_NEW_TOKENS) -> str:
+    """모델 입력 이미지 픽셀, 프롬프트 텍스트, 생성 파라미터로 캐시 키 생성"""
+    prompt = [
+        part["text"]
+        for message in messages
+        for part in message["content"]
+        if part["type"] == "text"
+    ]
+    params = {"model": MODEL_NAME, "max_new_tokens": max_new_tokens}
+    if INFERENCE_MODE != "bf16":
+        # 양자화 모드는 출력이 달라질 수 있으므로 키에 포함 (기본 모드의 기존 캐시 키는 유지)
+        params["mode"] = INFERENCE_MODE
+    if GREEDY_DECODING:
+        params["greedy"] = True
+    return ArticleCache.make_key(image_bytes, prompt, params)
+
+def generation_limits(max_tokens: Optional[int], deadline_seconds: Optional[float],
+                      started: float) -> Tuple[int, Optional[float]]:
+    """요청별 토큰 예산(MAX_NEW_TOKENS 이하)과 마감 시각(time.monotonic 기준, 요청 도착부터)"""
+    budget = min(max_tokens, MAX_NEW_TOKENS) if max_tokens and max_tokens > 0 else MAX_NEW_TOKENS
+    deadline = started + deadline_seconds if deadline_seconds and deadline_seconds > 0 else None
+    return budget, deadline
+
+# 검증 쓰기 버퍼 (투표를 모아 그룹 커밋, 커밋 후 응답)
+VERIFY_FLUSH_MS = int(os.getenv("VERIFY_FLUSH_MS", "2"))
+VERIFY_BATCH_SIZE = int(os.getenv("VERIFY_BATCH_SIZE", "1000"))
+MAX_BULK_VERIFICATIONS = int(os.getenv("MAX_BULK_VERIFICATIONS", "10000"))
+verification_writer = VerificationWriter(
+    DATABASE_PATH,
+    flush_interval=VERIFY_FLUSH_MS / 1000,
+    max_batch=VERIFY_BATCH_SIZE
+)
+
+# 분석 작업 상태 저장소 (작업 수/보관 용량(텍스트 + 이벤트 로그) 상한, TTL/LRU 제거)
+job_store = JobStore(
+    max_jobs=int(os.getenv("JOB_STORE_MAX_JOBS", "1000")),
+    ttl=int(os.getenv("JOB_TTL_SECONDS", "3600")),
+    max_bytes=int(os.getenv("JOB_STORE_MAX_MB", "16")) * 1024 * 1024
+)
+# 진행 이벤트 구독(SSE): 이 개수보다 많이 밀린 구독자는 현재 상태 스냅샷 하나로 건너뜀
+JOB_EVENTS_MAX_LAG = int(os.getenv("JOB_EVENTS_MAX_LAG", "256"))
+JOB_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("JOB_EVENTS_KEEPALIVE_SECONDS", "15"))
+
+async def run_generation_job(job: Dict[str, Any]) -> Optional[int]:
+    """영구 작업 1건 실행 - 생성한 기사를 저장하고 기사 ID 반환"""
+    job_id = job["id"]
+    
+    # 이전 실행이 기사 저장 후 완료 기록 전에 중단된 경우 다시 생성하지 않음
+    article_id = await db.run(get_article_id_by_request_id, job_id)
+    if article_id is not None:
+        return article_id
+    
+    if job_store.get(job_id) is None:
+        job_store.create(job_id=job_id)
+    job_store.reset_text(job_id)
+    job_store.update(job_id, "processing", "AI가 이미지를 분석하고 있습니다...", 50)
+    job_store.set_stage(job_id, "prefill")
+    
+    submessage = job["submessage"] or ""
+    model_image = Image.frombytes("RGB", (job["image_width"], job["image_height"]), job["model_image"])
+    messages = build_messages(model_image, submessage)
+    timer = TokenTimer()
+    
+    async def produce(on_chunk, cancel):
+        generation_request = GenerationRequest(
+            messages=messages,
+            max_new_tokens=MAX_NEW_TOKENS,
+            on_text=on_chunk,
+            timer=timer,
+            cancel=cancel
+        )
+        return await submit_generation(generation_request)
+    
+    # 임대를 잃거나 서버가 종료되어 이 작업이 취소되면 생성도 다음 토큰에서 멈춤
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM articles WHERE id = ?", (article_id,))
-        row = cursor.fetchone()
-        
-        conn.close()
-        
-        if row:
-            return dict(row)
-        return None
-        
-    except Exception as e:
-        logger.error(f"기사 조회 실패: {e}")
-        return None
+        article, cache_status = await article_cache.get_or_generate(
+            article_cache_key(job["model_image"], messages),
+            produce,
+            on_text=job_progress_callback(job_id)
+        )
+    except QueueFullError:
+        raise RetryLater("추론 큐 포화")
+    
+    timer.record()
+    location_info, orientation_info = extract_capture_info(submessage)
+    image_phash = dhash(model_image)
+    saved = await db.run(
+        save_article_to_db,
+        request_id=job_id,
+        content=article,
+        image_hash=job["image_hash"],
+        submessage=submessage,
+        location=location_info,
+        orientation=orientation_info,
+        phash=to_signed(image_phash),
+        coordinates=(job["latitude"], job["longitude"]) if job["latitude"] is not None else None
+    )
+    if not saved:
+        raise RuntimeError("기사 저장 실패")
+    article_id = await db.run(get_article_id_by_request_id, job_id)
+    image_hash_index.add(article_id, image_phash)
+    job_store.set_stage(job_id, "saved")
+    
+    job_store.set_text(job_id, article)
+    job_store.update(
+        job_id, "completed", "AI 분석이 완료되었습니다.", 100,
+        saved_to_db=True,
+        article_id=article_id,
+        cache=cache_status
+    )
+    logger.info(f"작업 기사 생성 완료: {job_id}, 캐시: {cache_status}, 지연 시간: {timer.summary()}")
+    return article_id
+
+def publish_job_status(job_id: str, status: str, error: Optional[str]):
+    """작업자가 기록한 실패/재대기 상태를 상태 조회와 진행 이벤트 구독자에게 알림"""
+    if status == "failed":
+        job_store.update(job_id, "failed", error or "작업 처리에 실패했습니다.")
+    else:
+        job_store.update(job_id, "queued", "작업이 대기열에 다시 등록되었습니다.", 0)
+        job_store.set_stage(job_id, "queued")
+
+# 영구 작업 처리기 (추론 큐가 가득 찬 동안은 새 작업을 가져가지 않음)
+job_workers = JobWorkerPool(
+    run_generation_job,
+    workers=int(os.getenv("JOB_WORKERS", str(MAX_BATCH_SIZE))),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "60")),
+    can_claim=lambda: model_ready() and not inference_executor.is_full(),
+    on_status=publish_job_status
+)
 
-def get_all_articles(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-    """모든 기사 조회"""
+def prepare_image_hash_index():
+    """저장된 지각 해시를 인덱스에 적재하고, 해시가 없는 기존 기사는 저장 이미지로 백필"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM articles 
-            ORDER BY created_at DESC 
-            LIMIT ? OFFSET ?
-        """, (limit, offset))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in rows]
-        
+        load_index(image_hash_index, get_article_phashes())
+        backfill(image_hash_index, image_store)
     except Exception as e:
-        logger.error(f"기사 목록 조회 실패: {e}")
-        return []
+        logger.error(f"이미지 지각 해시 인덱스 준비 실패: {e}")
 
-def add_verification(article_id: int, user_id: str, user_location: str, 
-                    verification_type: str, confidence_score: float = 0.0, comment: str = "") -> bool:
-    """검증 정보 추가"""
-    try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO verifications (article_id, user_id, user_location, verification_type, confidence_score, comment)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (article_id, user_id, user_location, verification_type, confidence_score, comment))
-        
-        # 검증 점수 업데이트
-        cursor.execute("""
-            UPDATE articles 
-            SET verification_count = verification_count + 1,
-                verification_score = (
-                    SELECT AVG(CASE 
-                        WHEN verification_type = 'truth' THEN 1.0
-                        WHEN verification_type = 'fake' THEN 0.0
-                        ELSE 0.5
-                    END)
-                    FROM verifications 
-                    WHERE article_id = ?
-                )
-            WHERE id = ?
-        """, (article_id, article_id))
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"검증 정보 추가 완료: article_id={article_id}, type={verification_type}")
+@app.on_event("startup")
+async def start_inference_executor():
+    if model_loader is not None:
+        model_loader.start()
+    # 인덱스 적재 전에는 중복 검사가 아무것도 찾지 못할 뿐 요청 처리는 막지 않음
+    asyncio.ensure_future(asyncio.to_thread(prepare_image_hash_index))
+    inference_executor.start()
+    verification_writer.start()
+    job_workers.start()
+
+@app.on_event("shutdown")
+async def stop_inference_executor():
+    await job_workers.stop()
+    inference_executor.stop(timeout=5)
+    image_ingest_pool.stop()
+    await verification_writer.stop()
+    article_cache.close()
+    db.close()
+
+def queue_full_response(error: QueueFullError) -> JSONResponse:
+    """추론 큐 포화 시 503 응답 (대기 순번 및 예상 대기 시간 포함)"""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(max(1, int(error.estimated_wait)))},
+        content={
+            "error": "서버 혼잡",
+            "message": "AI 분석 요청이 많습니다. 잠시 후 다시 시도해주세요.",
+            "queue_position": error.queue_position,
+            "estimated_wait_seconds": round(error.estimated_wait, 1)
+        }
+    )
+
+def model_loading_response() -> JSONResponse:
+    """모델 로딩 중 503 응답 (로딩 단계/진행률 포함)"""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "10"},
+        content={
+            "error": "모델 준비 중",
+            "message": "AI 모델을 불러오는 중입니다. 잠시 후 다시 시도해주세요.",
+            "model": model_status()
+        }
+    )
+
+# 목록/카드에 쓰는 축소본 가로 크기
+THUMBNAIL_DEFAULT_WIDTH = select_thumbnail_width(int(os.getenv("THUMBNAIL_DEFAULT_WIDTH", "480")))
+
+def with_image_url(article: Dict[str, Any]) -> Dict[str, Any]:
+    """기사 응답에 원본/축소본 이미지 URL 추가 (다른 크기는 ?w=로 요청)"""
+    image_hash = article.get("image_hash")
+    article["image_url"] = f"/images/{image_hash}" if image_hash else None
+    article["thumbnail_url"] = f"/images/{image_hash}?w={THUMBNAIL_DEFAULT_WIDTH}" if image_hash else None
+    return article
+
+# 축소본 생성 중인 이미지 (같은 이미지의 중복 생성 방지)
+thumbnail_tasks: Dict[str, asyncio.Task] = {}
+
+def ensure_thumbnails(image_hash: str) -> asyncio.Task:
+    """이미지 축소본 생성을 백그라운드 작업으로 시작 (진행 중이면 그 작업 반환)"""
+    task = thumbnail_tasks.get(image_hash)
+    if task is None:
+        task = asyncio.create_task(generate_thumbnails(image_hash))
+        thumbnail_tasks[image_hash] = task
+        task.add_done_callback(lambda _: thumbnail_tasks.pop(image_hash, None))
+    return task
+
+async def generate_thumbnails(image_hash: str) -> bool:
+    """저장 이미지로 모든 크기/형식의 축소본 생성 (이미 있으면 건너뜀)"""
+    paths = [
+        image_store.thumbnail_path(image_hash, width, image_format)
+        for width in THUMBNAIL_WIDTHS for image_format in THUMBNAIL_FORMATS
+    ]
+    if all(os.path.exists(path) for path in paths):
         return True
-        
+    started = time.perf_counter()
+    try:
+        with open(image_store.path_for(image_hash), "rb") as f:
+            stored_jpeg = await asyncio.to_thread(f.read)
+        thumbnails = await image_ingest_pool.encode_thumbnails(stored_jpeg)
+        await asyncio.to_thread(image_store.put_thumbnails, image_hash, thumbnails)
     except Exception as e:
-        logger.error(f"검증 정보 추가 실패: {e}")
+        logger.error(f"축소본 생성 실패 ({image_hash}): {e}")
         return False
+    metrics.observe("thumbnail_generation", time.perf_counter() - started)
+    return True
 
-# 데이터베이스 초기화
-init_database()
+async def find_duplicate_article(image_phash: int) -> Optional[Dict[str, Any]]:
+    """지각 해시가 DUPLICATE_MAX_DISTANCE 이내인 기존 기사 (기사, 거리, 검증 이력 URL)"""
+    if DUPLICATE_MAX_DISTANCE < 0:
+        return None
+    match = image_hash_index.nearest(image_phash, DUPLICATE_MAX_DISTANCE)
+    if match is None:
+        return None
+    distance, article_id = match
+    article = await db.run(get_article_by_id, article_id)
+    if article is None:
+        return None
+    metrics.inc("duplicate_images")
+    return {
+        "article": with_image_url(article),
+        "distance": distance,
+        "verifications_url": f"/articles/{article_id}/verifications"
+    }
 
-# Gemma-3n 파이프라인 초기화 (서버 시작 시 1회)
-logger.info("Gemma-3n 모델 로딩 중...")
-pipe = pipeline(
-    "image-text-to-text",
-    model="google/gemma-3n-e4b-it",
-    device="cpu",
-    torch_dtype=torch.bfloat16,
-)
-logger.info("Gemma-3n 모델 로딩 완료")
+async def index_article_image(request_id: str, image_phash: int):
+    """저장된 기사의 이미지 지각 해시를 인덱스에 추가"""
+    article_id = await db.run(get_article_id_by_request_id, request_id)
+    if article_id is not None:
+        image_hash_index.add(article_id, image_phash)
+
+def job_progress_callback(job_id: str):
+    """생성 텍스트 조각마다 작업 상태를 갱신하는 콜백"""
+    def text_streamer_callback(text):
+        # 첫 조각이 오면 프리필이 끝나고 생성 단계로 전환
+        job_store.set_stage(job_id, "generating")
+        # 생성 텍스트는 조각만 추가 (전체 텍스트를 매번 복사하지 않음)
+        length = job_store.append_text(job_id, text)
+        job_store.update(
+            job_id, "processing", f"기사 생성 중... ({length}자)",
+            min(95, 50 + length / 20)  # 예상 1000자 기준
+        )
+        logger.info(f"스트리밍 텍스트: {text}")
+    return text_streamer_callback
+
+def invalid_location_response(error: ValueError) -> JSONResponse:
+    """latitude/longitude 폼 필드 오류 400 응답"""
+    return JSONResponse(
+        status_code=400,
+        content={"error": "잘못된 위치", "message": str(error)}
+    )
 
-# 분석 상태 저장
-analysis_status = {}
+def extract_capture_info(submessage: str) -> Tuple[str, str]:
+    """submessage에서 (촬영 위치, 촬영 방향) 추출"""
+    location_info = ""
+    orientation_info = ""
+    
+    if "촬영 위치:" in submessage:
+        location_start = submessage.find("촬영 위치:") + 6
+        location_end = submessage.find(")", location_start)
+        if location_end > location_start:
+            location_info = submessage[location_start:location_end].strip()
+    
+    if "촬영 방향:" in submessage:
+        orientation_start = submessage.find("촬영 방향:") + 6
+        orientation_end = submessage.find(",", orientation_start)
+        if orientation_end > orientation_start:
+            orientation_info = submessage[orientation_start:orientation_end].strip()
+    
+    return location_info, orientation_info
 
 @app.get("/")
 async def root():
@@ -219,32 +484,177 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "model_loaded": pipe is not None}
+    return {
+        "status": "healthy",
+        "model_loaded": model_ready(),
+        "model": model_status(),
+        "inference": inference_executor.stats()
+    }
+
+@app.get("/health/live")
+async def liveness_check():
+    """liveness - 프로세스가 요청을 처리할 수 있으면 200 (모델 로딩 여부와 무관)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """readiness - 모델 로딩과 워밍업이 끝났으면 200, 아니면 503과 로딩 진행 상황"""
+    status = model_status()
+    if not model_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed" if status["stage"] == "failed" else "loading", "model": status}
+        )
+    return {"status": "ready", "model": status}
+
+@app.get("/metrics")
+async def get_metrics():
+    """추론 지표 조회 (TTFT, 토큰 간 지연 시간, 실행기 상태)"""
+    return {
+        **metrics.snapshot(),
+        "inference": inference_executor.stats(),
+        "jobs": job_store.stats(),
+        "response_cache": response_cache.stats()
+    }
 
 @app.get("/analysis-status/{request_id}")
-async def get_analysis_status(request_id: str):
-    if request_id in analysis_status:
-        return analysis_status[request_id]
+async def get_analysis_status(request_id: str, offset: int = 0):
+    """분석 진행 상태 조회
+    
+    offset을 주면 생성 텍스트 중 offset 이후만 돌려준다. 다음 폴링에는
+    응답의 text_length를 offset으로 전달한다.
+    """
+    job = job_store.get(request_id)
+    if job is not None:
+        return job.snapshot(offset)
     return {"status": "not_found"}
 
 # 새로운 API 엔드포인트들
 @app.get("/articles")
-async def get_articles(limit: int = 50, offset: int = 0):
-    """모든 기사 조회"""
-    articles = get_all_articles(limit=limit, offset=offset)
+async def get_articles(request: Request, limit: int = 50, offset: int = 0, cursor: Optional[str] = None):
+    """기사 목록 조회 (최신순)
+    
+    다음 페이지는 응답의 next_cursor를 cursor로 전달해 조회한다.
+    offset은 이전 클라이언트 호환용이며 깊은 페이지일수록 느려진다.
+    커서 페이지는 응답 캐시에서 제공한다 (ETag/If-None-Match 304 지원).
+    """
+    limit = max(1, min(limit, 100))
+    offset = max(0, offset)
+    cache_key = ("articles", limit, cursor)
+    if not offset or cursor:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return response_cache.respond(cached, request)
+    # DB를 읽기 전의 쓰기 순번 (읽는 도중의 쓰기는 다음 조회에서 무효화됨)
+    sequence = content_versions.current()
+    try:
+        if offset and not cursor:
+            articles = await db.run(get_all_articles, limit=limit, offset=offset)
+            page = {
+                "articles": articles,
+                "next_cursor": encode_cursor(articles[-1]) if len(articles) == limit else None,
+                "total": await db.run(count_articles),
+            }
+        else:
+            page = await db.run(get_articles_page, limit=limit, cursor=cursor)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "잘못된 페이지 커서입니다.", "message": str(e)}
+        )
+    except Exception as e:
+        logger.error(f"기사 목록 조회 실패: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "기사 목록 조회에 실패했습니다."}
+        )
+    
+    content = {
+        "articles": [with_image_url(article) for article in page["articles"]],
+        "total": page["total"],
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": page["next_cursor"]
+    }
+    if offset and not cursor:
+        return content
+    entry = response_cache.put(
+        cache_key, content, sequence,
+        article_ids=[article["id"] for article in page["articles"]], listing=True
+    )
+    return response_cache.respond(entry, request)
+
+# /articles/{article_id}보다 먼저 등록해야 "search", "nearby"가 기사 ID로 해석되지 않음
+@app.get("/articles/search")
+async def search_articles_endpoint(q: str, limit: int = 20, cursor: Optional[str] = None):
+    """기사 제목/본문 전문 검색 (BM25 관련도순, 일치 부분은 snippet에 <mark>로 표시)
+    
+    다음 페이지는 응답의 next_cursor를 cursor로 전달해 조회한다.
+    """
+    limit = max(1, min(limit, 100))
+    try:
+        page = await db.run(search_articles, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "잘못된 검색 요청입니다.", "message": str(e)}
+        )
+    except Exception as e:
+        logger.error(f"기사 검색 실패: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "기사 검색에 실패했습니다."}
+        )
+    
     return {
-        "articles": articles,
-        "total": len(articles),
+        "query": q,
+        "articles": [with_image_url(article) for article in page["articles"]],
         "limit": limit,
-        "offset": offset
+        "next_cursor": page["next_cursor"]
+    }
+
+@app.get("/articles/nearby")
+async def get_nearby_articles(lat: float, lon: float, radius: float = NEARBY_DEFAULT_RADIUS_KM, limit: int = 50):
+    """좌표에서 radius(km) 이내 기사를 가까운 순으로 조회 (distance_km 포함)"""
+    limit = max(1, min(limit, 100))
+    try:
+        validate_coordinates(lat, lon)
+        if not 0 < radius <= NEARBY_MAX_RADIUS_KM:
+            raise ValueError(f"반경은 0 초과 {NEARBY_MAX_RADIUS_KM}km 이하여야 합니다.")
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "잘못된 위치 요청입니다.", "message": str(e)}
+        )
+    
+    try:
+        articles = await db.run(get_articles_nearby, lat, lon, radius, limit)
+    except Exception as e:
+        logger.error(f"주변 기사 조회 실패: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "주변 기사 조회에 실패했습니다."}
+        )
+    
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "radius_km": radius,
+        "articles": [with_image_url(article) for article in articles]
     }
 
 @app.get("/articles/{article_id}")
-async def get_article(article_id: int):
-    """특정 기사 조회"""
-    article = get_article_by_id(article_id)
+async def get_article(article_id: int, request: Request):
+    """특정 기사 조회 (응답 캐시, ETag/If-None-Match 304 지원)"""
+    cache_key = ("article", article_id)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return response_cache.respond(cached, request)
+    sequence = content_versions.current()
+    article = await db.run(get_article_by_id, article_id)
     if article:
-        return article
+        entry = response_cache.put(cache_key, with_image_url(article), sequence, article_ids=[article_id])
+        return response_cache.respond(entry, request)
     return JSONResponse(
         status_code=404,
         content={"error": "기사를 찾을 수 없습니다."}
@@ -257,25 +667,36 @@ async def verify_article(
     user_location: str,
     verification_type: str,
     confidence_score: float = 0.0,
-    comment: str = ""
+    comment: str = "",
+    user_latitude: Optional[float] = None,
+    user_longitude: Optional[float] = None
 ):
-    """기사 검증"""
-    if verification_type not in ["truth", "fake", "unsure"]:
+    """기사 검증 (user_latitude/user_longitude가 없으면 user_location의 "위도,경도" 사용)"""
+    try:
+        row = validate_vote({
+            "article_id": article_id,
+            "user_id": user_id,
+            "user_location": user_location,
+            "user_latitude": user_latitude,
+            "user_longitude": user_longitude,
+            "verification_type": verification_type,
+            "confidence_score": confidence_score,
+            "comment": comment
+        })
+    except ValueError as e:
         return JSONResponse(
             status_code=400,
-            content={"error": "검증 타입은 'truth', 'fake', 'unsure' 중 하나여야 합니다."}
+            content={"error": str(e)}
         )
     
-    success = add_verification(
-        article_id=article_id,
-        user_id=user_id,
-        user_location=user_location,
-        verification_type=verification_type,
-        confidence_score=confidence_score,
-        comment=comment
-    )
+    # 동시에 들어온 다른 투표와 함께 그룹 커밋된 뒤 응답
+    try:
+        errors = await verification_writer.submit([row])
+    except RuntimeError as e:
+        logger.error(f"검증 정보 추가 실패: {e}")
+        errors = [str(e)]
     
-    if success:
+    if errors[0] is None:
         return {"message": "검증이 성공적으로 추가되었습니다."}
     else:
         return JSONResponse(
@@ -283,27 +704,75 @@ async def verify_article(
             content={"error": "검증 추가에 실패했습니다."}
         )
 
+@app.post("/verifications/bulk")
+async def bulk_verify(request: Request):
+    """여러 기사에 대한 검증 일괄 등록
+    
+    본문은 검증 객체의 JSON 배열 또는 NDJSON(Content-Type: application/x-ndjson)이며,
+    각 객체는 article_id, user_id, user_location, verification_type,
+    confidence_score(선택), comment(선택)를 가진다. 모든 투표가 커밋된 뒤 응답하며
+    잘못된 항목은 errors에 배열 인덱스와 함께 보고된다.
+    """
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            votes = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            votes = json.loads(body)
+    except ValueError:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "요청 본문은 JSON 배열 또는 NDJSON이어야 합니다."}
+        )
+    if not isinstance(votes, list):
+        return JSONResponse(
+            status_code=400,
+            content={"error": "요청 본문은 JSON 배열 또는 NDJSON이어야 합니다."}
+        )
+    if len(votes) > MAX_BULK_VERIFICATIONS:
+        return JSONResponse(
+            status_code=413,
+            content={"error": f"한 번에 최대 {MAX_BULK_VERIFICATIONS}건까지 등록할 수 있습니다."}
+        )
+    
+    rows, row_indexes, errors = [], [], []
+    for index, vote in enumerate(votes):
+        try:
+            rows.append(validate_vote(vote))
+            row_indexes.append(index)
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+    
+    if rows:
+        try:
+            results = await verification_writer.submit(rows)
+        except RuntimeError as e:
+            logger.error(f"검증 일괄 등록 실패: {e}")
+            return JSONResponse(
+                status_code=503,
+                content={"error": "검증 등록을 처리할 수 없습니다."}
+            )
+        for index, error in zip(row_indexes, results):
+            if error is not None:
+                errors.append({"index": index, "error": error})
+        errors.sort(key=lambda item: item["index"])
+    
+    return {
+        "accepted": len(votes) - len(errors),
+        "rejected": len(errors),
+        "errors": errors
+    }
+
 @app.get("/articles/{article_id}/verifications")
 async def get_article_verifications(article_id: int):
     """기사의 검증 정보 조회"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM verifications 
-            WHERE article_id = ? 
-            ORDER BY created_at DESC
-        """, (article_id,))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        verifications = await db.run(get_verifications_by_article, article_id)
         
         return {
             "article_id": article_id,
-            "verifications": [dict(row) for row in rows],
-            "total": len(rows)
+            "verifications": verifications,
+            "total": len(verifications)
         }
         
     except Exception as e:
@@ -317,26 +786,12 @@ async def get_article_verifications(article_id: int):
 async def delete_article(article_id: int):
     """기사 삭제"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        # 기사 존재 확인
-        cursor.execute("SELECT id FROM articles WHERE id = ?", (article_id,))
-        if not cursor.fetchone():
-            conn.close()
+        if not await db.run(delete_article_from_db, article_id):
             return JSONResponse(
                 status_code=404,
                 content={"error": "기사를 찾을 수 없습니다."}
             )
-        
-        # 관련 검증 정보 삭제
-        cursor.execute("DELETE FROM verifications WHERE article_id = ?", (article_id,))
-        
-        # 기사 삭제
-        cursor.execute("DELETE FROM articles WHERE id = ?", (article_id,))
-        
-        conn.commit()
-        conn.close()
+        image_hash_index.remove(article_id)
         
         return {"message": "기사가 성공적으로 삭제되었습니다."}
         
@@ -347,17 +802,113 @@ async def delete_article(article_id: int):
             content={"error": "기사 삭제에 실패했습니다."}
         )
 
+@app.get("/images/{image_hash}")
+async def get_image(image_hash: str, request: Request, w: Optional[int] = None):
+    """기사 이미지 파일 제공 (강한 ETag, Range 요청 지원)
+    
+    w를 주면 그 이상인 가장 작은 축소본을 Accept에 따라 WebP 또는 JPEG으로 제공한다.
+    """
+    if not image_store.exists(image_hash):
+        return JSONResponse(
+            status_code=404,
+            content={"error": "이미지를 찾을 수 없습니다."}
+        )
+    if w is not None:
+        thumbnail = await get_thumbnail(image_hash, w, request)
+        if thumbnail is not None:
+            return thumbnail
+    
+    path = image_store.path_for(image_hash)
+    size = os.path.getsize(path)
+    # 내용이 바뀌지 않는 파일이므로 해시를 그대로 ETag로 사용하고 영구 캐시 허용
+    headers = {
+        "ETag": f'"{image_hash}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), f'"{image_hash}"'):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", f'"{image_hash}"') == f'"{image_hash}"':
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                iter_file_range(path, start, end),
+                status_code=206,
+                media_type="image/jpeg",
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                }
+            )
+    
+    # 전체 파일은 FileResponse (서버가 지원하면 sendfile로 전송)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
+async def get_thumbnail(image_hash: str, requested_width: int, request: Request) -> Optional[Response]:
+    """축소본 응답 - 아직 없으면(이전 기사 등) 바로 생성하고, 생성에 실패하면 None(원본 제공)"""
+    width = select_thumbnail_width(requested_width)
+    image_format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    path = image_store.thumbnail_path(image_hash, width, image_format)
+    if not os.path.exists(path):
+        # 요청이 끊겨도 생성은 끝까지 진행 (다른 요청이 결과를 씀)
+        if not await asyncio.shield(ensure_thumbnails(image_hash)):
+            return None
+    
+    etag = f'"{image_hash}-{width}-{image_format}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        # 같은 URL이 Accept에 따라 다른 형식이므로 캐시가 형식별로 구분해야 함
+        "Vary": "Accept",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=f"image/{image_format}", headers=headers)
+
+async def iter_file_range(path: str, start: int, end: int, chunk_size: int = 64 * 1024):
+    """파일의 [start, end] 구간을 청크 단위로 읽기"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(f.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
 @app.post("/generate-article")
 async def generate_article(
     image: UploadFile = File(...),
-    submessage: str = Form("")
+    submessage: str = Form(""),
+    max_tokens: Optional[int] = Form(None),
+    deadline_seconds: Optional[float] = Form(None),
+    force_generate: bool = Form(False),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None)
 ):
-    request_id = f"req_{int(time.time())}"
-    analysis_status[request_id] = {
-        "status": "processing",
-        "message": "AI 분석을 시작합니다...",
-        "progress": 0
-    }
+    """기사 생성 - max_tokens(토큰 예산)와 deadline_seconds(마감 시간)를 주면
+    그 안에서 생성을 멈추고 지금까지의 기사를 truncated로 돌려준다.
+
+    같은/유사 이미지의 기사가 이미 있으면 생성하지 않고 duplicate_of로 그 기사와
+    검증 이력을 알려준다 (force_generate면 그래도 새로 생성)."""
+    if not model_ready():
+        return model_loading_response()
+    try:
+        coordinates = resolve_coordinates(latitude, longitude, extract_capture_info(submessage)[0])
+    except ValueError as e:
+        return invalid_location_response(e)
+    max_new_tokens, deadline = generation_limits(max_tokens, deadline_seconds, time.monotonic())
+    request_id = job_store.create("req").job_id
+    job_store.update(request_id, "processing", "AI 분석을 시작합니다...", 0)
     
     logger.info(f"AI 분석 요청 받음: {image.filename}, 부연설명: {submessage}, 요청 ID: {request_id}")
     
@@ -365,10 +916,7 @@ async def generate_article(
         # 이미지 파일 검증
         if not image.content_type or not image.content_type.startswith('image/'):
             logger.error(f"잘못된 파일 타입: {image.content_type}")
-            analysis_status[request_id] = {
-                "status": "error",
-                "message": "잘못된 파일 타입입니다."
-            }
+            job_store.update(request_id, "error", "잘못된 파일 타입입니다.")
             return JSONResponse(
                 status_code=400,
                 content={"error": "잘못된 파일 타입", "message": "이미지 파일만 업로드 가능합니다."}
@@ -377,10 +925,7 @@ async def generate_article(
         # 파일 크기 검증 (10MB 제한)
         if image.size and image.size > 10 * 1024 * 1024:
             logger.error(f"파일 크기가 너무 큼: {image.size} bytes")
-            analysis_status[request_id] = {
-                "status": "error",
-                "message": "파일 크기가 너무 큽니다."
-            }
+            job_store.update(request_id, "error", "파일 크기가 너무 큽니다.")
             return JSONResponse(
                 status_code=413,
                 content={"error": "파일 크기 초과", "message": "이미지 파일이 너무 큽니다. 10MB 이하로 업로드해주세요."}
@@ -390,11 +935,7 @@ async def generate_article(
         temp_image_path = f"temp_{image.filename}"
         logger.info(f"이미지 저장 중: {temp_image_path}")
         
-        analysis_status[request_id] = {
-            "status": "processing",
-            "message": "이미지를 처리하고 있습니다...",
-            "progress": 10
-        }
+        job_store.update(request_id, "processing", "이미지를 처리하고 있습니다...", 10)
         
         # 메모리에서 직접 이미지 처리
         logger.info("메모리에서 이미지 처리 시작")
@@ -403,193 +944,160 @@ async def generate_article(
             # 업로드된 이미지를 메모리에서 직접 읽기
             image_data = await image.read()
             
-            # PIL로 메모리에서 직접 이미지 열기
-            with Image.open(io.BytesIO(image_data)) as img:
-                logger.info(f"이미지 정보: {img.format}, {img.size}, {img.mode}")
-                
-                # EXIF 정보에서 회전 정보 확인 및 적용
-                try:
-                    # EXIF 태그에서 회전 정보 확인
-                    exif = img._getexif()
-                    if exif:
-                        orientation = exif.get(274)  # 274 is the orientation tag
-                        logger.info(f"EXIF 방향 정보: {orientation}")
-                        
-                        # 회전 정보에 따라 이미지 회전
-                        if orientation == 3:
-                            img = img.rotate(180, expand=True)
-                            logger.info("이미지 180도 회전 적용")
-                        elif orientation == 6:
-                            img = img.rotate(270, expand=True)
-                            logger.info("이미지 270도 회전 적용")
-                        elif orientation == 8:
-                            img = img.rotate(90, expand=True)
-                            logger.info("이미지 90도 회전 적용")
-                except Exception as exif_error:
-                    logger.warning(f"EXIF 정보 처리 실패: {exif_error}")
-                
-                # 가로/세로 비율 확인 및 가로 사진 처리
-                width, height = img.size
-                is_landscape = width > height
-                
-                # 가로 사진인 경우 90도 회전하여 세로로 표시
-                if is_landscape:
-                    img = img.rotate(90, expand=True)
-                    logger.info(f"가로 사진을 90도 회전하여 세로로 변환: {img.size}")
-                
-                # 이미지 크기 제한 (비율 유지하면서 리사이즈)
-                max_size = (1920, 1080)
-                if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-                    # 비율을 유지하면서 리사이즈
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    logger.info(f"이미지 리사이즈 완료: {img.size}")
-                
-                # 리사이즈된 이미지를 메모리에 저장
-                img_buffer = io.BytesIO()
-                img.save(img_buffer, format="JPEG", quality=85)
-                img_buffer.seek(0)
-                
-                # 메모리에서 이미지 데이터 추출
-                processed_image_data = img_buffer.getvalue()
-                
+            # 이미지 수집 단계 (프로세스 풀): draft 디코딩 + 방향 보정 + 모델 해상도 리사이즈
+            job_store.set_stage(request_id, "decode")
+            model_image = await image_ingest_pool.prepare_model_image(image_data, MODEL_IMAGE_SIZE)
+            logger.info(f"모델 입력 이미지 준비 완료: {model_image.size}")
+            
+            # 저장용 JPEG은 모델 실행과 병렬로 다른 워커에서 생성
+            stored_image_task = asyncio.ensure_future(image_ingest_pool.prepare_stored_jpeg(image_data))
+        
         except Exception as img_error:
             logger.error(f"이미지 처리 실패: {img_error}")
-            analysis_status[request_id] = {
-                "status": "error",
-                "message": "이미지 파일 오류입니다."
-            }
+            job_store.update(request_id, "error", "이미지 파일 오류입니다.")
             return JSONResponse(
                 status_code=400,
                 content={"error": "이미지 파일 오류", "message": "올바른 이미지 파일이 아닙니다."}
             )
 
-        analysis_status[request_id] = {
-            "status": "processing",
-            "message": "AI 모델을 실행하고 있습니다...",
-            "progress": 30
-        }
+        job_store.update(request_id, "processing", "AI 모델을 실행하고 있습니다...", 30)
+        job_store.set_stage(request_id, "preprocess")
+
+        # 이미 올라온 같은/유사 이미지면 생성하지 않고 기존 기사와 검증 이력으로 연결
+        image_phash = dhash(model_image)
+        duplicate = None if force_generate else await find_duplicate_article(image_phash)
+        if duplicate is not None:
+            stored_image_task.cancel()
+            existing = duplicate["article"]
+            logger.info(f"중복 이미지 감지: {request_id} → 기사 {existing['id']} (거리 {duplicate['distance']})")
+            job_store.set_text(request_id, existing["content"])
+            job_store.update(
+                request_id, "completed", "이미 등록된 이미지의 기사를 찾았습니다.", 100,
+                saved_to_db=False,
+                article_id=existing["id"],
+                cache="duplicate"
+            )
+            return JSONResponse(
+                content={
+                    "article": existing["content"],
+                    "request_id": request_id,
+                    "saved_to_db": False,
+                    "cache": "duplicate",
+                    "truncated": False,
+                    "duplicate_of": duplicate
+                },
+                headers={"X-Cache": "DUPLICATE"}
+            )
 
         # 메시지 구성 - 메모리 데이터 사용
-        messages = [
-            {
-                "role": "system",
-                "content": [
-                    {"type": "text", "text": "당신은 TruthSync 뉴스 기자 입니다. 이미지를 통해 상세히 기사를 작성해주세요."}
-                ]
-            },
-            {
-                "role": "user",
-                "content": [
-                    {"type": "image", "url": f"data:image/jpeg;base64,{base64.b64encode(processed_image_data).decode()}"},
-                    {"type": "text", "text": f"이 이미지의 주제가 무엇인가요? 부연설명 : {submessage}"}
-                ]
-            }
-        ]
-
-        # 방향 정보가 포함된 경우 프롬프트 개선
-        if "촬영 방향:" in submessage:
-            # 방향 정보 추출
-            orientation_match = None
-            if "촬영 방향: landscape" in submessage:
-                orientation_match = "가로 방향으로 촬영된 이미지입니다. 가로 화면의 특성을 고려하여 기사를 작성해주세요."
-            elif "촬영 방향: portrait" in submessage:
-                orientation_match = "세로 방향으로 촬영된 이미지입니다. 세로 화면의 특성을 고려하여 기사를 작성해주세요."
-            
-            if orientation_match:
-                # 시스템 메시지에 방향 정보 추가
-                messages[0]["content"][0]["text"] += f" {orientation_match}"
-                logger.info(f"방향 정보 추가됨: {orientation_match}")
+        messages = build_messages(model_image, submessage)
 
         logger.info("AI 모델 실행 시작")
         
-        analysis_status[request_id] = {
-            "status": "processing",
-            "message": "AI가 이미지를 분석하고 있습니다...",
-            "progress": 50
-        }
-        
-        # 스트리밍 텍스트 생성
-        generated_text = ""
-        
-        def text_streamer_callback(text):
-            nonlocal generated_text
-            generated_text += text
-            # 진행 상태 업데이트
-            analysis_status[request_id] = {
-                "status": "processing",
-                "message": f"기사 생성 중... ({len(generated_text)}자)",
-                "progress": 50 + (len(generated_text) / 20),  # 예상 1000자 기준
-                "partial_text": generated_text
-            }
-            logger.info(f"스트리밍 텍스트: {text}")
-        
-        # TextStreamer 설정
-        streamer = TextStreamer(
-            tokenizer=pipe.tokenizer,
-            skip_prompt=True,
-            skip_special_tokens=True,
-            callback=text_streamer_callback
+        job_store.update(
+            request_id, "processing", "AI가 이미지를 분석하고 있습니다...", 50,
+            queue_position=inference_executor.queue_depth + 1,
+            estimated_wait_seconds=round(inference_executor.estimated_wait(), 1)
         )
         
-        # 모델 실행 (스트리밍)
-        output = pipe(
-            text=messages, 
-            max_new_tokens=1000,
-            streamer=streamer
-        )
+        text_streamer_callback = job_progress_callback(request_id)
+        job_store.set_stage(request_id, "prefill")
         
-        # 최종 텍스트 추출
-        article = output[0]["generated_text"][-1]["content"]
+        # 생성 요청 구성 (토큰 타이밍 측정 포함)
+        timer = TokenTimer()
         
-        logger.info(f"AI 분석 완료: {len(article)} 문자 생성")
+        async def produce(on_chunk, cancel):
+            generation_request = GenerationRequest(
+                messages=messages,
+                max_new_tokens=max_new_tokens,
+                on_text=on_chunk,
+                timer=timer,
+                cancel=cancel,
+                deadline=deadline
+            )
+            return await submit_generation(generation_request)
         
-        # 데이터베이스에 기사 저장
-        location_info = ""
-        orientation_info = ""
+        # 모델 실행 (스트리밍) - 캐시 미스 시 추론 스레드에서 다른 요청과 배치로 실행
+        truncated = False
+        try:
+            article, cache_status = await article_cache.get_or_generate(
+                article_cache_key(model_image.tobytes(), messages, max_new_tokens),
+                produce,
+                on_text=text_streamer_callback,
+                # 마감 시간은 이 요청의 GenerationRequest에만 적용되므로 다른 요청과 생성을 공유하지 않음
+                coalesce=deadline is None
+            )
+        except GenerationStopped as stopped:
+            if not stopped.text:
+                logger.warning(f"마감 시간 전에 생성된 텍스트 없음: {request_id} ({stopped.reason})")
+                job_store.update(request_id, "error", "마감 시간 안에 기사를 생성하지 못했습니다.")
+                stored_image_task.cancel()
+                return JSONResponse(
+                    status_code=504,
+                    content={"error": "생성 시간 초과", "message": "마감 시간 안에 기사를 생성하지 못했습니다.", "stop_reason": stopped.reason}
+                )
+            # 마감 시간까지 생성된 부분 기사 (캐시에는 저장되지 않음)
+            article, cache_status, truncated = stopped.text, "miss", True
+        except QueueFullError as queue_error:
+            logger.warning(f"추론 큐 포화로 요청 거부: {request_id}")
+            job_store.update(
+                request_id, "rejected", "AI 분석 요청이 많습니다. 잠시 후 다시 시도해주세요.",
+                queue_position=queue_error.queue_position,
+                estimated_wait_seconds=round(queue_error.estimated_wait, 1)
+            )
+            stored_image_task.cancel()
+            return queue_full_response(queue_error)
+        
+        timer.record()
+        logger.info(f"AI 분석 완료: {len(article)} 문자 생성, 캐시: {cache_status}, 지연 시간: {timer.summary()}")
         
-        # submessage에서 위치 및 방향 정보 추출
-        if "촬영 위치:" in submessage:
-            location_start = submessage.find("촬영 위치:") + 6
-            location_end = submessage.find(")", location_start)
-            if location_end > location_start:
-                location_info = submessage[location_start:location_end].strip()
+        # 데이터베이스에 기사 저장 (submessage에서 위치 및 방향 정보 추출)
+        location_info, orientation_info = extract_capture_info(submessage)
         
-        if "촬영 방향:" in submessage:
-            orientation_start = submessage.find("촬영 방향:") + 6
-            orientation_end = submessage.find(",", orientation_start)
-            if orientation_end > orientation_start:
-                orientation_info = submessage[orientation_start:orientation_end].strip()
+        # 저장용 JPEG 인코딩 결과를 이미지 저장소에 기록
+        processed_image_data = await stored_image_task
+        image_hash = await asyncio.to_thread(image_store.put, processed_image_data)
+        ensure_thumbnails(image_hash)
         
         # 데이터베이스에 저장
-        save_success = save_article_to_db(
+        save_success = await db.run(
+            save_article_to_db,
             request_id=request_id,
             content=article,
-            image_data=processed_image_data,
+            image_hash=image_hash,
             submessage=submessage,
             location=location_info,
-            orientation=orientation_info
+            orientation=orientation_info,
+            phash=to_signed(image_phash),
+            coordinates=coordinates
         )
+        if save_success:
+            await index_article_image(request_id, image_phash)
+            job_store.set_stage(request_id, "saved")
         
-        analysis_status[request_id] = {
-            "status": "completed",
-            "message": "AI 분석이 완료되었습니다.",
-            "progress": 100,
-            "article": article,
-            "saved_to_db": save_success
-        }
+        job_store.set_text(request_id, article)
+        job_store.update(
+            request_id, "completed", "AI 분석이 완료되었습니다.", 100,
+            saved_to_db=save_success,
+            cache=cache_status,
+            truncated=truncated
+        )
         
-        return JSONResponse(content={
-            "article": article, 
-            "request_id": request_id,
-            "saved_to_db": save_success
-        })
+        return JSONResponse(
+            content={
+                "article": article, 
+                "request_id": request_id,
+                "saved_to_db": save_success,
+                "cache": cache_status,
+                "truncated": truncated,
+                "timing": timer.summary()
+            },
+            headers={"X-Cache": cache_status.upper()}
+        )
         
     except Exception as e:
         logger.error(f"AI 분석 중 오류 발생: {str(e)}")
-        analysis_status[request_id] = {
-            "status": "error",
-            "message": f"AI 분석 중 오류가 발생했습니다: {str(e)}"
-        }
+        job_store.update(request_id, "error", f"AI 분석 중 오류가 발생했습니다: {str(e)}")
         return JSONResponse(
             status_code=500,
             content={"error": "AI 분석 실패", "message": str(e)}
@@ -599,12 +1107,32 @@ async def generate_article(
 @app.post("/generate-article-stream")
 async def generate_article_stream(
     image: UploadFile = File(...),
-    submessage: str = Form("")
+    submessage: str = Form(""),
+    max_tokens: Optional[int] = Form(None),
+    deadline_seconds: Optional[float] = Form(None),
+    force_generate: bool = Form(False),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None)
 ):
-    request_id = f"stream_{int(time.time())}"
+    """스트리밍 기사 생성 - 클라이언트 연결이 끊기면 (다른 대기 요청이 없을 때) 생성을 바로 멈춘다.
+
+    같은/유사 이미지의 기사가 이미 있으면 duplicate 상태로 그 기사를 알려주고 끝낸다."""
+    if not model_ready():
+        return model_loading_response()
+    try:
+        coordinates = resolve_coordinates(latitude, longitude, extract_capture_info(submessage)[0])
+    except ValueError as e:
+        return invalid_location_response(e)
+    max_new_tokens, deadline = generation_limits(max_tokens, deadline_seconds, time.monotonic())
+    request_id = new_job_id("stream")
+    
+    # 스트림 시작 전에 큐 포화 여부를 확인해 503으로 응답
+    if inference_executor.is_full():
+        position = inference_executor.queue_depth + 1
+        return queue_full_response(QueueFullError(position, inference_executor.estimated_wait(position)))
     
     async def generate_stream():
-        temp_image_path = None
+        generation = None
         try:
             # 이미지 파일 검증
             if not image.content_type or not image.content_type.startswith('image/'):
@@ -623,209 +1151,128 @@ async def generate_article_stream(
                 # 업로드된 이미지를 메모리에서 직접 읽기
                 image_data = await image.read()
                 
-                # PIL로 메모리에서 직접 이미지 열기
-                with Image.open(io.BytesIO(image_data)) as img:
-                    logger.info(f"이미지 정보: {img.format}, {img.size}, {img.mode}")
-                    
-                    # EXIF 정보에서 회전 정보 확인 및 적용
-                    try:
-                        # EXIF 태그에서 회전 정보 확인
-                        exif = img._getexif()
-                        if exif:
-                            orientation = exif.get(274)  # 274 is the orientation tag
-                            logger.info(f"EXIF 방향 정보: {orientation}")
-                            
-                            # 회전 정보에 따라 이미지 회전
-                            if orientation == 3:
-                                img = img.rotate(180, expand=True)
-                                logger.info("이미지 180도 회전 적용")
-                            elif orientation == 6:
-                                img = img.rotate(270, expand=True)
-                                logger.info("이미지 270도 회전 적용")
-                            elif orientation == 8:
-                                img = img.rotate(90, expand=True)
-                                logger.info("이미지 90도 회전 적용")
-                    except Exception as exif_error:
-                        logger.warning(f"EXIF 정보 처리 실패: {exif_error}")
-                    
-                    # 가로/세로 비율 확인 및 가로 사진 처리
-                    width, height = img.size
-                    is_landscape = width > height
-                    
-                    # 가로 사진인 경우 90도 회전하여 세로로 표시
-                    if is_landscape:
-                        img = img.rotate(90, expand=True)
-                        logger.info(f"가로 사진을 90도 회전하여 세로로 변환: {img.size}")
-                    
-                    # 이미지 크기 제한 (비율 유지하면서 리사이즈)
-                    max_size = (1920, 1080)
-                    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-                        # 비율을 유지하면서 리사이즈
-                        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                        logger.info(f"이미지 리사이즈 완료: {img.size}")
-                    
-                    # 리사이즈된 이미지를 메모리에 저장
-                    img_buffer = io.BytesIO()
-                    img.save(img_buffer, format="JPEG", quality=85)
-                    img_buffer.seek(0)
-                    
-                    # 메모리에서 이미지 데이터 추출
-                    processed_image_data = img_buffer.getvalue()
-                    
+                # 이미지 수집 단계 (프로세스 풀): draft 디코딩 + 방향 보정 + 모델 해상도 리사이즈
+                model_image = await image_ingest_pool.prepare_model_image(image_data, MODEL_IMAGE_SIZE)
+                logger.info(f"모델 입력 이미지 준비 완료: {model_image.size}")
+                
+                # 저장용 JPEG은 모델 실행과 병렬로 다른 워커에서 생성
+                stored_image_task = asyncio.ensure_future(image_ingest_pool.prepare_stored_jpeg(image_data))
+            
             except Exception as img_error:
                 logger.error(f"이미지 처리 실패: {img_error}")
                 yield f"data: {json.dumps({'error': '이미지 파일 오류입니다.', 'request_id': request_id})}\n\n"
                 return
 
+            # 이미 올라온 같은/유사 이미지면 생성하지 않고 기존 기사와 검증 이력으로 연결
+            image_phash = dhash(model_image)
+            duplicate = None if force_generate else await find_duplicate_article(image_phash)
+            if duplicate is not None:
+                stored_image_task.cancel()
+                logger.info(f"중복 이미지 감지: {request_id} → 기사 {duplicate['article']['id']} (거리 {duplicate['distance']})")
+                yield f"data: {json.dumps({'status': 'duplicate', 'request_id': request_id, 'duplicate_of': duplicate})}\n\n"
+                return
+
             # 메시지 구성 - 메모리 데이터 사용
-            messages = [
-                {
-                    "role": "system",
-                    "content": [
-                        {"type": "text", "text": "당신은 뉴스 기자 입니다. 이미지를 통해 상세히 기사를 작성해주세요."}
-                    ]
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "image", "url": f"data:image/jpeg;base64,{base64.b64encode(processed_image_data).decode()}"},
-                        {"type": "text", "text": f"이 이미지의 주제가 무엇인가요? 부연설명 : {submessage}"}
-                    ]
-                }
-            ]
-
-            # 방향 정보가 포함된 경우 프롬프트 개선
-            if "촬영 방향:" in submessage:
-                # 방향 정보 추출
-                orientation_match = None
-                if "촬영 방향: landscape" in submessage:
-                    orientation_match = "가로 방향으로 촬영된 이미지입니다. 가로 화면의 특성을 고려하여 기사를 작성해주세요."
-                elif "촬영 방향: portrait" in submessage:
-                    orientation_match = "세로 방향으로 촬영된 이미지입니다. 세로 화면의 특성을 고려하여 기사를 작성해주세요."
-                
-                if orientation_match:
-                    # 시스템 메시지에 방향 정보 추가
-                    messages[0]["content"][0]["text"] += f" {orientation_match}"
-                    logger.info(f"방향 정보 추가됨: {orientation_match}")
+            messages = build_messages(model_image, submessage)
 
             logger.info("스트리밍 AI 모델 실행 시작")
             
             # 즉시 시작 신호 전송
             yield f"data: {json.dumps({'status': 'started', 'message': 'AI 모델이 이미지를 분석하기 시작했습니다...', 'request_id': request_id})}\n\n"
-            await asyncio.sleep(0.1)
-            
-            # 진행 상태 업데이트
-            yield f"data: {json.dumps({'status': 'processing', 'message': '이미지에서 특징을 추출하고 있습니다...', 'request_id': request_id})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            yield f"data: {json.dumps({'status': 'processing', 'message': 'AI가 기사를 생성하고 있습니다...', 'request_id': request_id})}\n\n"
-            await asyncio.sleep(0.5)
-            
-            # 스트리밍 텍스트 생성
-            generated_text = ""
-            text_chunks = []
             
-            def stream_callback(text):
-                nonlocal generated_text, text_chunks
-                generated_text += text
-                text_chunks.append(text)
-                logger.info(f"스트리밍 콜백: {text}")
+            # 추론 스레드에서 생성되는 텍스트를 asyncio.Queue로 즉시 전달
+            token_stream = AsyncTextStream(asyncio.get_running_loop())
+            timer = TokenTimer()
             
-            # TextStreamer 설정
-            streamer = TextStreamer(
-                tokenizer=pipe.tokenizer,
-                skip_prompt=True,
-                skip_special_tokens=True,
-                callback=stream_callback
-            )
+            async def produce(on_chunk, cancel):
+                generation_request = GenerationRequest(
+                    messages=messages,
+                    max_new_tokens=max_new_tokens,
+                    on_text=on_chunk,
+                    timer=timer,
+                    cancel=cancel,
+                    deadline=deadline
+                )
+                return await submit_generation(generation_request)
             
-            # 모델 실행 (스트리밍)
+            # 모델 실행 (스트리밍) - 캐시 미스 시 추론 스레드에서 다른 요청과 배치로 실행,
+            # 동일한 요청이 진행 중이면 그 스트림을 공유 (마감 시간이 있는 요청은 공유하지 않음)
             logger.info("모델 실행 시작")
+            generation = asyncio.ensure_future(article_cache.get_or_generate(
+                article_cache_key(model_image.tobytes(), messages, max_new_tokens),
+                produce,
+                on_text=token_stream.push,
+                coalesce=deadline is None
+            ))
+            # 생성 종료(성공/실패/큐 포화) 시 스트림 종료
+            generation.add_done_callback(lambda _: token_stream.close())
             
-            # ImageTextToTextPipeline의 __call__ 메서드 사용
-            output = pipe(
-                text=messages, 
-                max_new_tokens=1000,
-                streamer=streamer
-            )
+            generated_text = ""
+            async for chunk in token_stream:
+                generated_text += chunk
+                yield f"data: {json.dumps({'text': chunk, 'request_id': request_id})}\n\n"
             
-            logger.info("모델 실행 완료")
+            truncated = False
+            try:
+                article, cache_status = await generation
+            except GenerationStopped as stopped:
+                if not stopped.text:
+                    stored_image_task.cancel()
+                    yield f"data: {json.dumps({'error': '마감 시간 안에 기사를 생성하지 못했습니다.', 'stop_reason': stopped.reason, 'request_id': request_id})}\n\n"
+                    return
+                # 마감 시간까지 생성된 부분 기사 (캐시에는 저장되지 않음)
+                article, cache_status, truncated = stopped.text, "miss", True
+            except QueueFullError as queue_error:
+                logger.warning(f"추론 큐 포화로 스트리밍 요청 거부: {request_id}")
+                stored_image_task.cancel()
+                yield f"data: {json.dumps({'error': '서버 혼잡', 'queue_position': queue_error.queue_position, 'estimated_wait_seconds': round(queue_error.estimated_wait, 1), 'request_id': request_id})}\n\n"
+                return
             
-            # 만약 TextStreamer가 작동하지 않았다면, 결과를 수동으로 청크로 나누어 전송
-            if len(text_chunks) == 0:
-                logger.info("TextStreamer가 작동하지 않음, 수동으로 청크 생성")
-                article = output[0]["generated_text"][-1]["content"]
-                
-                # 더 자연스러운 스트리밍을 위해 단어 단위로 나누기
-                words = article.split()
-                current_chunk = ""
-                chunk_size = 0
-                max_chunk_size = 50  # 한 번에 보낼 단어 수
-                
-                for i, word in enumerate(words):
-                    current_chunk += word + " "
-                    chunk_size += 1
-                    
-                    # 문장 끝이나 청크 크기 제한에 도달하면 전송
-                    if (word.endswith('.') or word.endswith('!') or word.endswith('?') or 
-                        word.endswith('다.') or word.endswith('요.') or word.endswith('죠.') or
-                        chunk_size >= max_chunk_size or i == len(words) - 1):
-                        
-                        if current_chunk.strip():
-                            logger.info(f"수동 청크 {len(text_chunks) + 1}: {current_chunk.strip()}")
-                            yield f"data: {json.dumps({'text': current_chunk.strip() + ' ', 'request_id': request_id})}\n\n"
-                            await asyncio.sleep(0.15)  # 0.15초 지연
-                        
-                        current_chunk = ""
-                        chunk_size = 0
-            else:
-                # 스트리밍 응답 - 콜백에서 수집된 텍스트 청크들을 전송
-                logger.info(f"수집된 텍스트 청크 수: {len(text_chunks)}")
-                for i, chunk in enumerate(text_chunks):
-                    if chunk.strip():  # 빈 문자열이 아닌 경우만 전송
-                        logger.info(f"스트리밍 청크 {i+1}: {chunk}")
-                        yield f"data: {json.dumps({'text': chunk, 'request_id': request_id})}\n\n"
-                        await asyncio.sleep(0.1)  # 0.1초 지연
+            logger.info(f"모델 실행 완료 (캐시: {cache_status})")
+            timer.record()
             
             # 완료 신호
             logger.info("스트리밍 완료")
             
             # 최종 기사 텍스트 추출
-            final_article = generated_text if generated_text else output[0]["generated_text"][-1]["content"]
+            final_article = article if article else generated_text
             
-            # 데이터베이스에 기사 저장
-            location_info = ""
-            orientation_info = ""
+            # 데이터베이스에 기사 저장 (submessage에서 위치 및 방향 정보 추출)
+            location_info, orientation_info = extract_capture_info(submessage)
             
-            # submessage에서 위치 및 방향 정보 추출
-            if "촬영 위치:" in submessage:
-                location_start = submessage.find("촬영 위치:") + 6
-                location_end = submessage.find(")", location_start)
-                if location_end > location_start:
-                    location_info = submessage[location_start:location_end].strip()
-            
-            if "촬영 방향:" in submessage:
-                orientation_start = submessage.find("촬영 방향:") + 6
-                orientation_end = submessage.find(",", orientation_start)
-                if orientation_end > orientation_start:
-                    orientation_info = submessage[orientation_start:orientation_end].strip()
+            # 저장용 JPEG 인코딩 결과를 이미지 저장소에 기록
+            processed_image_data = await stored_image_task
+            image_hash = await asyncio.to_thread(image_store.put, processed_image_data)
+            ensure_thumbnails(image_hash)
             
             # 데이터베이스에 저장
-            save_success = save_article_to_db(
+            save_success = await db.run(
+                save_article_to_db,
                 request_id=request_id,
                 content=final_article,
-                image_data=processed_image_data,
+                image_hash=image_hash,
                 submessage=submessage,
                 location=location_info,
-                orientation=orientation_info
+                orientation=orientation_info,
+                phash=to_signed(image_phash),
+                coordinates=coordinates
             )
+            if save_success:
+                await index_article_image(request_id, image_phash)
             
-            logger.info("완료 신호 전송: {'status': 'completed', 'request_id': '%s', 'saved_to_db': %s}", request_id, save_success)
-            yield f"data: {json.dumps({'status': 'completed', 'request_id': request_id, 'saved_to_db': save_success})}\n\n"
+            logger.info("완료 신호 전송: {'status': 'completed', 'request_id': '%s', 'saved_to_db': %s}, 지연 시간: %s", request_id, save_success, timer.summary())
+            yield f"data: {json.dumps({'status': 'completed', 'request_id': request_id, 'saved_to_db': save_success, 'cache': cache_status, 'truncated': truncated, 'timing': timer.summary()})}\n\n"
             
         except Exception as e:
             logger.error(f"스트리밍 분석 중 오류: {str(e)}")
             yield f"data: {json.dumps({'error': str(e), 'request_id': request_id})}\n\n"
+        finally:
+            # 클라이언트 연결이 끊기면 Starlette가 이 제너레이터를 취소하거나(연결 종료 감지)
+            # 전송이 실패함 - 생성 대기를 취소하면 마지막 대기자일 때 다음 토큰에서 생성이 멈춤
+            if generation is not None and not generation.done():
+                logger.info(f"스트리밍 클라이언트 연결 종료, 생성 취소: {request_id}")
+                metrics.inc("stream_disconnects")
+                generation.cancel()
     
     return StreamingResponse(
         generate_stream(),
@@ -833,10 +1280,164 @@ async def generate_article_stream(
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "Content-Type": "text/event-stream"
+            "Content-Type": "text/event-stream",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+@app.post("/jobs")
+async def submit_job(
+    image: UploadFile = File(...),
+    submessage: str = Form(""),
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None)
+):
+    """기사 생성 작업 등록 - 이미지를 전처리해 작업 테이블에 저장하고 바로 202 응답
+    
+    진행 상태는 GET /jobs/{job_id}로 조회하며, 서버가 재시작되어도 작업은 이어서 처리된다.
+    """
+    try:
+        coordinates = resolve_coordinates(latitude, longitude, extract_capture_info(submessage)[0])
+    except ValueError as e:
+        return invalid_location_response(e)
+    if not image.content_type or not image.content_type.startswith('image/'):
+        return JSONResponse(
+            status_code=400,
+            content={"error": "잘못된 파일 타입", "message": "이미지 파일만 업로드 가능합니다."}
+        )
+    if image.size and image.size > 10 * 1024 * 1024:
+        return JSONResponse(
+            status_code=413,
+            content={"error": "파일 크기 초과", "message": "이미지 파일이 너무 큽니다. 10MB 이하로 업로드해주세요."}
+        )
+    
+    # 구독자가 등록 전 단계(디코딩/전처리)도 이벤트 로그에서 받을 수 있도록 먼저 생성
+    job_id = job_store.create("job").job_id
+    job_store.update(job_id, "processing", "이미지를 처리하고 있습니다...", 0)
+    
+    try:
+        image_data = await image.read()
+        # 모델 입력 이미지와 저장용 JPEG을 병렬로 준비
+        job_store.set_stage(job_id, "decode")
+        model_image, stored_image = await asyncio.gather(
+            image_ingest_pool.prepare_model_image(image_data, MODEL_IMAGE_SIZE),
+            image_ingest_pool.prepare_stored_jpeg(image_data)
+        )
+    except Exception as img_error:
+        logger.error(f"이미지 처리 실패: {img_error}")
+        job_store.update(job_id, "error", "이미지 파일 오류입니다.")
+        return JSONResponse(
+            status_code=400,
+            content={"error": "이미지 파일 오류", "message": "올바른 이미지 파일이 아닙니다."}
+        )
+    
+    try:
+        job_store.set_stage(job_id, "preprocess")
+        image_hash = await asyncio.to_thread(image_store.put, stored_image)
+        ensure_thumbnails(image_hash)
+        await db.run(enqueue_job, job_id, submessage, model_image.tobytes(), model_image.size, image_hash,
+                     coordinates)
+    except Exception as e:
+        logger.error(f"작업 등록 실패: {e}")
+        job_store.update(job_id, "error", "작업 등록에 실패했습니다.")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "작업 등록에 실패했습니다."}
+        )
+    
+    job_store.update(job_id, "queued", "작업이 대기열에 등록되었습니다.", 0)
+    job_store.set_stage(job_id, "queued")
+    job_workers.notify()
+    logger.info(f"작업 등록: {job_id}, 부연설명: {submessage}")
+    
+    return JSONResponse(
+        status_code=202,
+        headers={"Location": f"/jobs/{job_id}"},
+        content={
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events"
+        }
+    )
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, offset: int = 0):
+    """작업 상태 조회 (영구 상태 + 진행 중이면 생성 텍스트의 offset 이후)"""
+    job = await db.run(get_job, job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "작업을 찾을 수 없습니다."}
+        )
+    
+    result = {
+        "job_id": job_id,
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "article_id": job["article_id"],
+        "error": job["error"],
+        "image_url": f"/images/{job['image_hash']}" if job["image_hash"] else None,
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+    live = job_store.get(job_id)
+    if live is not None:
+        result["progress"] = live.snapshot(offset)
+    return result
+
+@app.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str, request: Request):
+    """작업 진행 이벤트 구독 (SSE) - /analysis-status 폴링 대신 사용
+    
+    이벤트: stage(decode, preprocess, queued, prefill, generating, saved), delta(생성 텍스트 조각),
+    status(상태 변경), reset(재시도로 텍스트 초기화), snapshot(밀린 구독자용 현재 상태).
+    이벤트는 작업당 한 번만 직렬화되어 모든 구독자가 공유하며, 재연결 시
+    Last-Event-ID 이후부터 이어서 받는다. 최종 상태가 되면 스트림이 끝난다.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        # 메모리에 없는 영구 작업 (서버 재시작 후 등)
+        durable = await db.run(get_job, job_id)
+        if durable is None:
+            return JSONResponse(
+                status_code=404,
+                content={"error": "작업을 찾을 수 없습니다."}
+            )
+        job = job_store.create(job_id=job_id)
+        if durable["status"] in ("queued", "running"):
+            # 작업자가 이후 같은 항목에 이벤트를 발행함
+            job_store.update(job_id, "queued", "작업이 대기열에 등록되었습니다.", 0)
+        else:
+            if durable["status"] == "completed" and durable["article_id"] is not None:
+                # 스냅샷의 article이 비지 않도록 저장된 기사 본문을 채움
+                article = await db.run(get_article_by_id, durable["article_id"])
+                if article is not None:
+                    job_store.set_text(job_id, article["content"])
+            job_store.update(
+                job_id, durable["status"], durable["error"] or "",
+                article_id=durable["article_id"]
+            )
+    
+    try:
+        index = int(request.headers.get("last-event-id", "-1")) + 1
+    except ValueError:
+        index = 0
+    metrics.inc("job_event_subscriptions")
+    
+    return StreamingResponse(
+        stream_events(
+            job, index, JOB_EVENTS_MAX_LAG, JOB_EVENTS_KEEPALIVE_SECONDS,
+            on_snapshot=lambda: metrics.inc("job_event_snapshots")
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
         }
     )
 
 if __name__ == "__main__":
     logger.info("Gemma-3n 백엔드 서버 시작")
-    uvicorn.run("gemma3n_backend:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    # 앱 객체를 직접 넘겨 모듈을 한 번만 로드 (reload=True와 import 문자열은 모듈을 두 번 로드함)
+    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""위치 좌표 처리 (검증, 자유 텍스트 파싱, 반경 검색용 경계 상자와 거리)
+
+기사/검증 좌표는 위도·경도 REAL 열에 저장하고, 반경 검색은 R*Tree에서 경계 상자로
+후보를 좁힌 뒤 하버사인 거리로 정확히 거른다.
+"""
+import math
+import re
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+# 위도 1도의 거리 (경도 1도는 여기에 cos(위도)를 곱함)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# 위치 텍스트("촬영 위치:" 뒤의 "37.5665,126.9780 (중구, 서울)")의 맨 앞 소수 좌표
+# - 자유 텍스트의 "1,000명", "3, 4월" 같은 숫자를 좌표로 읽지 않도록 맨 앞만, 소수점 필수
+_COORDINATES_PATTERN = re.compile(r"\s*(-?\d{1,3}\.\d+)\s*,\s*(-?\d{1,3}\.\d+)")
+
+Box = Tuple[float, float, float, float]
+
+
+def validate_coordinates(latitude: float, longitude: float) -> Tuple[float, float]:
+    """위도 -90~90, 경도 -180~180 확인 (벗어나면 ValueError)"""
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        raise ValueError("좌표는 유한한 숫자여야 합니다.")
+    if not -90 <= latitude <= 90:
+        raise ValueError(f"위도는 -90~90 사이여야 합니다: {latitude}")
+    if not -180 <= longitude <= 180:
+        raise ValueError(f"경도는 -180~180 사이여야 합니다: {longitude}")
+    return latitude, longitude
+
+
+def parse_coordinates(location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """위치 텍스트 맨 앞의 "위도,경도"에서 좌표 추출 (없거나 범위를 벗어나면 None)
+
+    submessage 전체가 아니라 extract_capture_info로 뽑은 위치(articles.location)나
+    verifications.user_location을 넘긴다.
+    """
+    if not location:
+        return None
+    match = _COORDINATES_PATTERN.match(location)
+    if not match:
+        return None
+    try:
+        return validate_coordinates(float(match.group(1)), float(match.group(2)))
+    except ValueError:
+        return None
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(latitude: float, longitude: float, radius_km: float) -> List[Box]:
+    """반경 원을 덮는 (min_lat, max_lat, min_lon, max_lon) 상자 - 날짜변경선을 넘으면 2개"""
+    d_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = latitude - d_lat, latitude + d_lat
+    if min_lat <= -90 or max_lat >= 90:
+        # 극점을 포함하면 모든 경도
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+
+    # 원 안에서 경도 폭이 가장 넓은 위도 기준 (극에 가까운 쪽 가장자리)
+    d_lon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(max(abs(min_lat), abs(max_lat)))))
+    if d_lon >= 180:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    min_lon, max_lon = longitude - d_lon, longitude + d_lon
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0), (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0), (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def resolve_coordinates(latitude: Optional[float], longitude: Optional[float],
+                        location: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """요청의 위도/경도 필드 검증 - 둘 다 없으면 위치 텍스트에서 추출 (한쪽만 있으면 ValueError)"""
+    if latitude is None and longitude is None:
+        return parse_coordinates(location)
+    if latitude is None or longitude is None:
+        raise ValueError("위도와 경도를 함께 보내야 합니다.")
+    try:
+        return validate_coordinates(float(latitude), float(longitude))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"잘못된 좌표: {e}")
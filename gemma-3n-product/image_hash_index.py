@@ -0,0 +1,181 @@
+"""지각 해시(dHash) 기반 중복/유사 이미지 인덱스
+
+같은 사진이 잘리거나 재압축되거나 스크린샷으로 다시 올라오면 SHA-256은 달라지지만
+dHash(9x8 흑백 축소본의 인접 픽셀 밝기 비교, 64비트)는 몇 비트만 달라진다.
+해밍 거리 검색은 multi-index hashing으로 한다: 64비트 해시를 16비트 조각 4개로
+나눠 조각별 해시 테이블에 넣으면, 거리 r 이내의 해시는 비둘기집 원리에 따라
+적어도 한 조각이 r // 4 비트 이내로 같다. 따라서 조각마다 그 반경의 이웃 값만
+조회하고 후보의 실제 거리를 확인하면 되며, 전체 해시를 훑지 않는다.
+
+해시는 articles와 함께 article_phashes 테이블(부호 있는 64비트 정수)에 저장하고,
+서버 시작 시 메모리 인덱스로 읽어 온다.
+"""
+import itertools
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+CHUNK_BITS = 16
+CHUNKS = HASH_BITS // CHUNK_BITS
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+
+def dhash(img: Image.Image) -> int:
+    """64비트 차이 해시 - 가로로 인접한 픽셀의 밝기 증감"""
+    pixels = list(img.convert("L").resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            value = (value << 1) | (left > pixels[row * 9 + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_signed(value: int) -> int:
+    """SQLite INTEGER(부호 있는 64비트) 저장용 변환"""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def from_signed(value: int) -> int:
+    return value & ((1 << HASH_BITS) - 1)
+
+
+def _chunks(value: int) -> List[int]:
+    return [(value >> (index * CHUNK_BITS)) & _CHUNK_MASK for index in range(CHUNKS)]
+
+
+_neighbor_masks: Dict[int, List[int]] = {}
+
+
+def _masks_within(radius: int) -> List[int]:
+    """CHUNK_BITS 비트 중 radius개 이하를 뒤집는 XOR 마스크 (반경별 캐시)"""
+    masks = _neighbor_masks.get(radius)
+    if masks is None:
+        masks = [0]
+        for flips in range(1, radius + 1):
+            for bits in itertools.combinations(range(CHUNK_BITS), flips):
+                masks.append(sum(1 << bit for bit in bits))
+        _neighbor_masks[radius] = masks
+    return masks
+
+
+class PerceptualHashIndex:
+    """기사 ID → dHash 및 조각별 해시 테이블 (스레드 안전)"""
+
+    def __init__(self):
+        self._hashes: Dict[int, int] = {}
+        self._tables: List[Dict[int, array]] = [{} for _ in range(CHUNKS)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, article_id: int, value: int):
+        with self._lock:
+            if article_id in self._hashes:
+                self._remove(article_id)
+            self._hashes[article_id] = value
+            for table, chunk in zip(self._tables, _chunks(value)):
+                bucket = table.get(chunk)
+                if bucket is None:
+                    bucket = table[chunk] = array("q")
+                bucket.append(article_id)
+
+    def remove(self, article_id: int):
+        with self._lock:
+            self._remove(article_id)
+
+    def _remove(self, article_id: int):
+        value = self._hashes.pop(article_id, None)
+        if value is None:
+            return
+        for table, chunk in zip(self._tables, _chunks(value)):
+            bucket = table[chunk]
+            bucket.remove(article_id)
+            if not bucket:
+                del table[chunk]
+
+    def search(self, value: int, max_distance: int, limit: int = 5) -> List[Tuple[int, int]]:
+        """해밍 거리 max_distance 이내 항목을 (거리, 기사 ID) 오름차순으로 최대 limit개"""
+        started = time.perf_counter()
+        masks = _masks_within(max_distance // CHUNKS)
+        matches = []
+        seen = set()
+        with self._lock:
+            for table, chunk in zip(self._tables, _chunks(value)):
+                for mask in masks:
+                    bucket = table.get(chunk ^ mask)
+                    if bucket is None:
+                        continue
+                    for article_id in bucket:
+                        if article_id in seen:
+                            continue
+                        seen.add(article_id)
+                        distance = hamming(value, self._hashes[article_id])
+                        if distance <= max_distance:
+                            matches.append((distance, article_id))
+        matches.sort()
+        metrics.observe("phash_lookup", time.perf_counter() - started)
+        return matches[:limit]
+
+    def nearest(self, value: int, max_distance: int) -> Optional[Tuple[int, int]]:
+        """가장 가까운 (거리, 기사 ID) - 같은 거리면 먼저 저장된 기사"""
+        matches = self.search(value, max_distance, limit=1)
+        return matches[0] if matches else None
+
+
+def load_index(index: PerceptualHashIndex, rows) -> int:
+    """(article_id, 부호 있는 해시) 행들을 인덱스에 적재"""
+    started = time.monotonic()
+    count = 0
+    for article_id, value in rows:
+        index.add(article_id, from_signed(value))
+        count += 1
+    logger.info(f"이미지 지각 해시 인덱스 적재: {count}건 ({time.monotonic() - started:.1f}초)")
+    return count
+
+
+def backfill(index: PerceptualHashIndex, image_store, batch_size: int = 100) -> int:
+    """지각 해시가 없는 기존 기사의 저장 이미지로 해시를 계산해 저장/색인
+
+    기사 id 순서로 배치 단위로 진행하므로 서버 운영 중 백그라운드 스레드에서 실행한다.
+    """
+    from database import get_articles_missing_phash, save_article_phashes
+
+    last_id = 0
+    hashed_total = 0
+    while True:
+        rows = get_articles_missing_phash(last_id, batch_size)
+        if not rows:
+            break
+        hashed = []
+        for article_id, image_hash in rows:
+            last_id = article_id
+            try:
+                with Image.open(image_store.path_for(image_hash)) as img:
+                    # 해시는 9x8로 줄여 계산하므로 작은 DCT 스케일로 디코딩해도 충분
+                    img.draft("RGB", (64, 64))
+                    hashed.append((article_id, dhash(img)))
+            except (OSError, ValueError) as e:
+                logger.warning(f"기사 {article_id} 이미지 해시 계산 실패: {e}")
+        save_article_phashes([(article_id, to_signed(value)) for article_id, value in hashed])
+        for article_id, value in hashed:
+            index.add(article_id, value)
+        hashed_total += len(hashed)
+
+    if hashed_total:
+        logger.info(f"이미지 지각 해시 백필 완료: {hashed_total}건")
+    return hashed_total
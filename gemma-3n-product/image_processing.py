@@ -0,0 +1,217 @@
+"""업로드 이미지 수집(ingest) 단계
+
+업로드 JPEG은 draft 모드(DCT 스케일링)로 필요한 크기에 가깝게 바로 디코딩하고,
+EXIF 방향 보정과 가로 사진 세로 변환을 한 번의 transpose로 처리한다.
+모델 입력용 이미지는 비전 프로세서의 목표 해상도로 한 번만 리사이즈해
+PIL 이미지 그대로 전달한다 (JPEG 인코딩/base64 왕복 없음).
+저장용 JPEG은 모델 실행과 병렬로 따로 만든다. 목록/카드용 축소본(가로 160/480/1080,
+WebP와 JPEG)은 기사 저장 후 백그라운드 단계에서 저장용 JPEG으로부터 만든다.
+
+디코딩은 CPU 작업이므로 ImageIngestPool(코어 수만큼의 프로세스 풀)에서 실행한다.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 저장용 이미지 최대 크기 및 JPEG 품질
+STORED_MAX_SIZE = (1920, 1080)
+STORED_JPEG_QUALITY = 85
+
+# 축소본 가로 크기 (오름차순) 및 형식별 품질
+THUMBNAIL_WIDTHS = (160, 480, 1080)
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+THUMBNAIL_QUALITY = 80
+
+_EXIF_ORIENTATION_TAG = 274
+
+# EXIF 방향값 → 보정 transpose
+_EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# EXIF 보정 후 가로 사진을 90도 회전(세로 변환)까지 합친 단일 transpose
+_EXIF_TRANSPOSE_THEN_ROTATE_90 = {
+    1: Image.Transpose.ROTATE_90,
+    2: Image.Transpose.TRANSPOSE,
+    3: Image.Transpose.ROTATE_270,
+    4: Image.Transpose.TRANSVERSE,
+    5: Image.Transpose.FLIP_TOP_BOTTOM,
+    6: None,
+    7: Image.Transpose.FLIP_LEFT_RIGHT,
+    8: Image.Transpose.ROTATE_180,
+}
+
+
+def model_image_size(image_processor) -> Tuple[int, int]:
+    """비전 프로세서 설정에서 (가로, 세로) 목표 해상도 조회"""
+    size: Dict[str, int] = image_processor.size
+    return size["width"], size["height"]
+
+
+def decode_upload(data: bytes, min_size: Tuple[int, int]) -> Image.Image:
+    """업로드 이미지를 min_size 이상인 가장 작은 DCT 스케일로 디코딩하고 방향 보정
+
+    EXIF 방향 보정과 가로 사진의 세로 변환(기존 동작)을 한 번의 transpose로 적용한다.
+    """
+    img = Image.open(io.BytesIO(data))
+    logger.info(f"이미지 정보: {img.format}, {img.size}, {img.mode}")
+
+    try:
+        orientation = img.getexif().get(_EXIF_ORIENTATION_TAG, 1)
+    except Exception as exif_error:
+        logger.warning(f"EXIF 정보 처리 실패: {exif_error}")
+        orientation = 1
+
+    if img.format == "JPEG":
+        # 전체 해상도 대신 1/2, 1/4, 1/8 스케일로 바로 디코딩
+        img.draft("RGB", min_size)
+
+    width, height = img.size
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    if width > height:
+        method = _EXIF_TRANSPOSE_THEN_ROTATE_90.get(orientation, Image.Transpose.ROTATE_90)
+    else:
+        method = _EXIF_TRANSPOSE.get(orientation)
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if method is not None:
+        img = img.transpose(method)
+    return img
+
+
+def resize_for_model(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """이미지를 모델 입력 해상도로 바로 리사이즈
+
+    프로세서와 같은 BILINEAR 리샘플링을 사용하므로 프로세서 내부
+    리사이즈는 크기가 같아 사실상 생략된다.
+    """
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img.resize(size, Image.Resampling.BILINEAR)
+
+
+def encode_stored_jpeg(img: Image.Image) -> bytes:
+    """저장용 JPEG 인코딩 (비율 유지 축소, 전달된 이미지를 직접 변경함)"""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if img.size[0] > STORED_MAX_SIZE[0] or img.size[1] > STORED_MAX_SIZE[1]:
+        img.thumbnail(STORED_MAX_SIZE, Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=STORED_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def prepare_model_image(data: bytes, size: Tuple[int, int]) -> Image.Image:
+    """업로드 바이트 → 모델 입력 이미지"""
+    return resize_for_model(decode_upload(data, size), size)
+
+
+def prepare_stored_jpeg(data: bytes) -> bytes:
+    """업로드 바이트 → 저장용 JPEG (최대 1920x1080)"""
+    # 세로 변환 후 짧은 변이 최대 1080이므로 양쪽 모두 1080 이상으로만 디코딩하면 충분
+    shortest = min(STORED_MAX_SIZE)
+    return encode_stored_jpeg(decode_upload(data, (shortest, shortest)))
+
+
+def select_thumbnail_width(requested: int) -> int:
+    """요청 가로 이상인 가장 작은 축소본 크기 (모두보다 크면 가장 큰 것)"""
+    for width in THUMBNAIL_WIDTHS:
+        if width >= requested:
+            return width
+    return THUMBNAIL_WIDTHS[-1]
+
+
+def encode_thumbnails(stored_jpeg: bytes) -> Dict[Tuple[int, str], bytes]:
+    """저장용 JPEG → (가로, 형식)별 축소본
+
+    가장 큰 축소본에 맞는 DCT 스케일로 디코딩한 뒤 큰 크기부터 직전 결과를 다시
+    줄여 만든다. 원본보다 큰 크기는 확대하지 않고 원본 크기로 인코딩한다.
+    """
+    img = Image.open(io.BytesIO(stored_jpeg))
+    img.draft("RGB", (THUMBNAIL_WIDTHS[-1], 1))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+
+    thumbnails = {}
+    for width in reversed(THUMBNAIL_WIDTHS):
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.Resampling.LANCZOS)
+        for image_format in THUMBNAIL_FORMATS:
+            buffer = io.BytesIO()
+            if image_format == "webp":
+                img.save(buffer, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+            else:
+                img.save(buffer, format="JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+            thumbnails[(width, image_format)] = buffer.getvalue()
+    return thumbnails
+
+
+def _warmup(_: int) -> int:
+    return os.getpid()
+
+
+class ImageIngestPool:
+    """이미지 디코딩/리사이즈/인코딩을 여러 코어에서 실행하는 프로세스 풀
+
+    workers가 0이면 프로세스 풀 없이 스레드에서 실행한다.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """워커 프로세스를 미리 띄움
+
+        fork는 모델 로딩/추론 스레드가 시작되기 전에 일어나도록 서버 초기화
+        초반에 호출한다. Linux 외 플랫폼(macOS 등)은 fork가 안전하지 않고,
+        spawn은 서버 모듈을 다시 import해 모델을 중복 로딩하므로 스레드 실행으로 대체한다.
+        """
+        if self._executor is not None or self.workers <= 0:
+            return
+        if not sys.platform.startswith("linux"):
+            logger.info("Linux 외 플랫폼: 이미지 처리를 스레드에서 실행합니다")
+            self.workers = 0
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+        )
+        pids = set(self._executor.map(_warmup, range(self.workers * 2)))
+        logger.info(f"이미지 처리 프로세스 풀 시작: {len(pids)}개 워커")
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def prepare_model_image(self, data: bytes, size: Tuple[int, int]) -> Image.Image:
+        return await self._run(prepare_model_image, data, size)
+
+    async def prepare_stored_jpeg(self, data: bytes) -> bytes:
+        return await self._run(prepare_stored_jpeg, data)
+
+    async def encode_thumbnails(self, stored_jpeg: bytes) -> Dict[Tuple[int, str], bytes]:
+        return await self._run(encode_thumbnails, stored_jpeg)
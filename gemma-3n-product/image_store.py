@@ -0,0 +1,122 @@
+"""콘텐츠 주소 기반 이미지 파일 저장소
+
+저장용 JPEG은 SQLite BLOB 대신 SHA-256 해시를 이름으로 디스크에 한 번만 저장하고,
+기사에는 해시만 기록한다. 파일은 해시 앞 4자리로 2단계 디렉토리에 나눠
+(images/ab/cd/abcd....jpg) 한 디렉토리에 파일이 몰리지 않게 한다.
+같은 내용은 같은 경로이므로 중복 저장되지 않고 파일은 변경되지 않는다.
+
+목록/카드용 축소본(썸네일)은 원본 옆에 {해시}_{가로}.{webp|jpg}로 저장한다.
+원본이 바뀌지 않으므로 축소본도 한 번 만들면 바뀌지 않는다.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# 축소본 형식 → 파일 확장자
+THUMBNAIL_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+class ImageStore:
+    """해시 → 파일 경로 매핑과 원자적 저장"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def is_valid_hash(image_hash: str) -> bool:
+        return bool(_HASH_PATTERN.match(image_hash))
+
+    def path_for(self, image_hash: str) -> str:
+        """해시의 파일 경로 (잘못된 해시는 ValueError)"""
+        if not self.is_valid_hash(image_hash):
+            raise ValueError(f"잘못된 이미지 해시: {image_hash}")
+        return os.path.join(self.root, image_hash[:2], image_hash[2:4], f"{image_hash}.jpg")
+
+    def thumbnail_path(self, image_hash: str, width: int, image_format: str) -> str:
+        """축소본 파일 경로 (원본과 같은 디렉토리)"""
+        base, _ = os.path.splitext(self.path_for(image_hash))
+        return f"{base}_{width}.{THUMBNAIL_EXTENSIONS[image_format]}"
+
+    def exists(self, image_hash: str) -> bool:
+        return self.is_valid_hash(image_hash) and os.path.exists(self.path_for(image_hash))
+
+    def put(self, data: bytes) -> str:
+        """이미지를 저장하고 해시 반환 (이미 있으면 쓰지 않음)"""
+        image_hash = self.hash_bytes(data)
+        path = self.path_for(image_hash)
+        if os.path.exists(path):
+            return image_hash
+
+        self._write(path, data)
+        logger.info(f"이미지 저장: {image_hash} ({len(data)} bytes)")
+        return image_hash
+
+    def put_thumbnails(self, image_hash: str, thumbnails: Dict[Tuple[int, str], bytes]):
+        """(가로, 형식) → 인코딩된 축소본 저장"""
+        for (width, image_format), data in thumbnails.items():
+            self._write(self.thumbnail_path(image_hash, width, image_format), data)
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # 같은 디렉토리의 임시 파일에 쓴 뒤 rename해 읽는 쪽이 쓰다 만 파일을 보지 않게 함
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 Range 헤더(bytes=start-end, bytes=-N)를 [start, end] 구간으로 변환
+
+    해석할 수 없거나 여러 구간이면 None(전체 응답), 파일 범위를 벗어나면
+    ValueError(416 응답)를 발생시킨다.
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    start_text, end_text = match.groups()
+    if start_text:
+        start = int(start_text)
+        if end_text and int(end_text) < start:
+            # 끝이 시작보다 앞인 구간은 문법상 잘못된 Range - 무시하고 전체 응답
+            return None
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    elif end_text:
+        # 마지막 N바이트
+        start, end = max(0, size - int(end_text)), size - 1
+    else:
+        return None
+    if start >= size or start > end:
+        raise ValueError(f"범위를 벗어난 구간: {header}")
+    return start, end
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match 약한 비교 (W/ 접두어 무시, 여러 값과 * 지원)"""
+    if not header:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
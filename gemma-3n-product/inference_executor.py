@@ -0,0 +1,247 @@
+"""Gemma-3n 추론 전용 실행기
+
+모델 호출은 CPU를 수십 초 동안 점유하므로 async 핸들러 안에서 직접 실행하면
+uvicorn 워커 전체(/health, /articles, /analysis-status 등)가 멈춘다.
+InferenceExecutor는 모델을 소유하는 전용 워커 스레드와 크기가 제한된 요청 큐를
+제공하고, 핸들러는 결과를 await 한다.
+
+submit_batched()로 들어온 요청은 같은 배치 실행 함수를 쓰는 대기 요청과 묶여
+한 번의 모델 호출로 처리된다 (동적 배치).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 배치 실행 함수 형식: runner(items, complete) - 항목 i가 끝나면 complete(i, result) 호출
+# (result가 예외 객체이면 해당 항목만 그 예외로 실패)
+BatchRunner = Callable[[List[Any], Callable[[int, Any], None]], None]
+
+
+class QueueFullError(Exception):
+    """추론 큐가 가득 차서 요청을 받을 수 없을 때 발생"""
+
+    def __init__(self, queue_position: int, estimated_wait: float):
+        super().__init__(f"추론 대기열이 가득 찼습니다 (대기 순번: {queue_position})")
+        self.queue_position = queue_position
+        self.estimated_wait = estimated_wait
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: Dict[str, Any]
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    batched: bool = False
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None):
+    """이벤트 루프 스레드에서 future 결과 설정 (이미 완료/취소된 future는 무시)"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class InferenceExecutor:
+    """모델 호출을 전용 스레드에서 실행하는 제한 큐 실행기"""
+
+    def __init__(self, max_queue_size: int = 8, name: str = "gemma3n-inference",
+                 initial_job_seconds: float = 30.0, max_batch_size: int = 1,
+                 batch_window: float = 0.0):
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window
+        self.name = name
+        self._pending: Deque[_Job] = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        # 배치 1회 평균 소요 시간 (지수 이동 평균) - 예상 대기 시간 계산용
+        self._avg_job_seconds = initial_job_seconds
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._batches = 0
+        self._last_batch_size = 0
+
+    def start(self):
+        """워커 스레드 시작"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"추론 실행기 시작: {self.name} (큐 크기 {self.max_queue_size}, 최대 배치 {self.max_batch_size})")
+
+    def stop(self, timeout: Optional[float] = None):
+        """대기 중인 작업을 마친 뒤 워커 스레드 종료"""
+        if not self._thread:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+        logger.info(f"추론 실행기 종료: {self.name}")
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def is_full(self) -> bool:
+        return self.queue_depth >= self.max_queue_size
+
+    def estimated_wait(self, position: Optional[int] = None) -> float:
+        """대기 순번 기준 예상 대기 시간(초)"""
+        if position is None:
+            position = self.queue_depth
+        batches_ahead = -(-position // self.max_batch_size)
+        return (batches_ahead + (1 if self._busy else 0)) * self._avg_job_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "max_batch_size": self.max_batch_size,
+            "busy": self._busy,
+            "avg_job_seconds": round(self._avg_job_seconds, 2),
+            "estimated_wait_seconds": round(self.estimated_wait(), 1),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "batches": self._batches,
+            "last_batch_size": self._last_batch_size,
+        }
+
+    async def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """작업을 큐에 넣고 워커 스레드의 실행 결과를 기다림
+
+        큐가 가득 차 있으면 QueueFullError를 즉시 발생시킨다.
+        """
+        return await self._enqueue(fn, args, kwargs, batched=False)
+
+    async def submit_batched(self, runner: BatchRunner, item: Any) -> Any:
+        """같은 runner를 쓰는 대기 요청과 묶어 배치로 실행하고 이 항목의 결과를 기다림"""
+        return await self._enqueue(runner, (item,), {}, batched=True)
+
+    async def _enqueue(self, fn, args, kwargs, batched: bool) -> Any:
+        loop = asyncio.get_running_loop()
+        job = _Job(fn=fn, args=args, kwargs=kwargs, loop=loop,
+                   future=loop.create_future(), batched=batched)
+        with self._cond:
+            if len(self._pending) >= self.max_queue_size:
+                self._rejected += 1
+                position = len(self._pending) + 1
+                raise QueueFullError(position, self.estimated_wait(position))
+            self._pending.append(job)
+            self._cond.notify()
+        return await job.future
+
+    def _take_matching(self, batch: List[_Job]):
+        """대기 큐에서 첫 작업과 같은 runner를 쓰는 배치 작업을 꺼냄 (순서 유지)"""
+        runner = batch[0].fn
+        remaining: Deque[_Job] = deque()
+        while self._pending:
+            job = self._pending.popleft()
+            if job.future.cancelled():
+                continue
+            if len(batch) < self.max_batch_size and job.batched and job.fn is runner:
+                batch.append(job)
+            else:
+                remaining.append(job)
+        self._pending = remaining
+
+    def _next_batch(self) -> Optional[List[_Job]]:
+        with self._cond:
+            while True:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return None
+                first = self._pending.popleft()
+                if not first.future.cancelled():
+                    break
+                # 대기 중에 클라이언트가 떠난 작업은 실행하지 않음
+
+            batch = [first]
+            if not first.batched or self.max_batch_size == 1:
+                return batch
+
+            # 배치 창(batch_window) 동안 도착하는 요청도 함께 묶음
+            deadline = time.monotonic() + self.batch_window
+            while True:
+                self._take_matching(batch)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.max_batch_size or remaining <= 0 or self._stopping:
+                    return batch
+                self._cond.wait(remaining)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+
+            self._busy = True
+            self._last_batch_size = len(batch)
+            started = time.monotonic()
+            try:
+                if batch[0].batched:
+                    self._run_batch(batch)
+                else:
+                    self._run_single(batch[0])
+            finally:
+                elapsed = time.monotonic() - started
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+                self._batches += 1
+                self._busy = False
+                logger.info(
+                    f"추론 작업 처리: 배치 {len(batch)}건, {elapsed:.1f}초 "
+                    f"(최대 큐 대기 {started - batch[0].enqueued_at:.1f}초)"
+                )
+
+    def _run_single(self, job: _Job):
+        try:
+            result = job.fn(*job.args, **job.kwargs)
+            job.loop.call_soon_threadsafe(_resolve, job.future, result)
+            self._completed += 1
+        except BaseException as e:
+            logger.error(f"추론 작업 실패: {e}")
+            job.loop.call_soon_threadsafe(_resolve, job.future, None, e)
+            self._failed += 1
+
+    def _run_batch(self, batch: List[_Job]):
+        def complete(index: int, result: Any):
+            # 먼저 끝난 항목은 배치 전체를 기다리지 않고 즉시 결과를 돌려줌
+            job = batch[index]
+            if isinstance(result, BaseException):
+                job.loop.call_soon_threadsafe(_resolve, job.future, None, result)
+            else:
+                job.loop.call_soon_threadsafe(_resolve, job.future, result)
+
+        runner = batch[0].fn
+        try:
+            runner([job.args[0] for job in batch], complete)
+            self._completed += len(batch)
+        except BaseException as e:
+            logger.error(f"배치 추론 작업 실패: {e}")
+            for job in batch:
+                job.loop.call_soon_threadsafe(_resolve, job.future, None, e)
+            self._failed += len(batch)
+        finally:
+            # runner가 결과를 넘기지 않은 항목은 오류로 종료 (이미 완료된 future는 무시됨)
+            missing = RuntimeError("배치 추론 결과가 누락되었습니다")
+            for job in batch:
+                job.loop.call_soon_threadsafe(_resolve, job.future, None, missing)
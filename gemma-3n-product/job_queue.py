@@ -0,0 +1,289 @@
+"""영구 기사 생성 작업 큐
+
+POST /jobs로 들어온 요청은 전처리된 모델 입력 이미지와 프롬프트를 jobs 테이블에
+저장하고 바로 202로 응답한다. JobWorkerPool의 작업자가 작업을 임대(lease)해
+실행하며, 실행 중에는 주기적으로 임대를 연장(heartbeat)한다. 서버가 죽으면
+임대가 만료된 작업을 다른 작업자(재시작된 서버 포함)가 다시 가져가 이어서 처리한다.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from database import ensure_column, db
+
+logger = logging.getLogger(__name__)
+
+# 작업 처리 함수 형식: handler(job) -> 생성된 기사 ID
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[int]]]
+# 실패/재대기 상태 알림 형식: on_status(job_id, status, error)
+JobStatusCallback = Callable[[str, str, Optional[str]], None]
+
+
+class RetryLater(Exception):
+    """지금은 처리할 수 없어 시도 횟수 증가 없이 다시 대기열로 돌려보낼 작업"""
+
+
+def init_jobs_table():
+    """작업 테이블 생성"""
+    conn = db.connection()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'queued'
+                    CHECK(status IN ('queued', 'running', 'completed', 'failed')),
+                submessage TEXT,
+                model_image BLOB,
+                image_width INTEGER,
+                image_height INTEGER,
+                image_hash TEXT,
+                latitude REAL,
+                longitude REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                article_id INTEGER,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        # 이전 스키마에 촬영 좌표 열 추가
+        ensure_column(conn, "jobs", "latitude", "REAL")
+        ensure_column(conn, "jobs", "longitude", "REAL")
+
+
+def enqueue_job(job_id: str, submessage: str, model_image: bytes,
+                image_size: tuple, image_hash: Optional[str],
+                coordinates: Optional[Tuple[float, float]] = None):
+    """전처리된 모델 입력 이미지(RGB 원시 바이트)와 프롬프트, 촬영 좌표를 작업으로 저장"""
+    now = time.time()
+    latitude, longitude = coordinates or (None, None)
+    conn = db.connection()
+    with conn:
+        conn.execute("""
+            INSERT INTO jobs (id, submessage, model_image, image_width, image_height, image_hash,
+                              latitude, longitude, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (job_id, submessage, model_image, image_size[0], image_size[1], image_hash,
+              latitude, longitude, now, now))
+
+
+_CLAIM_SQL = """
+    UPDATE jobs
+    SET status = 'running', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ?
+    WHERE id = (SELECT id FROM jobs WHERE {condition} ORDER BY created_at LIMIT 1)
+    RETURNING id, submessage, model_image, image_width, image_height, image_hash, latitude, longitude, attempts
+"""
+
+
+def claim_job(owner: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+    """대기 중이거나 임대가 만료된 가장 오래된 작업을 임대"""
+    now = time.time()
+    conn = db.connection()
+    with conn:
+        row = conn.execute(
+            _CLAIM_SQL.format(condition="status = 'queued'"),
+            (owner, now + lease_seconds, now)
+        ).fetchone()
+        if row is None:
+            # 처리 중에 작업자가 죽어 임대가 만료된 작업
+            row = conn.execute(
+                _CLAIM_SQL.format(condition="status = 'running' AND lease_expires < ?"),
+                (owner, now + lease_seconds, now, now)
+            ).fetchone()
+    return dict(row) if row else None
+
+
+def renew_lease(job_id: str, owner: str, lease_seconds: float) -> bool:
+    """임대 연장 - 임대를 잃었으면 False"""
+    now = time.time()
+    conn = db.connection()
+    with conn:
+        cursor = conn.execute("""
+            UPDATE jobs SET lease_expires = ?, updated_at = ?
+            WHERE id = ? AND lease_owner = ? AND status = 'running'
+        """, (now + lease_seconds, now, job_id, owner))
+    return cursor.rowcount == 1
+
+
+def finish_job(job_id: str, owner: str, status: str, article_id: Optional[int] = None,
+               error: Optional[str] = None, requeue: bool = False):
+    """작업 완료/실패 기록 (완료·실패 시 입력 이미지는 삭제)
+
+    requeue이면 시도 횟수를 되돌리고 대기열로 돌려보낸다.
+    """
+    now = time.time()
+    conn = db.connection()
+    with conn:
+        if requeue:
+            conn.execute("""
+                UPDATE jobs
+                SET status = 'queued', lease_owner = NULL, lease_expires = NULL,
+                    attempts = attempts - 1, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (now, job_id, owner))
+        elif status == "queued":
+            conn.execute("""
+                UPDATE jobs
+                SET status = 'queued', lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (error, now, job_id, owner))
+        else:
+            conn.execute("""
+                UPDATE jobs
+                SET status = ?, article_id = ?, error = ?, model_image = NULL,
+                    lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ? AND lease_owner = ?
+            """, (status, article_id, error, now, job_id, owner))
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """작업 상태 조회 (입력 이미지 제외)"""
+    row = db.connection().execute("""
+        SELECT id, status, submessage, image_hash, attempts, article_id, error, created_at, updated_at
+        FROM jobs WHERE id = ?
+    """, (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def count_pending_jobs() -> int:
+    row = db.connection().execute(
+        "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+    ).fetchone()
+    return row[0]
+
+
+class JobWorkerPool:
+    """작업 테이블에서 작업을 임대해 handler로 실행하는 비동기 작업자들"""
+
+    def __init__(self, handler: JobHandler, workers: int = 2, lease_seconds: float = 60.0,
+                 poll_interval: float = 1.0, max_attempts: int = 3,
+                 can_claim: Optional[Callable[[], bool]] = None,
+                 on_status: Optional[JobStatusCallback] = None):
+        self.handler = handler
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        # False를 반환하는 동안은 새 작업을 가져가지 않음 (예: 추론 큐 포화)
+        self.can_claim = can_claim or (lambda: True)
+        # handler가 완료를 직접 알리지 못하는 실패("failed")/재대기("queued") 기록 후 호출
+        self.on_status = on_status
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self._active = set()
+        self._stopping = False
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"작업자 시작: {self.workers}개 ({self.owner})")
+
+    async def stop(self):
+        """작업자 종료 - 실행 중이던 작업은 시도 횟수 증가 없이 대기열로 되돌림"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job_id in list(self._active):
+            try:
+                await db.run(finish_job, job_id, self.owner, "queued", requeue=True)
+            except Exception as e:
+                # 되돌리지 못한 작업은 임대 만료 후 다시 처리됨
+                logger.warning(f"작업 반환 실패: {job_id}: {e}")
+        self._active.clear()
+
+    def notify(self):
+        """새 작업이 들어왔음을 알림"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _wait_for_work(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _worker(self, index: int):
+        while True:
+            if not self.can_claim():
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                job = await db.run(claim_job, self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"작업 임대 실패: {e}")
+                job = None
+            if job is None:
+                await self._wait_for_work()
+                continue
+            await self._run_job(job)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        if job["attempts"] > self.max_attempts:
+            logger.error(f"작업 재시도 횟수 초과: {job_id}")
+            await db.run(finish_job, job_id, self.owner, "failed", error="재시도 횟수 초과")
+            self._notify_status(job_id, "failed", "재시도 횟수 초과")
+            return
+
+        logger.info(f"작업 시작: {job_id} (시도 {job['attempts']})")
+        self._active.add(job_id)
+        handler_task = asyncio.ensure_future(self.handler(job))
+        heartbeat_task = asyncio.ensure_future(self._heartbeat(job_id, handler_task))
+        try:
+            article_id = await handler_task
+        except RetryLater as e:
+            logger.info(f"작업 대기열로 반환: {job_id} ({e})")
+            await db.run(finish_job, job_id, self.owner, "queued", requeue=True)
+            self._notify_status(job_id, "queued", None)
+        except asyncio.CancelledError:
+            if self._stopping:
+                # 서버 종료 - stop()이 대기열로 되돌림
+                raise
+            # 임대를 잃음 - 작업은 새 임대 소유자가 처리
+            self._active.discard(job_id)
+            return
+        except Exception as e:
+            logger.error(f"작업 실패: {job_id}: {e}")
+            status = "failed" if job["attempts"] >= self.max_attempts else "queued"
+            await db.run(finish_job, job_id, self.owner, status, error=str(e))
+            self._notify_status(job_id, status, str(e))
+        else:
+            await db.run(finish_job, job_id, self.owner, "completed", article_id=article_id)
+            logger.info(f"작업 완료: {job_id} (기사 ID: {article_id})")
+        finally:
+            heartbeat_task.cancel()
+        self._active.discard(job_id)
+
+    def _notify_status(self, job_id: str, status: str, error: Optional[str]):
+        if self.on_status is None:
+            return
+        try:
+            self.on_status(job_id, status, error)
+        except Exception as e:
+            logger.warning(f"작업 상태 알림 실패: {job_id}: {e}")
+
+    async def _heartbeat(self, job_id: str, handler_task: asyncio.Future):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await db.run(renew_lease, job_id, self.owner, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"작업 임대 연장 실패: {job_id}: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"작업 임대를 잃어 중단: {job_id}")
+                handler_task.cancel()
+                return
@@ -0,0 +1,302 @@
+"""분석 작업 상태 저장소
+
+요청별 진행 상태(상태, 메시지, 진행률)와 생성 중인 텍스트를 보관한다.
+텍스트는 조각을 이어 붙이기만 하고(append-only) 조회 시 offset 이후만 잘라
+돌려주므로, 토큰마다 전체 텍스트를 복사하지 않고 폴링도 새 텍스트만 받는다.
+작업 수와 보관 용량(텍스트 + 이벤트 로그)에 상한을 두고, 오래 갱신되지 않은
+작업(TTL)과 가장 오래 전에 갱신된 작업(LRU)부터 제거한다.
+
+작업마다 단계 전환/텍스트 조각/상태 변경 이벤트를 SSE 프레임으로 한 번만
+직렬화해 추가 전용 로그에 쌓는다. 구독자(GET /jobs/{id}/events)는 로그의
+위치만 들고 같은 프레임을 공유하며, 너무 뒤처진 구독자는 밀린 이벤트 대신
+현재 상태 스냅샷 한 개를 받는다. 작업이 최종 상태가 되면 최종 상태 이벤트만
+남기고 로그를 버리며(이벤트 번호는 이어짐), 그 앞을 읽으려는 구독자에게는
+스냅샷을 보낸다.
+
+이벤트 루프 스레드에서만 사용한다.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 진행 단계 (이미지 디코딩 → 전처리 → (영구 작업 대기) → 프리필 → 생성 → 저장)
+STAGES = ("decode", "preprocess", "queued", "prefill", "generating", "saved")
+# 이벤트 스트림을 닫는 최종 상태
+TERMINAL_STATUSES = ("completed", "error", "failed", "rejected")
+
+
+def new_job_id(prefix: str = "req") -> str:
+    """충돌하지 않는 작업 ID"""
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+class Job:
+    """작업 1건의 상태와 누적 텍스트"""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = "processing"
+        self.message = ""
+        self.progress: Optional[float] = 0
+        self.extra: Dict[str, Any] = {}
+        self.stage: Optional[str] = None
+        self.updated_at = time.monotonic()
+        self._chunks: List[str] = []
+        # _ends[i] = i번째 조각까지의 누적 길이
+        self._ends: List[int] = []
+        # 직렬화된 SSE 프레임 로그 (모든 구독자가 공유) - events[0]의 이벤트 번호는 event_base
+        self.events: List[bytes] = []
+        self.event_base = 0
+        self.event_bytes = 0
+        self.closed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    @property
+    def event_count(self) -> int:
+        """지금까지 발행한 이벤트 수 (버린 로그 포함) = 다음 이벤트 번호"""
+        return self.event_base + len(self.events)
+
+    @property
+    def text_length(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def append_text(self, text: str):
+        if text:
+            self._chunks.append(text)
+            self._ends.append(self.text_length + len(text))
+
+    def set_text(self, text: str):
+        """누적 텍스트를 최종 텍스트로 교체"""
+        self._chunks = [text] if text else []
+        self._ends = [len(text)] if text else []
+
+    def text_from(self, offset: int = 0) -> str:
+        """offset 이후 텍스트 (offset이 걸친 조각부터만 이어 붙임)"""
+        offset = max(0, offset)
+        if offset >= self.text_length:
+            return ""
+        index = bisect.bisect_right(self._ends, offset)
+        start = self._ends[index - 1] if index > 0 else 0
+        return "".join(self._chunks[index:])[offset - start:]
+
+    def publish(self, event: str, data: Dict[str, Any]) -> int:
+        """이벤트를 SSE 프레임으로 한 번 직렬화해 로그에 추가하고 구독자를 깨움 - 프레임 바이트 수 반환"""
+        frame = f"id: {self.event_count}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+        self.events.append(frame)
+        self.event_bytes += len(frame)
+        self._notify()
+        return len(frame)
+
+    def drop_events(self, keep: int = 0) -> int:
+        """마지막 keep개를 남기고 이벤트 로그를 버림 (번호는 이어짐) - 해제한 바이트 수 반환"""
+        count = max(0, len(self.events) - keep)
+        freed = sum(len(frame) for frame in self.events[:count])
+        self.event_base += count
+        self.events = self.events[count:]
+        self.event_bytes -= freed
+        return freed
+
+    def close(self):
+        self.closed = True
+        self._notify()
+
+    def _notify(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def wait(self, timeout: float) -> bool:
+        """새 이벤트가 올 때까지 대기 - timeout이면 False"""
+        if self._waiter is None or self._waiter.done():
+            self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def lagging(self, index: int, max_lag: int) -> bool:
+        """index부터 읽는 구독자가 스냅샷을 받아야 하는지 (max_lag개 초과로 밀렸거나 로그가 버려짐)"""
+        pending = self.event_count - index
+        return pending > 0 and (pending > max_lag or index < self.event_base)
+
+    def read_events(self, index: int, max_lag: int) -> Tuple[bytes, int]:
+        """index 이후 프레임을 한 덩어리로 반환 - (프레임, 다음 index)
+
+        max_lag개보다 많이 밀렸거나 해당 이벤트가 이미 버려졌으면 현재 상태
+        스냅샷 하나를 보낸다.
+        """
+        if self.event_count - index <= 0:
+            return b"", index
+        if self.lagging(index, max_lag):
+            data = {**self.snapshot(), "stage": self.stage}
+            if "article" not in data:
+                data["partial_text"] = self.text_from(0)
+            frame = f"id: {self.event_count - 1}\nevent: snapshot\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            return frame.encode(), self.event_count
+        return b"".join(self.events[index - self.event_base:]), self.event_count
+
+    def snapshot(self, offset: int = 0) -> Dict[str, Any]:
+        """상태 응답 - partial_text(완료 시 article)는 offset 이후 텍스트만 포함"""
+        text = self.text_from(offset)
+        result: Dict[str, Any] = {"status": self.status, "message": self.message}
+        if self.progress is not None:
+            result["progress"] = self.progress
+        result.update(self.extra)
+        if self.status == "completed":
+            result["article"] = text
+        elif text or offset:
+            result["partial_text"] = text
+        result["offset"] = offset
+        result["text_length"] = self.text_length
+        return result
+
+
+async def stream_events(job: Job, index: int, max_lag: int, keepalive_seconds: float,
+                        on_snapshot: Optional[Callable[[], None]] = None) -> AsyncIterator[bytes]:
+    """index부터 작업 이벤트 프레임을 보내고, 작업이 최종 상태로 닫히면 끝나는 SSE 본문
+
+    전송(send)이 느린 클라이언트에서는 yield에서 멈춰 있고, 그동안 쌓인 이벤트는
+    공유 로그에만 남음 - 다시 읽을 때 max_lag를 넘었거나 작업이 끝나 로그가
+    버려졌으면 스냅샷 하나로 대체한다. 새 이벤트가 없으면 keepalive 주석을 보낸다.
+    """
+    while True:
+        lagging = job.lagging(index, max_lag)
+        frames, index = job.read_events(index, max_lag)
+        if frames:
+            if lagging and on_snapshot is not None:
+                on_snapshot()
+            yield frames
+        elif job.closed:
+            return
+        elif not await job.wait(keepalive_seconds):
+            yield b": keepalive\n\n"
+
+
+class JobStore:
+    """작업 수/보관 용량 상한과 TTL/LRU 제거를 갖춘 작업 저장소
+
+    용량은 누적 텍스트 글자 수와 이벤트 로그 프레임 바이트 수의 합으로 센다.
+    """
+
+    def __init__(self, max_jobs: int = 1000, ttl: float = 3600.0,
+                 max_bytes: int = 16 * 1024 * 1024):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._text_chars = 0
+        self._event_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def create(self, prefix: str = "req", job_id: Optional[str] = None) -> Job:
+        """새 작업 등록 (job_id를 주면 해당 ID 사용, 예: 영구 작업 재개)"""
+        job = Job(job_id or new_job_id(prefix))
+        self._jobs[job.job_id] = job
+        self._evict(keep=job.job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def update(self, job_id: str, status: str, message: str,
+               progress: Optional[float] = None, **extra):
+        """상태 갱신 - 이전 부가 필드(extra)는 새 값으로 교체되고 텍스트는 유지"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        status_changed = status != job.status
+        job.status = status
+        job.message = message
+        job.progress = progress
+        job.extra = extra
+        if status_changed:
+            self._publish(job, "status", {"status": status, "message": message, **extra})
+        if status in TERMINAL_STATUSES:
+            job.close()
+            # 끝난 작업의 구독자는 스냅샷(최종 상태와 기사)으로 충분하므로 로그를 버림
+            # (따라오던 구독자가 최종 상태 이벤트를 그대로 받도록 마지막 프레임은 남김)
+            self._event_bytes -= job.drop_events(keep=1)
+        else:
+            # 재시도로 다시 처리 중이 되면 스트림을 다시 엶
+            job.closed = False
+        self._touch(job)
+
+    def set_stage(self, job_id: str, stage: str):
+        """진행 단계 전환 이벤트 발행"""
+        job = self._jobs.get(job_id)
+        if job is None or job.stage == stage:
+            return
+        job.stage = stage
+        self._publish(job, "stage", {"stage": stage})
+        self._touch(job)
+
+    def append_text(self, job_id: str, text: str) -> int:
+        """생성 텍스트 조각 추가 - 누적 길이 반환"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return 0
+        offset = job.text_length
+        job.append_text(text)
+        self._text_chars += len(text)
+        self._publish(job, "delta", {"offset": offset, "text": text})
+        self._touch(job)
+        return job.text_length
+
+    def set_text(self, job_id: str, text: str):
+        """누적 텍스트를 최종 텍스트로 교체 (구독자는 이미 조각으로 받았으므로 이벤트 없음)"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        self._text_chars += len(text) - job.text_length
+        job.set_text(text)
+        self._touch(job)
+
+    def reset_text(self, job_id: str):
+        """재시도 전 생성 텍스트 초기화 (구독자에게 reset 이벤트)"""
+        job = self._jobs.get(job_id)
+        if job is None or job.text_length == 0:
+            return
+        self.set_text(job_id, "")
+        self._publish(job, "reset", {})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"jobs": len(self._jobs), "text_chars": self._text_chars, "event_bytes": self._event_bytes}
+
+    def _publish(self, job: Job, event: str, data: Dict[str, Any]):
+        self._event_bytes += job.publish(event, data)
+
+    def _over_capacity(self) -> bool:
+        return self._text_chars + self._event_bytes > self.max_bytes
+
+    def _touch(self, job: Job):
+        job.updated_at = time.monotonic()
+        self._jobs.move_to_end(job.job_id)
+        if self._over_capacity():
+            self._evict(keep=job.job_id)
+
+    def _evict(self, keep: Optional[str] = None):
+        # 앞쪽일수록 오래 전에 갱신된 작업 (방금 갱신한 keep 작업은 제거하지 않음)
+        expire_before = time.monotonic() - self.ttl
+        while self._jobs:
+            job_id, job = next(iter(self._jobs.items()))
+            if job_id == keep:
+                break
+            over_limit = len(self._jobs) > self.max_jobs or self._over_capacity()
+            if job.updated_at >= expire_before and not over_limit:
+                break
+            del self._jobs[job_id]
+            self._text_chars -= job.text_length
+            self._event_bytes -= job.drop_events()
+            job.close()
+            if over_limit:
+                logger.info(f"작업 상태 제거 (용량 초과): {job_id}")
@@ -0,0 +1,67 @@
+"""프로세스 내 간단한 지표 수집기
+
+카운터와 지연 시간 요약(최근 샘플 기준 평균/p50/p95)을 보관하며,
+/metrics 엔드포인트에서 JSON으로 노출한다.
+"""
+import threading
+from collections import deque
+from typing import Any, Dict
+
+
+class LatencySummary:
+    """최근 N개 샘플 기반 지연 시간 요약"""
+
+    def __init__(self, max_samples: int = 1024):
+        self._samples: deque = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": 0}
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2),
+            "p50_ms": round(percentile(0.50) * 1000, 2),
+            "p95_ms": round(percentile(0.95) * 1000, 2),
+        }
+
+
+class Metrics:
+    """스레드 안전 카운터/지연 시간 레지스트리"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._latencies: Dict[str, LatencySummary] = {}
+
+    def inc(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            summary = self._latencies.get(name)
+            if summary is None:
+                summary = self._latencies[name] = LatencySummary()
+            summary.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "latencies": {name: s.snapshot() for name, s in self._latencies.items()},
+            }
+
+
+metrics = Metrics()
@@ -0,0 +1,229 @@
+"""백그라운드 모델 로딩 + 워밍업
+
+서버 import 시점에 수 GB 모델을 올리면 시작이 수 분씩 걸리고, 그동안은
+/health조차 응답하지 못한다. ModelLoader는 앱이 뜬 뒤 별도 스레드에서
+파이프라인 로드 → 시스템 프롬프트 KV 캐시 생성 → 짧은 워밍업 생성을 차례로
+실행하고, 현재 단계/진행률을 readiness 엔드포인트에 제공한다.
+
+가중치는 safetensors 파일을 mmap으로 열어 필요한 텐서만 페이지 단위로 읽고
+(low_cpu_mem_usage로 임시 사본 없이 바로 모델에 적재), MODEL_PATH로 미리
+받아 둔 로컬 디렉토리를 지정하면 허브 조회 없이 로드한다.
+
+추론 모드는 시작 시 선택한다 (정확도와 속도/메모리 교환):
+- bf16: 기본값, 가중치/연산 모두 bfloat16
+- int8: 언어 모델과 lm_head의 Linear 가중치를 int8로 동적 양자화
+  (torch.ao 동적 양자화 커널은 fp32 활성값만 받으므로 나머지는 fp32로 로드)
+compile을 켜면 모델 forward를 torch.compile로 감싸며, 컴파일은 워밍업 생성에서 끝난다.
+draft_model_path를 주면 같은 모드로 보조 모델을 올려 단일 요청을 assisted decoding으로
+생성한다 (draft_model.py).
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 로딩 단계와 단계 시작 시점의 대략적인 진행률
+LOADING_STAGES = {
+    "pending": 0.0,
+    "loading_weights": 0.05,
+    "loading_draft": 0.7,
+    "building_prefix_cache": 0.8,
+    "warming_up": 0.9,
+    "ready": 1.0,
+    "failed": 0.0,
+}
+
+# 지원하는 추론 모드
+INFERENCE_MODES = ("bf16", "int8")
+
+# 워밍업 생성 토큰 수 (커널 선택/메모리 할당을 첫 요청 전에 끝냄)
+WARMUP_TOKENS = 8
+
+
+def load_pipeline(model_path: str, mode: str = "bf16", compile_model: bool = False, model: Any = None):
+    """Gemma-3n 파이프라인 로드 (CPU, mmap된 safetensors, 배치용 왼쪽 패딩)
+
+    mode가 int8이면 fp32로 로드한 뒤 언어 모델 Linear를 int8로 양자화하고,
+    compile_model이면 forward를 torch.compile로 감싼다. model을 주면(다른
+    프로세스가 공유 메모리에 올린 모델) 가중치는 다시 읽지 않고 프로세서만 읽는다.
+    """
+    import torch
+    from transformers import AutoProcessor, pipeline
+
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"지원하지 않는 추론 모드: {mode} (가능: {', '.join(INFERENCE_MODES)})")
+
+    if model is not None:
+        pipe = pipeline(
+            "image-text-to-text",
+            model=model,
+            processor=AutoProcessor.from_pretrained(model_path, local_files_only=os.path.isdir(model_path)),
+            device="cpu",
+        )
+    else:
+        pipe = pipeline(
+            "image-text-to-text",
+            model=model_path,
+            device="cpu",
+            torch_dtype=torch.bfloat16 if mode == "bf16" else torch.float32,
+            model_kwargs={
+                "use_safetensors": True,
+                "low_cpu_mem_usage": True,
+                # 로컬 디렉토리면 허브 조회 없이 로드
+                "local_files_only": os.path.isdir(model_path),
+            },
+        )
+    # 배치 생성 시 프롬프트 끝이 정렬되도록 왼쪽 패딩 사용
+    pipe.processor.tokenizer.padding_side = "left"
+
+    if mode == "int8":
+        quantize_language_model(pipe.model)
+    if compile_model:
+        # 배치 크기/시퀀스 길이가 요청마다 달라 dynamic shape으로 컴파일 (재컴파일 최소화)
+        pipe.model.forward = torch.compile(pipe.model.forward, dynamic=True)
+    return pipe
+
+
+def quantize_language_model(model):
+    """언어 모델(텍스트 디코더)과 lm_head의 nn.Linear를 int8 동적 양자화로 교체
+
+    디코드 시간 대부분이 디코더 Linear 가중치를 읽는 데 쓰이므로 그 부분만 양자화하고,
+    비전/오디오 인코더는 원래 정밀도로 둔다 (이미지 인코딩은 요청당 1회).
+    """
+    import torch
+
+    targets = {
+        name for name, _ in model.named_modules()
+        if name.endswith("language_model") or name == "lm_head"
+    }
+    if not targets:
+        raise RuntimeError("양자화할 언어 모델 모듈을 찾지 못했습니다")
+    started = time.monotonic()
+    torch.ao.quantization.quantize_dynamic(model, targets, dtype=torch.qint8, inplace=True)
+    logger.info(f"int8 동적 양자화 완료: {', '.join(sorted(targets))} ({time.monotonic() - started:.1f}초)")
+
+
+class ModelLoader:
+    """모델 로드/프리필 캐시/워밍업을 수행하고 진행 상태를 보고"""
+
+    def __init__(self, model_path: str, use_prefix_cache: bool = True, warmup: bool = True,
+                 on_stage: Optional[Callable[[str], None]] = None,
+                 mode: str = "bf16", compile_model: bool = False,
+                 draft_model_path: Optional[str] = None, draft_tokens: int = 5, greedy: bool = False,
+                 model: Any = None):
+        self.model_path = model_path
+        # 공유 메모리에 이미 올라온 모델 (모델 복제본) - 있으면 가중치를 다시 읽지 않음
+        self.model = model
+        self.mode = mode
+        self.compile_model = compile_model
+        self.draft_model_path = draft_model_path
+        self.draft_tokens = draft_tokens
+        self.greedy = greedy
+        self.draft = None
+        self.use_prefix_cache = use_prefix_cache
+        self.warmup = warmup
+        self.on_stage = on_stage
+        self.pipe = None
+        self.prefix_cache = None
+        self.stage = "pending"
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.stage_started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.stage == "ready"
+
+    def start(self):
+        """백그라운드 스레드에서 로딩 시작"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.load, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def load(self):
+        """로딩 단계를 차례로 실행 (현재 스레드에서)"""
+        self.started_at = time.monotonic()
+        try:
+            self._set_stage("loading_weights")
+            self.pipe = load_pipeline(self.model_path, self.mode, self.compile_model, model=self.model)
+
+            if self.draft_model_path:
+                from draft_model import DraftModel, check_compatible
+
+                self._set_stage("loading_draft")
+                draft_model = load_pipeline(self.draft_model_path, self.mode).model
+                check_compatible(self.pipe.model, draft_model)
+                self.draft = DraftModel(draft_model, self.draft_tokens)
+
+            if self.use_prefix_cache:
+                from prefix_cache import PrefixKVCache
+                from prompts import system_prompt_variants
+
+                # 시스템 프롬프트 변형별 KV 캐시 사전 계산 (요청마다 접두부 프리필 생략)
+                self._set_stage("building_prefix_cache")
+                self.prefix_cache = PrefixKVCache(self.pipe.model, self.pipe.processor, system_prompt_variants())
+
+            if self.warmup:
+                self._set_stage("warming_up")
+                self._warmup()
+
+            self.ready_at = time.monotonic()
+            self._set_stage("ready")
+            logger.info(f"모델 준비 완료: {self.model_path} [{self.mode}] ({self.ready_at - self.started_at:.1f}초)")
+        except Exception as e:
+            self.error = str(e)
+            self._set_stage("failed")
+            logger.error(f"모델 로딩 실패: {e}")
+
+    def generate(self, requests, complete):
+        """로드된 모델로 배치 생성 (추론 스레드/복제본 프로세스에서 호출)"""
+        from batch_scheduler import generate_batch
+
+        generate_batch(self.pipe.model, self.pipe.processor, requests, complete,
+                       prefix_cache=self.prefix_cache, draft=self.draft, greedy=self.greedy)
+
+    def _warmup(self):
+        """합성 이미지로 짧은 생성을 한 번 실행"""
+        from PIL import Image
+
+        from batch_scheduler import GenerationRequest
+        from image_processing import model_image_size
+        from prompts import build_messages
+
+        started = time.monotonic()
+        image = Image.new("RGB", model_image_size(self.pipe.processor.image_processor), (128, 128, 128))
+        request = GenerationRequest(messages=build_messages(image, ""), max_new_tokens=WARMUP_TOKENS)
+        self.generate([request], lambda index, result: None)
+        logger.info(f"워밍업 생성 완료: {time.monotonic() - started:.1f}초")
+
+    def _set_stage(self, stage: str):
+        self.stage = stage
+        self.stage_started_at = time.monotonic()
+        logger.info(f"모델 로딩 단계: {stage}")
+        if self.on_stage is not None:
+            self.on_stage(stage)
+
+    def status(self) -> Dict[str, Any]:
+        """readiness 응답용 상태 (단계, 진행률, 경과 시간)"""
+        now = time.monotonic()
+        result: Dict[str, Any] = {
+            "stage": self.stage,
+            "progress": LOADING_STAGES[self.stage],
+            "model_path": self.model_path,
+            "mode": self.mode,
+            "compiled": self.compile_model,
+        }
+        if self.started_at is not None:
+            result["elapsed_seconds"] = round((self.ready_at or now) - self.started_at, 1)
+        if self.stage_started_at is not None and not self.ready:
+            result["stage_elapsed_seconds"] = round(now - self.stage_started_at, 1)
+        if self.draft is not None:
+            result["draft"] = {"model_path": self.draft_model_path, **self.draft.stats()}
+        if self.error:
+            result["error"] = self.error
+        return result
@@ -0,0 +1,513 @@
+"""모델 복제본 워커 프로세스 풀 + 최소 부하 라우터
+
+모델 1개가 API 프로세스 안에서 모든 코어의 torch 스레드를 쓰면 uvicorn 및
+다른 요청과 CPU를 다투고, 코어가 많을수록 스레드 간 동기화 비용으로 확장성이
+떨어진다. ModelReplicaPool은 모델을 N개의 워커 프로세스에 나눠 올리고 각
+프로세스를 서로 겹치지 않는 코어 묶음에 고정(sched_setaffinity)한 뒤
+torch 스레드 수를 그 코어 수로 맞춘다.
+
+가중치는 API 프로세스가 한 번만 올려 share_memory()로 공유 메모리에 옮긴 뒤
+복제본 프로세스에 넘기므로(torch.multiprocessing 텐서 공유), 복제본 수와
+관계없이 한 벌만 상주하고 복제본마다 따로 쓰는 것은 KV 캐시와 활성값뿐이다.
+int8 모드는 양자화된 가중치를 공유 메모리로 옮길 수 없어 복제본마다 모델을
+따로 올리므로 가중치 메모리가 복제본 수만큼 늘어난다 (share_weights=False도 같음).
+
+라우터(API 프로세스)는 복제본별 처리 중 요청 수를 세어 가장 한가한 복제본으로
+요청을 보낸다. 각 복제본은 자기 대기열의 요청을 generate_batch()로 동적 배치
+처리하고 텍스트 조각/결과를 공용 결과 큐로 돌려준다. 취소 신호와 마감 시각은
+복제본으로 전달되어 다음 토큰에서 생성이 멈춘다.
+
+InferenceExecutor와 같은 조회 인터페이스(is_full, queue_depth, estimated_wait,
+stats, start, stop)를 제공한다.
+"""
+import asyncio
+import contextlib
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from inference_executor import QueueFullError
+from model_loader import ModelLoader, load_pipeline
+from streaming import GenerationStopped
+
+logger = logging.getLogger(__name__)
+
+# 라우터가 취소된 요청을 확인하는 주기
+CANCEL_POLL_SECONDS = 0.02
+# 복제본 프로세스 생존 확인 주기
+LIVENESS_CHECK_SECONDS = 1.0
+
+
+def core_slices(replicas: int, threads_per_replica: Optional[int] = None) -> List[List[int]]:
+    """사용 가능한 코어를 복제본별로 겹치지 않게 나눔 (남는 코어는 API 프로세스 몫)"""
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    per_replica = threads_per_replica or max(1, len(cores) // replicas)
+    if per_replica * replicas > len(cores):
+        logger.warning(f"코어 부족: {len(cores)}개 코어에 복제본 {replicas}개 x {per_replica}스레드")
+    return [
+        [cores[(index * per_replica + offset) % len(cores)] for offset in range(per_replica)]
+        for index in range(replicas)
+    ]
+
+
+@contextlib.contextmanager
+def _without_main_import():
+    """spawn 자식이 __main__ 스크립트(gemma3n_backend.py)를 다시 실행하지 않도록 잠시 숨김
+
+    spawn은 자식에서 부모의 __main__ 모듈을 __mp_main__으로 다시 import하는데,
+    서버 스크립트는 최상위에서 DB 초기화/이미지 프로세스 풀 시작 등을 수행한다.
+    복제본은 _replica_main에 필요한 모듈만 import하면 된다.
+    """
+    main = sys.modules["__main__"]
+    saved_spec = getattr(main, "__spec__", None)
+    saved_file = getattr(main, "__file__", None)
+    main.__spec__ = None
+    if saved_file is not None:
+        del main.__file__
+    try:
+        yield
+    finally:
+        main.__spec__ = saved_spec
+        if saved_file is not None:
+            main.__file__ = saved_file
+
+
+def _replica_main(index: int, cores: List[int], model_name: str, max_batch_size: int,
+                  batch_window: float, loader_options: Dict[str, Any], requests, results,
+                  shared_model: Any = None):
+    """복제본 워커 프로세스 - 코어 고정 후 모델을 올리고(워밍업 포함) 요청을 배치로 처리
+
+    shared_model은 라우터가 공유 메모리에 올린 모델 (없으면 이 프로세스에서 로드).
+    """
+    logging.basicConfig(level=logging.INFO)
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    import torch
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+
+    from batch_scheduler import GenerationRequest
+    from streaming import TokenTimer
+
+    # 로딩 단계를 라우터에 알려 readiness에 복제본별 진행 상태를 보여줌
+    loader = ModelLoader(
+        model_name,
+        on_stage=lambda stage: results.put(("stage", index, None, stage)),
+        model=shared_model,
+        **loader_options
+    )
+    loader.load()
+    if not loader.ready:
+        return
+    logger.info(f"복제본 {index} 모델 준비 완료: 코어 {cores}")
+
+    pending: "queue.Queue" = queue.Queue()
+    cancels: Dict[int, threading.Event] = {}
+
+    def read_requests():
+        # 생성 중에도 취소 신호를 받도록 요청 큐는 별도 스레드에서 읽음
+        while True:
+            message = requests.get()
+            kind = message[0]
+            if kind == "generate":
+                cancels[message[1]] = threading.Event()
+                pending.put(message)
+            elif kind == "cancel":
+                event = cancels.get(message[1])
+                if event is not None:
+                    event.set()
+            elif kind == "stop":
+                pending.put(None)
+                return
+
+    threading.Thread(target=read_requests, name=f"replica-{index}-reader", daemon=True).start()
+
+    stopping = False
+    while not stopping:
+        first = pending.get()
+        if first is None:
+            break
+        batch = [first]
+        # 배치 창 동안 도착하는 요청도 함께 묶음
+        window_end = time.monotonic() + batch_window
+        while len(batch) < max_batch_size:
+            try:
+                item = pending.get(timeout=max(0.0, window_end - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+
+        generation_requests = []
+        timers = []
+        for _, request_id, messages, max_new_tokens, deadline, started_at in batch:
+            timer = TokenTimer()
+            timer.started_at = started_at
+            timers.append(timer)
+            generation_requests.append(GenerationRequest(
+                messages=messages,
+                max_new_tokens=max_new_tokens,
+                on_text=lambda text, request_id=request_id: results.put(("text", index, request_id, text)),
+                timer=timer,
+                cancel=cancels[request_id],
+                deadline=deadline
+            ))
+
+        finished = set()
+
+        def complete(row: int, result: Any):
+            request_id = batch[row][1]
+            finished.add(request_id)
+            cancels.pop(request_id, None)
+            timing = timers[row].export()
+            if isinstance(result, GenerationStopped):
+                results.put(("stopped", index, request_id, (result.reason, result.text, timing)))
+            else:
+                results.put(("done", index, request_id, (result, timing)))
+
+        try:
+            loader.generate(generation_requests, complete)
+        except Exception as e:
+            logger.error(f"복제본 {index} 배치 생성 실패: {e}")
+            error = str(e)
+        else:
+            error = "배치 추론 결과가 누락되었습니다"
+        for _, request_id, *_ in batch:
+            if request_id not in finished:
+                cancels.pop(request_id, None)
+                results.put(("error", index, request_id, error))
+
+
+@dataclass
+class _Replica:
+    index: int
+    cores: List[int]
+    process: Any = None
+    requests: Any = None
+    stage: str = "pending"
+    exited: bool = False
+    load: int = 0
+    completed: int = 0
+    restarts: int = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.stage == "ready"
+
+
+@dataclass
+class _Pending:
+    request: Any
+    replica: int
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    cancel_sent: bool = False
+
+
+class ModelReplicaPool:
+    """코어 고정 모델 워커 프로세스 N개와 최소 부하 라우터"""
+
+    def __init__(self, model_name: str, replicas: int, threads_per_replica: Optional[int] = None,
+                 max_batch_size: int = 1, batch_window: float = 0.0, max_queue_size: int = 8,
+                 prefix_cache: bool = True, warmup: bool = True, initial_job_seconds: float = 30.0,
+                 inference_mode: str = "bf16", compile_model: bool = False,
+                 draft_model_path: Optional[str] = None, draft_tokens: int = 5, greedy: bool = False,
+                 share_weights: bool = True):
+        self.model_name = model_name
+        # 가중치를 이 프로세스에서 한 번 올려 복제본과 공유 (int8 양자화 가중치는 공유 불가)
+        self.share_weights = share_weights and inference_mode != "int8"
+        self._shared_model = None
+        # 복제본 프로세스의 ModelLoader 설정
+        self.loader_options = {
+            "use_prefix_cache": prefix_cache,
+            "warmup": warmup,
+            "mode": inference_mode,
+            "compile_model": compile_model,
+            "draft_model_path": draft_model_path,
+            "draft_tokens": draft_tokens,
+            "greedy": greedy,
+        }
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window
+        self.max_queue_size = max_queue_size
+        # 복제본별 대기열 몫 (처리 중 배치 + 대기)
+        self.replica_capacity = self.max_batch_size + -(-max_queue_size // replicas)
+        self._replicas = [_Replica(index, cores) for index, cores in enumerate(core_slices(replicas, threads_per_replica))]
+        self._context = multiprocessing.get_context("spawn")
+        self._results = None
+        self._pending: Dict[int, _Pending] = {}
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader: Optional[threading.Thread] = None
+        self._cancel_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # 요청 1건 평균 처리 시간 (지수 이동 평균) - 예상 대기 시간 계산용
+        self._avg_job_seconds = initial_job_seconds
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def start(self):
+        """워커 프로세스와 결과 수신 스레드 시작 (이벤트 루프에서 호출)"""
+        if self._reader is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        # spawn: 부모의 torch 스레드 풀/이미지 프로세스 풀 상태를 물려받지 않음
+        self._results = self._context.Queue()
+        # 요청 큐는 먼저 만들어 두어 복제본이 뜨기 전 요청도 대기열에 쌓임
+        for replica in self._replicas:
+            replica.requests = self._context.Queue()
+        if self.share_weights:
+            # 공유 가중치 로딩(수 분)은 별도 스레드에서 하고, 끝나면 이벤트 루프에서 복제본을 띄움
+            threading.Thread(target=self._load_shared_weights, name="replica-weights", daemon=True).start()
+        else:
+            self._spawn_all()
+        self._reader = threading.Thread(target=self._read_results, name="replica-results", daemon=True)
+        self._reader.start()
+        self._cancel_task = asyncio.ensure_future(self._watch_cancellations())
+        logger.info(
+            f"모델 복제본 풀 시작: {len(self._replicas)}개 x {len(self._replicas[0].cores)}코어 "
+            f"(복제본당 최대 {self.replica_capacity}건, 가중치 {'공유' if self.share_weights else '복제본별 로드'})"
+        )
+
+    def _load_shared_weights(self):
+        """모델을 한 번 올려 가중치를 공유 메모리로 옮긴 뒤 복제본 시작을 예약 (별도 스레드)"""
+        self._loop.call_soon_threadsafe(self._set_stages, "loading_weights")
+        try:
+            # 텐서를 복사 대신 공유 메모리 핸들로 pickle하는 규칙 등록 (spawn 인자 전달에 사용)
+            import torch.multiprocessing  # noqa: F401
+
+            started = time.monotonic()
+            model = load_pipeline(self.model_name, self.loader_options["mode"]).model
+            model.share_memory()
+        except Exception as e:
+            logger.error(f"복제본 공유 가중치 로딩 실패: {e}")
+            self._loop.call_soon_threadsafe(self._set_stages, "failed")
+            return
+        logger.info(f"복제본 공유 가중치 준비 완료: {time.monotonic() - started:.1f}초")
+        self._shared_model = model
+        self._loop.call_soon_threadsafe(self._spawn_all)
+
+    def _set_stages(self, stage: str):
+        for replica in self._replicas:
+            replica.stage = stage
+
+    def _spawn_all(self):
+        if self._stopping:
+            return
+        for replica in self._replicas:
+            self._spawn(replica)
+
+    def _spawn(self, replica: _Replica):
+        replica.stage = "pending"
+        replica.exited = False
+        replica.process = self._context.Process(
+            target=_replica_main,
+            args=(replica.index, replica.cores, self.model_name, self.max_batch_size,
+                  self.batch_window, self.loader_options, replica.requests, self._results,
+                  self._shared_model),
+            name=f"gemma3n-replica-{replica.index}",
+            daemon=True
+        )
+        with _without_main_import():
+            replica.process.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """워커 프로세스에 종료를 알리고 대기 (대기 중인 요청은 처리 후 종료)"""
+        if self._reader is None:
+            return
+        self._stopping = True
+        if self._cancel_task is not None:
+            self._cancel_task.cancel()
+        for replica in self._replicas:
+            replica.requests.put(("stop",))
+        for replica in self._replicas:
+            if replica.process is None:
+                continue
+            replica.process.join(timeout)
+            if replica.process.is_alive():
+                replica.process.terminate()
+        self._results.put(None)
+        self._reader.join(timeout)
+        self._reader = None
+        self._shared_model = None
+        logger.info("모델 복제본 풀 종료")
+
+    @property
+    def queue_depth(self) -> int:
+        # 복제본에서 바로 배치에 들어가지 못하고 기다리는 요청 수
+        return sum(max(0, replica.load - self.max_batch_size) for replica in self._replicas)
+
+    def is_full(self) -> bool:
+        return self._choose_replica() is None
+
+    def ready_replicas(self) -> int:
+        return sum(replica.ready for replica in self._replicas)
+
+    def estimated_wait(self, position: Optional[int] = None) -> float:
+        """대기 순번 기준 예상 대기 시간(초)"""
+        if position is None:
+            position = self.queue_depth
+        slots = len(self._replicas) * self.max_batch_size
+        return -(-position // slots) * self._avg_job_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "replicas": [
+                {
+                    "index": replica.index,
+                    "cores": len(replica.cores),
+                    "stage": replica.stage,
+                    "load": replica.load,
+                    "completed": replica.completed,
+                    "restarts": replica.restarts,
+                }
+                for replica in self._replicas
+            ],
+            "shared_weights": self._shared_model is not None,
+            "queue_depth": self.queue_depth,
+            "max_batch_size": self.max_batch_size,
+            "replica_capacity": self.replica_capacity,
+            "avg_job_seconds": round(self._avg_job_seconds, 2),
+            "estimated_wait_seconds": round(self.estimated_wait(), 1),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+    def _choose_replica(self) -> Optional[_Replica]:
+        """준비된 복제본 중 처리 중 요청이 가장 적은 복제본 (없으면 로딩 중인 복제본)"""
+        candidates = [
+            replica for replica in self._replicas
+            if replica.load < self.replica_capacity and replica.stage != "failed"
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda replica: (not replica.ready, replica.load, replica.index))
+
+    async def submit(self, request) -> str:
+        """GenerationRequest를 가장 한가한 복제본에서 실행하고 기사 텍스트를 기다림
+
+        모든 복제본이 가득 차 있으면 QueueFullError를 즉시 발생시킨다.
+        """
+        replica = self._choose_replica()
+        if replica is None:
+            self._rejected += 1
+            position = self.queue_depth + 1
+            raise QueueFullError(position, self.estimated_wait(position))
+
+        request_id = next(self._ids)
+        pending = _Pending(request, replica.index, self._loop.create_future())
+        self._pending[request_id] = pending
+        replica.load += 1
+        started_at = request.timer.started_at if request.timer is not None else time.monotonic()
+        replica.requests.put((
+            "generate", request_id, request.messages, request.max_new_tokens, request.deadline, started_at
+        ))
+        return await pending.future
+
+    def _read_results(self):
+        """결과 큐를 읽어 이벤트 루프로 넘기고, 죽은 복제본을 감지"""
+        next_check = time.monotonic() + LIVENESS_CHECK_SECONDS
+        while True:
+            try:
+                message = self._results.get(timeout=LIVENESS_CHECK_SECONDS)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                return
+            if message:
+                self._loop.call_soon_threadsafe(self._dispatch, message)
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + LIVENESS_CHECK_SECONDS
+                for replica in self._replicas:
+                    process = replica.process
+                    if process is None:
+                        continue
+                    if not self._stopping and not replica.exited and not process.is_alive():
+                        self._loop.call_soon_threadsafe(self._on_replica_exit, replica, process)
+
+    def _dispatch(self, message):
+        kind, index, request_id, payload = message
+        if kind == "stage":
+            self._replicas[index].stage = payload
+            if payload == "ready":
+                logger.info(f"모델 복제본 {index} 준비 완료")
+            return
+
+        pending = self._pending.get(request_id)
+        if pending is None:
+            return
+        if kind == "text":
+            if pending.request.on_text is not None:
+                pending.request.on_text(payload)
+            return
+
+        del self._pending[request_id]
+        replica = self._replicas[pending.replica]
+        replica.load -= 1
+        elapsed = time.monotonic() - pending.enqueued_at
+        self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+        if pending.future.done():
+            return
+        if kind == "done":
+            article, timing = payload
+            self._absorb_timing(pending.request, timing)
+            replica.completed += 1
+            self._completed += 1
+            pending.future.set_result(article)
+        elif kind == "stopped":
+            reason, text, timing = payload
+            self._absorb_timing(pending.request, timing)
+            pending.future.set_exception(GenerationStopped(reason, text))
+        else:
+            self._failed += 1
+            pending.future.set_exception(RuntimeError(payload))
+
+    @staticmethod
+    def _absorb_timing(request, timing: Dict[str, Any]):
+        if request.timer is not None:
+            request.timer.absorb(timing)
+
+    def _on_replica_exit(self, replica: _Replica, process):
+        """복제본 프로세스가 죽으면 처리 중이던 요청을 실패시키고 다시 띄움"""
+        if self._stopping or replica.process is not process or replica.exited:
+            return
+        replica.exited = True
+        error = RuntimeError(f"모델 복제본 {replica.index}이 종료되었습니다")
+        for request_id, pending in list(self._pending.items()):
+            if pending.replica == replica.index:
+                del self._pending[request_id]
+                self._failed += 1
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+        replica.load = 0
+        if replica.stage == "failed":
+            # 모델 로딩 자체가 실패한 경우 재시작해도 같은 오류가 반복됨
+            logger.error(f"모델 복제본 {replica.index} 로딩 실패로 종료됨, 재시작하지 않음")
+            return
+        logger.error(f"모델 복제본 {replica.index} 종료됨 (exit code {process.exitcode}), 재시작")
+        replica.restarts += 1
+        # 실패 처리한 요청이 새 복제본에서 다시 실행되지 않도록 요청 큐를 새로 만듦
+        replica.requests = self._context.Queue()
+        self._spawn(replica)
+
+    async def _watch_cancellations(self):
+        """취소 신호가 설정된 요청을 해당 복제본에 전달"""
+        while True:
+            await asyncio.sleep(CANCEL_POLL_SECONDS)
+            for request_id, pending in self._pending.items():
+                cancel = pending.request.cancel
+                if not pending.cancel_sent and cancel is not None and cancel.is_set():
+                    pending.cancel_sent = True
+                    self._replicas[pending.replica].requests.put(("cancel", request_id))
@@ -0,0 +1,116 @@
+"""시스템 프롬프트 접두부 KV 캐시
+
+모든 요청은 같은 시스템 프롬프트(촬영 방향 안내 문장 유무에 따른 몇 가지 변형)로
+시작하므로, 각 변형의 past-key-values를 서버 시작 시 한 번 계산해 두고
+요청마다 해당 접두부 이후 토큰만 프리필한다.
+
+Gemma-3n의 prepare_inputs_for_generation은 cache_position이 0일 때만
+pixel_values를 넘기므로, 이미지 토큰이 포함된 나머지 프롬프트는 여기서 직접
+forward로 프리필하고(마지막 토큰 제외) generate()는 마지막 토큰부터 이어간다.
+"""
+import copy
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import torch
+from transformers import DynamicCache
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PrefixEntry:
+    system_text: str
+    token_ids: torch.Tensor
+    past_key_values: DynamicCache
+
+
+class PrefixKVCache:
+    """시스템 프롬프트 변형별로 미리 계산한 KV 캐시"""
+
+    def __init__(self, model, processor, system_texts: List[str]):
+        self.model = model
+        self.processor = processor
+        self._entries: List[_PrefixEntry] = []
+        for system_text in system_texts:
+            self._entries.append(self._build(system_text))
+
+    def _prefix_ids(self, system_text: str) -> torch.Tensor:
+        """채팅 템플릿으로 렌더링한 프롬프트에서 시스템 문장까지의 토큰"""
+        rendered = self.processor.apply_chat_template(
+            [
+                {"role": "system", "content": [{"type": "text", "text": system_text}]},
+                {"role": "user", "content": [{"type": "text", "text": "-"}]},
+            ],
+            tokenize=False,
+        )
+        prefix_text = rendered[:rendered.index(system_text) + len(system_text)]
+        ids = self.processor.tokenizer(prefix_text, add_special_tokens=False, return_tensors="pt")["input_ids"][0]
+        # 마지막 토큰은 뒤따르는 문자와 병합될 수 있으므로 제외
+        return ids[:-1]
+
+    def _build(self, system_text: str) -> _PrefixEntry:
+        started = time.monotonic()
+        token_ids = self._prefix_ids(system_text)
+        past_key_values = DynamicCache()
+        with torch.inference_mode():
+            self.model(
+                input_ids=token_ids.unsqueeze(0).to(self.model.device),
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+        logger.info(
+            f"시스템 프롬프트 KV 캐시 생성: {len(token_ids)}토큰, "
+            f"{(time.monotonic() - started) * 1000:.0f}ms"
+        )
+        return _PrefixEntry(system_text, token_ids, past_key_values)
+
+    def match(self, input_ids: torch.Tensor) -> Optional[_PrefixEntry]:
+        """요청 토큰과 실제로 일치하는 가장 긴 접두부 항목"""
+        ids = input_ids.cpu()
+        best = None
+        for entry in self._entries:
+            length = len(entry.token_ids)
+            if length < len(ids) and torch.equal(ids[:length], entry.token_ids):
+                if best is None or length > len(best.token_ids):
+                    best = entry
+        return best
+
+    def prefill(self, inputs: Dict[str, Any]) -> Optional[DynamicCache]:
+        """단일 요청 입력을 접두부 캐시에서 이어 마지막 토큰 직전까지 프리필
+
+        일치하는 접두부가 없으면 None (일반 generate() 경로 사용).
+        """
+        input_ids = inputs["input_ids"]
+        if input_ids.shape[0] != 1:
+            return None
+        entry = self.match(input_ids[0])
+        if entry is None:
+            metrics.inc("prefix_cache_misses")
+            return None
+
+        start = len(entry.token_ids)
+        end = input_ids.shape[1] - 1
+        past_key_values = copy.deepcopy(entry.past_key_values)
+        extra = {
+            key: value for key, value in inputs.items()
+            if key not in ("input_ids", "attention_mask", "token_type_ids")
+        }
+        if "token_type_ids" in inputs:
+            extra["token_type_ids"] = inputs["token_type_ids"][:, start:end]
+
+        with torch.inference_mode():
+            self.model(
+                input_ids=input_ids[:, start:end],
+                attention_mask=inputs["attention_mask"][:, :end],
+                past_key_values=past_key_values,
+                cache_position=torch.arange(start, end, device=input_ids.device),
+                use_cache=True,
+                **extra,
+            )
+        metrics.inc("prefix_cache_hits")
+        return past_key_values
@@ -0,0 +1,45 @@
+"""기사 생성 프롬프트 구성"""
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# 기사 작성 시스템 프롬프트 (촬영 방향 정보가 있으면 안내 문장 추가)
+SYSTEM_PROMPT = "당신은 TruthSync 뉴스 기자 입니다. 이미지를 통해 상세히 기사를 작성해주세요."
+ORIENTATION_HINTS = {
+    "landscape": "가로 방향으로 촬영된 이미지입니다. 가로 화면의 특성을 고려하여 기사를 작성해주세요.",
+    "portrait": "세로 방향으로 촬영된 이미지입니다. 세로 화면의 특성을 고려하여 기사를 작성해주세요.",
+}
+
+
+def system_prompt_for(submessage: str) -> str:
+    """부연설명의 촬영 방향에 맞는 시스템 프롬프트 변형"""
+    for orientation, hint in ORIENTATION_HINTS.items():
+        if f"촬영 방향: {orientation}" in submessage:
+            logger.info(f"방향 정보 추가됨: {hint}")
+            return f"{SYSTEM_PROMPT} {hint}"
+    return SYSTEM_PROMPT
+
+
+def build_messages(image: Any, submessage: str) -> List[Dict[str, Any]]:
+    """모델 입력 채팅 메시지 구성 (image는 모델 해상도로 리사이즈된 PIL 이미지)"""
+    return [
+        {
+            "role": "system",
+            "content": [
+                {"type": "text", "text": system_prompt_for(submessage)}
+            ]
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "image", "image": image},
+                {"type": "text", "text": f"이 이미지의 주제가 무엇인가요? 부연설명 : {submessage}"}
+            ]
+        }
+    ]
+
+
+def system_prompt_variants() -> List[str]:
+    """가능한 모든 시스템 프롬프트 변형 (접두부 KV 캐시 사전 계산용)"""
+    return [SYSTEM_PROMPT] + [f"{SYSTEM_PROMPT} {hint}" for hint in ORIENTATION_HINTS.values()]
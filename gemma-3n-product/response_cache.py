@@ -0,0 +1,161 @@
+"""자주 읽는 기사 목록/상세 응답 캐시 (직렬화된 바이트 + 조건부 GET)
+
+GET /articles 첫 페이지들과 GET /articles/{id}는 요청마다 SQLite를 읽고 JSON을
+다시 만든다. 여기서는 직렬화된 응답 바이트를 메모리 LRU에 두고, 응답에 담긴
+기사가 그 뒤에 바뀌었는지를 database.content_versions의 쓰기 순번으로 확인한다.
+투표는 해당 기사가 담긴 응답만, 기사 추가/삭제는 목록 응답 전체를 무효화한다.
+
+응답에는 본문 해시의 ETag를 붙여 If-None-Match가 같으면 304로 답하고, 큰 응답은
+Accept-Encoding에 따라 brotli/gzip으로 압축한 결과를 항목에 같이 보관한다.
+orjson/brotli가 설치되어 있지 않으면 표준 json/gzip만 사용한다.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from database import ContentVersions
+from image_store import etag_matches
+from metrics import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(content: Any) -> bytes:
+    """JSON 직렬화 (FastAPI JSONResponse와 같은 UTF-8, 비ASCII 그대로)"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _accepted_encodings(header: str) -> set:
+    """Accept-Encoding에서 q=0이 아닌 인코딩 이름"""
+    accepted = set()
+    for part in header.split(","):
+        name, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class CachedResponse:
+    """직렬화된 JSON 본문, ETag, 인코딩별 압축 결과"""
+
+    def __init__(self, body: bytes, sequence: int, article_ids: Tuple[int, ...], listing: bool):
+        self.body = body
+        # 인코딩(br, gzip)이 달라도 같은 내용이므로 약한 ETag 하나를 공유
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.sequence = sequence
+        self.article_ids = article_ids
+        self.listing = listing
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, accept_encoding: str, min_bytes: int) -> Tuple[bytes, Optional[str]]:
+        """Accept-Encoding에 맞는 (본문, Content-Encoding) - 압축 결과는 처음 한 번만 계산"""
+        if len(self.body) < min_bytes:
+            return self.body, None
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding not in accepted or (encoding == "br" and brotli is None):
+                continue
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == "br":
+                    data = brotli.compress(self.body, quality=BROTLI_QUALITY)
+                else:
+                    data = gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+                self._encoded[encoding] = data
+            return data, encoding
+        return self.body, None
+
+    def response(self, request: Request, min_bytes: int) -> Response:
+        """조건부 GET이면 304, 아니면 협상된 인코딩의 본문"""
+        headers = {
+            "ETag": self.etag,
+            # 캐시는 하되 매번 ETag로 재검증
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            metrics.inc("response_not_modified")
+            return Response(status_code=304, headers=headers)
+        body, encoding = self.encoded(request.headers.get("accept-encoding", ""), min_bytes)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """키 → CachedResponse LRU (스레드 안전)
+
+    항목은 만들기 전에 읽은 쓰기 순번과 담긴 기사 ID를 기억하고, 조회 시
+    그 뒤에 바뀐 기사가 있으면 버린다.
+    """
+
+    def __init__(self, versions: ContentVersions, max_entries: int = 512, compress_min_bytes: int = 1024):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.compress_min_bytes = compress_min_bytes
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.versions.changed_since(entry.sequence, entry.article_ids, entry.listing):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                metrics.inc("response_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+        metrics.inc("response_cache_hits")
+        return entry
+
+    def put(self, key: Hashable, content: Any, sequence: int,
+            article_ids: Iterable[int] = (), listing: bool = False) -> CachedResponse:
+        """응답을 직렬화해 저장 - sequence는 DB를 읽기 전에 얻은 content_versions.current()"""
+        entry = CachedResponse(dumps(content), sequence, tuple(article_ids), listing)
+        # 읽는 동안 쓰기가 있었으면 이번 요청에만 쓰고 저장하지 않음
+        if not self.versions.changed_since(sequence, entry.article_ids, listing):
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, entry: CachedResponse, request: Request) -> Response:
+        return entry.response(request, self.compress_min_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "json": "orjson" if orjson is not None else "json",
+                "brotli": brotli is not None,
+            }
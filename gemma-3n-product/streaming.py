@@ -0,0 +1,235 @@
+"""모델 토큰 스트리밍 유틸리티
+
+추론 스레드에서 생성되는 텍스트를 즉시 콜백 또는 asyncio.Queue로 전달하고,
+요청별 TTFT(첫 토큰까지 시간)와 토큰 간 지연 시간을 측정한다.
+BatchTextStreamer는 토큰마다 행별 취소/마감 시간을 확인해 해당 행을 바로 종료한다.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from transformers.generation.streamers import BaseStreamer
+
+from metrics import metrics
+
+
+class GenerationStopped(Exception):
+    """취소 또는 마감 시간 초과로 생성이 중간에 멈춤 - text는 그때까지 생성된 부분"""
+
+    def __init__(self, reason: str, text: str = ""):
+        super().__init__(f"생성 중단: {reason}")
+        self.reason = reason
+        self.text = text
+
+
+class TokenTimer:
+    """요청 1건의 TTFT 및 토큰 간 지연 시간 측정"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.last_token_at: Optional[float] = None
+        self.tokens = 0
+        self._gaps: List[float] = []
+
+    def mark(self):
+        """생성된 토큰 1개 기록 (추론 스레드에서 호출)"""
+        now = time.monotonic()
+        if self.first_token_at is None:
+            self.first_token_at = now
+        else:
+            self._gaps.append(now - self.last_token_at)
+        self.last_token_at = now
+        self.tokens += 1
+
+    @property
+    def ttft(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def mean_inter_token(self) -> Optional[float]:
+        if not self._gaps:
+            return None
+        return sum(self._gaps) / len(self._gaps)
+
+    def summary(self) -> Dict[str, Any]:
+        ttft = self.ttft
+        itl = self.mean_inter_token
+        return {
+            "tokens": self.tokens,
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "inter_token_ms": round(itl * 1000, 1) if itl is not None else None,
+        }
+
+    def export(self) -> Dict[str, Any]:
+        """다른 프로세스로 넘길 측정값 (time.monotonic은 프로세스 간 공통 시계)"""
+        return {
+            "first_token_at": self.first_token_at,
+            "last_token_at": self.last_token_at,
+            "tokens": self.tokens,
+            "gaps": self._gaps,
+        }
+
+    def absorb(self, state: Dict[str, Any]):
+        """export()한 측정값으로 갱신 (모델 복제본 프로세스에서 생성한 요청)"""
+        self.first_token_at = state["first_token_at"]
+        self.last_token_at = state["last_token_at"]
+        self.tokens = state["tokens"]
+        self._gaps = list(state["gaps"])
+
+    def record(self):
+        """전역 지표에 TTFT/토큰 간 지연 시간 반영"""
+        if self.ttft is not None:
+            metrics.observe("generation_ttft", self.ttft)
+        for gap in self._gaps:
+            metrics.observe("generation_inter_token", gap)
+        metrics.inc("generated_tokens", self.tokens)
+
+
+class BatchTextStreamer(BaseStreamer):
+    """배치 생성 결과를 요청(행)별 콜백으로 나눠 전달하는 스트리머
+
+    TextStreamer와 같이 공백/줄바꿈 단위로 완성된 텍스트만 내보내며,
+    EOS를 만나거나 토큰 예산을 다 쓴 행은 즉시 배치에서 빠진 것으로 처리하고
+    on_finished(index, text)를 호출한다. 취소(cancel_events)되었거나 마감 시간
+    (deadlines, time.monotonic 기준)이 지난 행은 다음 토큰에서 종료하고
+    on_finished(index, GenerationStopped)를 호출한다.
+    """
+
+    def __init__(self, tokenizer, on_text: List[Optional[Callable[[str], None]]],
+                 timers: List[Optional[TokenTimer]], budgets: List[int],
+                 eos_token_ids: List[int], on_finished: Callable[[int, Any], None],
+                 cancel_events: Optional[List[Optional[threading.Event]]] = None,
+                 deadlines: Optional[List[Optional[float]]] = None):
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self.timers = timers
+        self.budgets = budgets
+        self.cancel_events = cancel_events or [None] * len(budgets)
+        self.deadlines = deadlines or [None] * len(budgets)
+        self.eos_token_ids = set(eos_token_ids)
+        self.on_finished = on_finished
+        size = len(budgets)
+        self.token_ids: List[List[int]] = [[] for _ in range(size)]
+        self.finished = [False] * size
+        self._window_start = [0] * size
+        self._printed_len = [0] * size
+        self._prompt_seen = False
+        # 디코드 단계 수와 받은 토큰 수 (보조 모델 수락 토큰 계산용)
+        self.steps = 0
+        self.received = 0
+
+    def put(self, value):
+        if not self._prompt_seen:
+            # generate()는 처음에 프롬프트 전체를 넘겨줌
+            self._prompt_seen = True
+            return
+        now = time.monotonic()
+        self.steps += 1
+        # 일반 디코드는 행마다 토큰 1개, 보조 모델 디코드(배치 1)는 검증을 통과한 토큰 여러 개
+        for index, row in enumerate(value.reshape(len(self.budgets), -1).tolist()):
+            self.received += len(row)
+            for token_id in row:
+                if self.finished[index]:
+                    break
+                reason = stop_reason(self.cancel_events[index], self.deadlines[index], now)
+                if reason is not None:
+                    self._finish(index, reason)
+                    break
+                if token_id in self.eos_token_ids:
+                    self._finish(index)
+                    break
+                self.token_ids[index].append(token_id)
+                if self.timers[index] is not None:
+                    self.timers[index].mark()
+                self._emit(index)
+                if len(self.token_ids[index]) >= self.budgets[index]:
+                    self._finish(index)
+
+    def end(self):
+        for index in range(len(self.budgets)):
+            if not self.finished[index]:
+                self._finish(index)
+
+    def _decode_window(self, index: int) -> str:
+        return self.tokenizer.decode(
+            self.token_ids[index][self._window_start[index]:], skip_special_tokens=True
+        )
+
+    def _emit(self, index: int):
+        text = self._decode_window(index)
+        printed = self._printed_len[index]
+        if text.endswith("\n"):
+            printable = text[printed:]
+            self._window_start[index] = len(self.token_ids[index])
+            self._printed_len[index] = 0
+        else:
+            printable = text[printed:text.rfind(" ") + 1]
+            self._printed_len[index] += len(printable)
+        if printable and self.on_text[index] is not None:
+            self.on_text[index](printable)
+
+    def _finish(self, index: int, reason: Optional[str] = None):
+        self.finished[index] = True
+        text = self.tokenizer.decode(self.token_ids[index], skip_special_tokens=True).strip()
+        if reason is not None:
+            record_stop(reason)
+            self.on_finished(index, GenerationStopped(reason, text))
+            return
+        remainder = self._decode_window(index)[self._printed_len[index]:]
+        if remainder and self.on_text[index] is not None:
+            self.on_text[index](remainder)
+        self.on_finished(index, text)
+
+
+def stop_reason(cancel: Optional[threading.Event], deadline: Optional[float],
+                now: float) -> Optional[str]:
+    """생성을 멈춰야 하면 "cancelled" 또는 "deadline", 아니면 None"""
+    if cancel is not None and cancel.is_set():
+        return "cancelled"
+    if deadline is not None and now >= deadline:
+        return "deadline"
+    return None
+
+
+def record_stop(reason: str):
+    if reason == "cancelled":
+        metrics.inc("generations_cancelled")
+    elif reason == "deadline":
+        metrics.inc("generations_deadline_stopped")
+
+
+class AsyncTextStream:
+    """추론 스레드 → asyncio 이벤트 루프 텍스트 브리지
+
+    push()/close()는 어느 스레드에서든 호출할 수 있으며,
+    소비자는 `async for chunk in stream`으로 텍스트를 받는다.
+    """
+
+    _END = object()
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._closed = threading.Event()
+
+    def push(self, text: str):
+        if not self._closed.is_set():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, text)
+
+    def close(self):
+        if not self._closed.is_set():
+            self._closed.set()
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, self._END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        item = await self._queue.get()
+        if item is self._END:
+            raise StopAsyncIteration
+        return item
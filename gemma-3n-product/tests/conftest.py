@@ -0,0 +1,23 @@
+"""테스트 공통 설정 - 상위 디렉토리의 모듈을 import하고 임시 DB를 사용"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import job_queue  # noqa: E402
+
+
+@pytest.fixture
+def test_db(tmp_path, monkeypatch):
+    """테스트마다 새 SQLite 파일에 스키마를 만든 연결 풀"""
+    pool = database.ConnectionPool(str(tmp_path / "test.db"), workers=2)
+    monkeypatch.setattr(database, "db", pool)
+    monkeypatch.setattr(job_queue, "db", pool)
+    monkeypatch.setattr(database, "content_versions", database.ContentVersions())
+    database.init_database()
+    job_queue.init_jobs_table()
+    yield pool
+    pool.close()
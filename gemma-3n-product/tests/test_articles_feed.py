@@ -0,0 +1,54 @@
+"""최신순 keyset 페이지와 트리거로 유지하는 기사 수 (database)"""
+import pytest
+
+from database import (
+    count_articles, decode_cursor, delete_article_from_db, encode_cursor, get_articles_page,
+    save_article_to_db,
+)
+
+
+def save_articles(count: int):
+    for index in range(count):
+        assert save_article_to_db(f"req_{index}", f"기사 {index}. 본문")
+
+
+def test_keyset_pages_cover_every_article_once(test_db):
+    # 같은 초에 저장되어 created_at이 겹치는 기사도 id로 순서가 정해짐
+    save_articles(10)
+    seen = []
+    cursor = None
+    while True:
+        page = get_articles_page(limit=3, cursor=cursor)
+        seen += [article["id"] for article in page["articles"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 10
+
+
+def test_last_partial_page_has_no_cursor(test_db):
+    save_articles(4)
+    first = get_articles_page(limit=3)
+    assert len(first["articles"]) == 3 and first["next_cursor"] is not None
+    last = get_articles_page(limit=3, cursor=first["next_cursor"])
+    assert len(last["articles"]) == 1 and last["next_cursor"] is None
+
+
+def test_cursor_round_trip_and_malformed_cursor():
+    article = {"created_at": "2026-01-01 00:00:00", "id": 42}
+    assert decode_cursor(encode_cursor(article)) == ("2026-01-01 00:00:00", 42)
+    for malformed in ("", "not-base64!", encode_cursor({"created_at": "x", "id": "y"})):
+        with pytest.raises(ValueError):
+            decode_cursor(malformed)
+
+
+def test_row_counts_trigger_tracks_inserts_and_deletes(test_db):
+    assert count_articles() == 0
+    save_articles(5)
+    assert count_articles() == 5
+    assert get_articles_page(limit=2)["total"] == 5
+    assert delete_article_from_db(get_articles_page(limit=1)["articles"][0]["id"])
+    assert count_articles() == 4
+    assert not delete_article_from_db(999)
+    assert count_articles() == 4
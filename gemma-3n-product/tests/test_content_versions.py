@@ -0,0 +1,45 @@
+"""기사 쓰기 순번 (database.ContentVersions)"""
+from database import ContentVersions
+
+
+def test_changed_since_tracks_articles_and_listing():
+    versions = ContentVersions()
+    sequence = versions.current()
+    versions.bump([1])
+    assert versions.changed_since(sequence, [1])
+    assert not versions.changed_since(sequence, [2])
+    assert not versions.changed_since(sequence, [2], listing=True)
+    versions.bump([2], listing=True)
+    assert versions.changed_since(sequence, [], listing=True)
+    assert not versions.changed_since(versions.current(), [1, 2], listing=True)
+
+
+def test_forgotten_articles_fall_back_to_floor():
+    versions = ContentVersions(max_articles=2)
+    before = versions.current()
+    versions.bump([1])
+    versions.bump([2])
+    middle = versions.current()
+    versions.bump([3])
+    assert len(versions._articles) == 2
+    # 1은 잊혔지만 floor 순번으로 간주되어 여전히 바뀐 것으로 판단
+    assert versions.changed_since(before, [1])
+    assert not versions.changed_since(middle, [1])
+    assert not versions.changed_since(middle, [2])
+    assert versions.changed_since(middle, [3])
+
+
+def test_rebump_moves_article_to_newest():
+    versions = ContentVersions(max_articles=2)
+    versions.bump([1])
+    versions.bump([2])
+    versions.bump([1])
+    versions.bump([3])
+    assert set(versions._articles) == {1, 3}
+
+
+def test_memory_is_bounded():
+    versions = ContentVersions(max_articles=100)
+    for article_id in range(10000):
+        versions.bump([article_id])
+    assert len(versions._articles) == 100
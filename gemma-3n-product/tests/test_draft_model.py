@@ -0,0 +1,34 @@
+"""보조 모델 제안/수락 토큰 집계 (draft_model.DraftModel)"""
+from types import SimpleNamespace
+
+from draft_model import DraftModel
+
+
+class FakeTokens:
+    def __init__(self, length: int):
+        self.shape = (1, length)
+
+
+class FakeDraftModel:
+    """generate()가 입력 뒤에 정해진 수의 후보 토큰을 붙여 돌려주는 보조 모델"""
+
+    def __init__(self, candidates):
+        self.generation_config = SimpleNamespace()
+        self.candidates = list(candidates)
+
+    def generate(self, input_ids=None, **kwargs):
+        return SimpleNamespace(sequences=FakeTokens(input_ids.shape[-1] + self.candidates.pop(0)))
+
+
+def test_proposed_tokens_exclude_prompt_prefill():
+    model = FakeDraftModel([5, 3])
+    draft = DraftModel(model, draft_tokens=5)
+    begin = draft.begin()
+    # 첫 단계는 이미지 포함 긴 프롬프트 - 제안 토큰은 새로 만든 5개만
+    model.generate(input_ids=FakeTokens(300))
+    model.generate(input_ids=FakeTokens(306))
+    stats = draft.record(begin, received=10, steps=2)
+    assert stats["proposed"] == 8
+    assert stats["accepted"] == 8
+    assert stats["acceptance_rate"] == 1.0
+    assert draft.stats()["proposed"] == 8
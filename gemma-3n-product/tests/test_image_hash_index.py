@@ -0,0 +1,79 @@
+"""dHash multi-index 검색 (image_hash_index.PerceptualHashIndex)"""
+import random
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from image_hash_index import PerceptualHashIndex, from_signed, hamming, to_signed  # noqa: E402
+
+
+def flip_bits(value: int, bits) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def brute_force(hashes, value: int, max_distance: int):
+    return sorted(
+        (hamming(value, stored), article_id)
+        for article_id, stored in hashes.items()
+        if hamming(value, stored) <= max_distance
+    )
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(7)
+    index = PerceptualHashIndex()
+    hashes = {}
+    for article_id in range(1, 2001):
+        hashes[article_id] = rng.getrandbits(64)
+    # 무작위 해시 주변에 가까운 해시 몇 개를 섞음
+    for article_id in range(2001, 2051):
+        base = hashes[rng.randint(1, 2000)]
+        hashes[article_id] = flip_bits(base, rng.sample(range(64), rng.randint(0, 12)))
+    for article_id, value in hashes.items():
+        index.add(article_id, value)
+
+    for _ in range(50):
+        query = flip_bits(hashes[rng.randint(1, 2050)], rng.sample(range(64), rng.randint(0, 8)))
+        for max_distance in (0, 4, 8, 12):
+            assert index.search(query, max_distance, limit=100) == brute_force(hashes, query, max_distance)
+
+
+def test_bits_flipped_in_every_chunk_are_still_found():
+    index = PerceptualHashIndex()
+    value = 0x0123456789ABCDEF
+    index.add(1, value)
+    # 16비트 조각 4개에 각각 2비트씩 (조각 반경 8 // 4 = 2)
+    query = flip_bits(value, [0, 1, 16, 17, 32, 33, 48, 49])
+    assert index.nearest(query, 8) == (8, 1)
+    assert index.nearest(query, 7) is None
+
+
+def test_nearest_prefers_closer_then_older_article():
+    index = PerceptualHashIndex()
+    value = 0xFFFF0000FFFF0000
+    index.add(3, flip_bits(value, [1]))
+    index.add(2, flip_bits(value, [5]))
+    index.add(1, flip_bits(value, [1, 2]))
+    assert index.search(value, 4) == [(1, 2), (1, 3), (2, 1)]
+    assert index.nearest(value, 4) == (1, 2)
+
+
+def test_remove_and_readd():
+    index = PerceptualHashIndex()
+    index.add(1, 42)
+    index.add(1, 1 << 63)
+    assert len(index) == 1
+    assert index.nearest(42, 0) is None
+    assert index.nearest(1 << 63, 0) == (0, 1)
+    index.remove(1)
+    assert len(index) == 0 and index.nearest(1 << 63, 64) is None
+
+
+def test_signed_round_trip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed(value)
+        assert -(1 << 63) <= signed < (1 << 63)
+        assert from_signed(signed) == value
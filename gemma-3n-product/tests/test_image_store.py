@@ -0,0 +1,70 @@
+"""콘텐츠 주소 이미지 저장소와 Range/ETag 헤더 해석 (image_store)"""
+import os
+
+import pytest
+
+from image_store import ImageStore, etag_matches, parse_byte_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    (" bytes=0-0 ", (0, 0)),
+    # 해석할 수 없거나 여러 구간이면 전체 응답
+    ("bytes=0-99,200-299", None),
+    ("bytes=-", None),
+    ("items=0-99", None),
+    ("bytes=abc-", None),
+    ("bytes=50-10", None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5000-6000", "bytes=-0"])
+def test_unsatisfiable_range_raises(header):
+    with pytest.raises(ValueError):
+        parse_byte_range(header, SIZE)
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ('"xyz",W/"abc"', True),
+    ("*", True),
+    ('"xyz"', False),
+    ('"ab"', False),
+    ("abc", False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+    assert etag_matches(header, 'W/"abc"') is matches
+
+
+def test_put_is_content_addressed_and_idempotent(tmp_path):
+    store = ImageStore(str(tmp_path))
+    image_hash = store.put(b"jpeg bytes")
+    assert image_hash == ImageStore.hash_bytes(b"jpeg bytes")
+    path = store.path_for(image_hash)
+    assert path == os.path.join(str(tmp_path), image_hash[:2], image_hash[2:4], f"{image_hash}.jpg")
+    assert store.exists(image_hash)
+    mtime = os.path.getmtime(path)
+    assert store.put(b"jpeg bytes") == image_hash
+    assert os.path.getmtime(path) == mtime
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")] == []
+
+
+@pytest.mark.parametrize("image_hash", ["../etc/passwd", "ABCDEF" * 10 + "ABCD", "a" * 63, "g" * 64])
+def test_invalid_hash_is_rejected(tmp_path, image_hash):
+    store = ImageStore(str(tmp_path))
+    assert not store.exists(image_hash)
+    with pytest.raises(ValueError):
+        store.path_for(image_hash)
@@ -0,0 +1,67 @@
+"""작업 진행 이벤트 스트림 (job_store.stream_events + JobWorkerPool 상태 알림)"""
+import asyncio
+import json
+
+from job_queue import JobWorkerPool, enqueue_job, get_job
+from job_store import JobStore, stream_events
+
+
+def parse_frames(body: bytes):
+    """SSE 본문 → [(event, data)] (keepalive 주석 제외)"""
+    events = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_failed_handler_ends_stream_with_failed_frame(test_db):
+    store = JobStore()
+
+    async def handler(job):
+        raise RuntimeError("생성 실패")
+
+    def on_status(job_id, status, error):
+        store.update(job_id, status, error or "")
+
+    async def scenario():
+        job = store.create(job_id="job_fail")
+        store.update(job.job_id, "queued", "작업이 대기열에 등록되었습니다.", 0)
+        enqueue_job(job.job_id, "", b"\0" * 12, (2, 2), None)
+
+        async def consume():
+            return b"".join([frame async for frame in stream_events(job, 0, 256, 0.05)])
+
+        consumer = asyncio.ensure_future(consume())
+        workers = JobWorkerPool(handler, workers=1, poll_interval=0.01, max_attempts=1, on_status=on_status)
+        workers.start()
+        try:
+            return await asyncio.wait_for(consumer, 5)
+        finally:
+            await workers.stop()
+
+    events = parse_frames(asyncio.run(scenario()))
+    assert events[-1][0] == "status"
+    assert events[-1][1]["status"] == "failed"
+    assert events[-1][1]["message"] == "생성 실패"
+    assert get_job("job_fail")["status"] == "failed"
+
+
+
+def test_lagging_subscriber_after_completion_gets_snapshot_with_article():
+    store = JobStore()
+    job = store.create(job_id="job_done")
+    store.set_stage(job.job_id, "generating")
+    store.append_text(job.job_id, "제목\n")
+    store.append_text(job.job_id, "본문")
+    store.update(job.job_id, "completed", "AI 분석이 완료되었습니다.", 100, article_id=1)
+
+    async def consume():
+        return b"".join([frame async for frame in stream_events(job, 0, 256, 0.05)])
+
+    events = parse_frames(asyncio.run(consume()))
+    assert [event for event, _ in events] == ["snapshot"]
+    assert events[0][1]["status"] == "completed"
+    assert events[0][1]["article"] == "제목\n본문"
+    assert len(job.events) == 1
@@ -0,0 +1,82 @@
+"""영구 작업 임대/연장/완료와 작업자 상태 알림 (job_queue)"""
+import asyncio
+import time
+
+from job_queue import (
+    JobWorkerPool, RetryLater, claim_job, enqueue_job, finish_job, get_job, renew_lease,
+)
+
+
+def enqueue(job_id: str):
+    enqueue_job(job_id, "부연설명", b"\0" * 12, (2, 2), None)
+
+
+def test_claim_takes_oldest_queued_job_once(test_db):
+    enqueue("job_1")
+    enqueue("job_2")
+    claimed = claim_job("owner_a", 60)
+    assert claimed["id"] == "job_1" and claimed["attempts"] == 1
+    assert claim_job("owner_b", 60)["id"] == "job_2"
+    assert claim_job("owner_c", 60) is None
+    assert get_job("job_1")["status"] == "running"
+
+
+def test_renew_only_by_lease_owner(test_db):
+    enqueue("job_1")
+    claim_job("owner_a", 60)
+    assert renew_lease("job_1", "owner_a", 60)
+    assert not renew_lease("job_1", "owner_b", 60)
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_loses_it(test_db):
+    enqueue("job_1")
+    claim_job("owner_a", 0.01)
+    time.sleep(0.05)
+    reclaimed = claim_job("owner_b", 60)
+    assert reclaimed["id"] == "job_1" and reclaimed["attempts"] == 2
+    assert not renew_lease("job_1", "owner_a", 60)
+    # 임대를 잃은 작업자의 완료 기록은 무시됨
+    finish_job("job_1", "owner_a", "completed", article_id=1)
+    assert get_job("job_1")["status"] == "running"
+    finish_job("job_1", "owner_b", "completed", article_id=7)
+    job = get_job("job_1")
+    assert job["status"] == "completed" and job["article_id"] == 7
+
+
+def test_requeue_restores_attempts(test_db):
+    enqueue("job_1")
+    claim_job("owner_a", 60)
+    finish_job("job_1", "owner_a", "queued", requeue=True)
+    job = get_job("job_1")
+    assert job["status"] == "queued" and job["attempts"] == 0
+    assert claim_job("owner_b", 60)["attempts"] == 1
+
+
+def test_worker_reports_requeue_then_failure(test_db):
+    statuses = []
+    calls = []
+
+    async def handler(job):
+        calls.append(job["attempts"])
+        if len(calls) == 1:
+            raise RetryLater("추론 큐 포화")
+        raise RuntimeError("생성 실패")
+
+    async def scenario():
+        enqueue("job_1")
+        workers = JobWorkerPool(
+            handler, workers=1, poll_interval=0.01, max_attempts=1,
+            on_status=lambda *args: statuses.append(args)
+        )
+        workers.start()
+        try:
+            while len(statuses) < 2:
+                await asyncio.sleep(0.01)
+        finally:
+            await workers.stop()
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+    # RetryLater는 시도 횟수를 되돌리므로 두 번째 실행도 첫 시도
+    assert calls == [1, 1]
+    assert statuses == [("job_1", "queued", None), ("job_1", "failed", "생성 실패")]
+    assert get_job("job_1")["status"] == "failed"
@@ -0,0 +1,91 @@
+"""작업 상태 저장소 TTL/LRU 제거와 누적 텍스트 (job_store.JobStore)"""
+from job_store import JobStore
+
+
+def test_ttl_expires_idle_jobs():
+    store = JobStore(ttl=60)
+    idle = store.create()
+    active = store.create()
+    idle.updated_at -= 120
+    assert store.get(idle.job_id) is None
+    assert store.get(active.job_id) is active
+    assert idle.closed
+
+
+def test_lru_evicts_least_recently_updated_job():
+    store = JobStore(max_jobs=2)
+    first = store.create()
+    second = store.create()
+    # 먼저 만든 작업을 갱신하면 두 번째 작업이 가장 오래된 작업이 됨
+    store.update(first.job_id, "processing", "", 10)
+    third = store.create()
+    assert len(store) == 2
+    assert store.get(second.job_id) is None
+    assert store.get(first.job_id) is first
+    assert store.get(third.job_id) is third
+
+
+def test_size_budget_evicts_other_jobs_but_not_the_updated_one():
+    store = JobStore(max_bytes=6000)
+    old = store.create()
+    store.append_text(old.job_id, "가" * 800)
+    new = store.create()
+    store.append_text(new.job_id, "나" * 800)
+    assert store.get(old.job_id) is None
+    assert store.get(new.job_id) is new
+    assert store.stats()["text_chars"] == 800
+
+
+def test_text_from_offset_and_set_text():
+    store = JobStore()
+    job = store.create()
+    for chunk in ("제목\n", "첫 문장. ", "둘째 문장."):
+        store.append_text(job.job_id, chunk)
+    assert job.text_from(0) == "제목\n첫 문장. 둘째 문장."
+    assert job.text_from(5) == "문장. 둘째 문장."
+    assert job.text_from(job.text_length) == ""
+    store.set_text(job.job_id, "최종 기사")
+    assert store.stats()["text_chars"] == len("최종 기사")
+    snapshot = job.snapshot(3)
+    assert snapshot["partial_text"] == "기사" and snapshot["text_length"] == 5
+
+
+def test_event_frames_count_toward_budget_and_are_dropped_when_done():
+    store = JobStore()
+    job = store.create()
+    store.set_stage(job.job_id, "generating")
+    for _ in range(5):
+        store.append_text(job.job_id, "텍스트")
+    assert store.stats()["event_bytes"] == job.event_bytes == sum(len(frame) for frame in job.events)
+
+    store.update(job.job_id, "completed", "AI 분석이 완료되었습니다.", 100)
+    # 최종 상태 이벤트만 남음 (번호는 이어짐)
+    assert len(job.events) == 1 and job.event_count == 7
+    assert job.events[0].startswith(b"id: 6\nevent: status\n")
+    assert store.stats()["event_bytes"] == len(job.events[0])
+
+
+def test_frame_bytes_alone_trigger_eviction():
+    store = JobStore(max_bytes=1000)
+    old = store.create()
+    for _ in range(20):
+        store.set_stage(old.job_id, "prefill")
+        store.set_stage(old.job_id, "generating")
+    assert store.stats()["text_chars"] == 0
+    new = store.create()
+    store.set_stage(new.job_id, "generating")
+    assert store.get(old.job_id) is None
+    assert store.stats()["event_bytes"] == new.event_bytes
+
+
+def test_lagging_reader_gets_single_snapshot():
+    store = JobStore()
+    job = store.create()
+    for index in range(10):
+        store.append_text(job.job_id, str(index))
+    frames, index = job.read_events(0, max_lag=4)
+    assert frames.count(b"event: ") == 1 and b"event: snapshot" in frames
+    assert b'"partial_text": "0123456789"' in frames
+    assert index == job.event_count
+    frames, index = job.read_events(7, max_lag=4)
+    assert frames.count(b"event: delta") == 3
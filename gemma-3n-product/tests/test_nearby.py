@@ -0,0 +1,83 @@
+"""좌표 파싱과 반경 검색 거리 (geo, database.get_articles_nearby)"""
+import random
+
+import pytest
+
+from database import get_articles_nearby, save_article_to_db
+from geo import bounding_boxes, haversine_km, parse_coordinates
+
+SEOUL_CITY_HALL = (37.5665, 126.9780)
+GANGNAM_STATION = (37.4979, 127.0276)
+BUSAN_STATION = (35.1151, 129.0414)
+
+
+def save_at(request_id: str, coordinates):
+    assert save_article_to_db(request_id, f"{request_id} 기사. 본문", coordinates=coordinates)
+
+
+def test_haversine_known_distances():
+    assert haversine_km(*SEOUL_CITY_HALL, *SEOUL_CITY_HALL) == 0
+    assert haversine_km(*SEOUL_CITY_HALL, *GANGNAM_STATION) == pytest.approx(8.8, abs=0.2)
+    assert haversine_km(*SEOUL_CITY_HALL, *BUSAN_STATION) == pytest.approx(325, abs=5)
+    # 적도에서 경도 1도
+    assert haversine_km(0, 0, 0, 1) == pytest.approx(111.195, abs=0.01)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("37.5665,126.9780 (중구, 서울)", (37.5665, 126.978)),
+    (" -33.8688, 151.2093", (-33.8688, 151.2093)),
+    ("주민 1,000명 대피", None),
+    ("12,150원", None),
+    ("3, 4월", None),
+    ("91.0,10.0", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_coordinates(text, expected):
+    assert parse_coordinates(text) == expected
+
+
+def test_nearby_sorted_within_radius_with_distances(test_db):
+    save_at("gangnam", GANGNAM_STATION)
+    save_at("city_hall", SEOUL_CITY_HALL)
+    save_at("busan", BUSAN_STATION)
+    save_at("no_location", None)
+
+    articles = get_articles_nearby(*SEOUL_CITY_HALL, radius_km=20)
+    assert [article["request_id"] for article in articles] == ["city_hall", "gangnam"]
+    assert articles[0]["distance_km"] == 0
+    assert articles[1]["distance_km"] == pytest.approx(haversine_km(*SEOUL_CITY_HALL, *GANGNAM_STATION), abs=0.001)
+    assert [article["request_id"] for article in get_articles_nearby(*SEOUL_CITY_HALL, radius_km=500)][-1] == "busan"
+    assert len(get_articles_nearby(*SEOUL_CITY_HALL, radius_km=500, limit=1)) == 1
+
+
+@pytest.mark.parametrize("center", [(37.5, 127.0), (0.0, 179.9), (0.0, -179.95), (89.5, 10.0), (-89.9, -45.0)])
+def test_nearby_matches_brute_force(test_db, center):
+    rng = random.Random(hash(center))
+    points = {}
+    for index in range(300):
+        latitude = max(-90.0, min(90.0, center[0] + rng.uniform(-3, 3)))
+        longitude = (center[1] + rng.uniform(-6, 6) + 180) % 360 - 180
+        points[f"req_{index}"] = (latitude, longitude)
+        save_at(f"req_{index}", (latitude, longitude))
+
+    radius = 150
+    expected = sorted(
+        request_id for request_id, point in points.items() if haversine_km(*center, *point) <= radius
+    )
+    found = get_articles_nearby(*center, radius_km=radius, limit=1000)
+    # R*Tree 좌표는 32비트 실수라 경계에서 수 m 차이가 날 수 있으므로 경계 근처 점은 비교에서 제외
+    near_edge = {
+        request_id for request_id, point in points.items()
+        if abs(haversine_km(*center, *point) - radius) < 0.05
+    }
+    assert sorted(set(a["request_id"] for a in found) - near_edge) == sorted(set(expected) - near_edge)
+    distances = [article["distance_km"] for article in found]
+    assert distances == sorted(distances)
+
+
+def test_bounding_boxes_split_at_date_line():
+    boxes = bounding_boxes(0.0, 179.9, 50)
+    assert len(boxes) == 2
+    assert any(box[2] <= -179.9 for box in boxes) and any(box[3] == 180.0 for box in boxes)
+    assert bounding_boxes(89.9, 0.0, 50) == [(pytest.approx(89.9 - 50 / 111.195, abs=1e-3), 90.0, -180.0, 180.0)]
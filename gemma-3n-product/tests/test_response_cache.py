@@ -0,0 +1,76 @@
+"""직렬화 응답 캐시와 쓰기 순번 무효화 (response_cache.ResponseCache)"""
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from database import ContentVersions  # noqa: E402
+from response_cache import ResponseCache, dumps  # noqa: E402
+
+
+def make_request(**headers):
+    return SimpleNamespace(headers=headers)
+
+
+@pytest.fixture
+def versions():
+    return ContentVersions()
+
+
+@pytest.fixture
+def cache(versions):
+    return ResponseCache(versions, max_entries=3, compress_min_bytes=100)
+
+
+def test_detail_entry_invalidated_only_by_its_article(cache, versions):
+    cache.put(("article", 1), {"id": 1}, versions.current(), article_ids=[1])
+    versions.bump([2])
+    versions.bump([], listing=True)
+    assert cache.get(("article", 1)) is not None
+    versions.bump([1])
+    assert cache.get(("article", 1)) is None
+
+
+def test_listing_entry_invalidated_by_insert_or_delete(cache, versions):
+    cache.put(("feed", None, 20), {"articles": [{"id": 1}]}, versions.current(), article_ids=[1], listing=True)
+    versions.bump([5])
+    assert cache.get(("feed", None, 20)) is not None
+    versions.bump([6], listing=True)
+    assert cache.get(("feed", None, 20)) is None
+
+
+def test_write_during_read_is_not_cached(cache, versions):
+    sequence = versions.current()
+    # DB를 읽는 사이 투표가 커밋됨
+    versions.bump([1])
+    entry = cache.put(("article", 1), {"id": 1}, sequence, article_ids=[1])
+    assert json.loads(entry.body) == {"id": 1}
+    assert cache.get(("article", 1)) is None
+
+
+def test_lru_bound(cache, versions):
+    for article_id in range(5):
+        cache.put(("article", article_id), {"id": article_id}, versions.current(), article_ids=[article_id])
+    assert cache.stats()["entries"] == 3
+    assert cache.get(("article", 0)) is None
+    assert cache.get(("article", 4)) is not None
+
+
+def test_compression_negotiation(cache, versions):
+    content = {"articles": [{"id": index, "title": "기사 제목"} for index in range(20)]}
+    entry = cache.put(("feed", None, 20), content, versions.current(), listing=True)
+    body, encoding = entry.encoded("gzip, deflate", cache.compress_min_bytes)
+    assert encoding == "gzip" and gzip.decompress(body) == dumps(content)
+    assert entry.encoded("gzip;q=0, identity", cache.compress_min_bytes) == (entry.body, None)
+    small = cache.put(("article", 1), {"id": 1}, versions.current(), article_ids=[1])
+    assert small.encoded("gzip", cache.compress_min_bytes) == (small.body, None)
+
+
+def test_conditional_get_returns_304(cache, versions):
+    entry = cache.put(("article", 1), {"id": 1}, versions.current(), article_ids=[1])
+    assert cache.respond(entry, make_request(**{"if-none-match": entry.etag})).status_code == 304
+    response = cache.respond(entry, make_request())
+    assert response.status_code == 200 and response.headers["etag"] == entry.etag
@@ -0,0 +1,57 @@
+"""기사 전문 검색 (database.search_articles)"""
+import pytest
+
+from database import build_match_query, delete_article_from_db, encode_search_cursor, save_article_to_db, search_articles
+
+MALFORMED_QUERIES = (
+    "", "   ", '"', '""', "*", "(", ")", "AND", "OR NOT", "NEAR(화재 대피)", "-", ":",
+    "title:화재", "^화재", '화재"', "화재*", "'; DROP TABLE articles; --", "{title content}: 화재",
+    "화재 AND", "a" * 1000,
+)
+
+
+@pytest.fixture
+def articles(test_db):
+    save_article_to_db("req_1", "시장 화재로 주민 대피. 소방당국이 진화 중이다")
+    save_article_to_db("req_2", "도심 교통 체증. 화재 진압 차량이 지나가지 못했다")
+    save_article_to_db("req_3", "지역 축제 개막. 많은 시민이 모였다")
+
+
+def test_prefix_search_ranks_title_matches_first(articles):
+    page = search_articles("화재")
+    assert [article["request_id"] for article in page["articles"]] == ["req_1", "req_2"]
+    assert "<mark>" in page["articles"][0]["snippet"]
+
+
+def test_all_terms_must_match(articles):
+    assert [article["request_id"] for article in search_articles("화재 교통")["articles"]] == ["req_2"]
+    assert search_articles("화재 축제")["articles"] == []
+
+
+@pytest.mark.parametrize("query", MALFORMED_QUERIES)
+def test_malformed_queries_are_rejected_or_empty(articles, query):
+    # FTS5 구문 오류(sqlite3.OperationalError → 500)가 아니라 ValueError(400)이거나 결과가 있어야 함
+    try:
+        page = search_articles(query)
+    except ValueError:
+        assert build_match_query(query) is None
+        return
+    assert isinstance(page["articles"], list)
+
+
+@pytest.mark.parametrize("cursor", ["잘못된", "e30", encode_search_cursor(0.0, 1)[:-2] + "!!"])
+def test_malformed_cursor_raises_value_error(articles, cursor):
+    with pytest.raises(ValueError):
+        search_articles("화재", cursor=cursor)
+
+
+def test_cursor_pages_through_results(articles):
+    first = search_articles("화재", limit=1)
+    assert len(first["articles"]) == 1 and first["next_cursor"]
+    second = search_articles("화재", limit=1, cursor=first["next_cursor"])
+    assert [article["request_id"] for article in second["articles"]] == ["req_2"]
+
+
+def test_deleted_article_leaves_index(articles):
+    delete_article_from_db(1)
+    assert [article["request_id"] for article in search_articles("화재")["articles"]] == ["req_2"]
@@ -0,0 +1,50 @@
+"""검증 집계 트리거와 전체 재계산 결과 비교 (database)"""
+import pytest
+
+from database import add_verification, get_article_by_id, rebuild_verification_stats, save_article_to_db
+
+STAT_COLUMNS = (
+    "truth_count", "fake_count", "unsure_count", "confidence_sum",
+    "verification_count", "verification_score",
+)
+
+
+def article_stats(article_id: int):
+    article = get_article_by_id(article_id)
+    return {column: article[column] for column in STAT_COLUMNS}
+
+
+def test_trigger_matches_rebuild(test_db):
+    save_article_to_db("req_a", "기사 A. 본문")
+    save_article_to_db("req_b", "기사 B. 본문")
+    save_article_to_db("req_c", "투표 없는 기사. 본문")
+    votes = [
+        (1, "truth", 0.9), (1, "fake", 0.4), (1, "unsure", 0.5), (1, "truth", 1.0),
+        (2, "fake", 0.7), (2, "unsure", 0.0),
+    ]
+    for index, (article_id, verification_type, confidence) in enumerate(votes):
+        assert add_verification(article_id, f"user_{index}", "", verification_type, confidence)
+
+    incremental = {article_id: article_stats(article_id) for article_id in (1, 2, 3)}
+    assert incremental[1]["verification_count"] == 4
+    assert incremental[1]["verification_score"] == pytest.approx((2 + 0.5) / 4)
+    assert incremental[2]["verification_score"] == pytest.approx(0.5 / 2)
+    assert incremental[3]["verification_count"] == 0
+
+    rebuild_verification_stats()
+    for article_id, stats in incremental.items():
+        rebuilt = article_stats(article_id)
+        assert rebuilt.keys() == stats.keys()
+        for column in STAT_COLUMNS:
+            assert rebuilt[column] == pytest.approx(stats[column]), column
+
+
+def test_score_matches_average_of_vote_values(test_db):
+    save_article_to_db("req_a", "기사 A. 본문")
+    for index, verification_type in enumerate(["truth", "unsure", "unsure", "fake", "truth"]):
+        add_verification(1, f"user_{index}", "", verification_type)
+    expected = test_db.connection().execute("""
+        SELECT AVG(CASE verification_type WHEN 'truth' THEN 1.0 WHEN 'fake' THEN 0.0 ELSE 0.5 END)
+        FROM verifications WHERE article_id = 1
+    """).fetchone()[0]
+    assert get_article_by_id(1)["verification_score"] == pytest.approx(expected)
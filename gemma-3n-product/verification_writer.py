@@ -0,0 +1,167 @@
+"""검증(투표) 쓰기 지연 버퍼 + 그룹 커밋
+
+투표마다 트랜잭션을 커밋하면 처리량이 fsync 횟수에 묶인다. 여기서는 들어온
+투표를 버퍼에 모았다가 최대 flush_interval마다 한 번, 또는 max_batch건이 차면
+하나의 트랜잭션으로 기록하고 (직전 배치가 1건뿐이던 한가한 때에는 바로 기록), 커밋(synchronous=FULL로 WAL fsync)이 끝난 뒤에야
+각 요청에 결과를 돌려준다. 쓰기는 전용 연결 1개에서 순서대로 실행된다.
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import ConnectionPool, VERIFICATION_TYPES, content_versions
+from geo import resolve_coordinates
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_INSERT_VERIFICATION = """
+    INSERT INTO verifications (article_id, user_id, user_location, user_latitude, user_longitude,
+                               verification_type, confidence_score, comment)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+VerificationRow = Tuple[int, str, str, Optional[float], Optional[float], str, float, str]
+
+
+def validate_vote(vote: Dict[str, Any]) -> VerificationRow:
+    """투표 1건 검증 후 INSERT 파라미터로 변환 (잘못된 값은 ValueError)"""
+    if not isinstance(vote, dict):
+        raise ValueError("검증 항목은 객체여야 합니다.")
+    try:
+        article_id = int(vote["article_id"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("article_id가 필요합니다.")
+    verification_type = vote.get("verification_type")
+    if verification_type not in VERIFICATION_TYPES:
+        raise ValueError("검증 타입은 'truth', 'fake', 'unsure' 중 하나여야 합니다.")
+    try:
+        confidence_score = float(vote.get("confidence_score", 0.0))
+    except (TypeError, ValueError):
+        raise ValueError("confidence_score는 숫자여야 합니다.")
+    user_location = str(vote.get("user_location", ""))
+    # 좌표 필드가 없으면 user_location의 "위도,경도"에서 추출
+    latitude, longitude = resolve_coordinates(
+        vote.get("user_latitude"), vote.get("user_longitude"), user_location
+    ) or (None, None)
+    return (
+        article_id,
+        str(vote.get("user_id", "")),
+        user_location,
+        latitude,
+        longitude,
+        verification_type,
+        confidence_score,
+        str(vote.get("comment", "")),
+    )
+
+
+class VerificationWriter:
+    """투표를 모아 그룹 커밋하는 단일 쓰기 작업자"""
+
+    def __init__(self, db_path: str, flush_interval: float = 0.002, max_batch: int = 1000):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # 확인 응답 전에 커밋이 디스크에 남도록 쓰기 연결은 synchronous = FULL
+        self._db = ConnectionPool(db_path, workers=1, pragmas=("PRAGMA synchronous = FULL",))
+        self._pending: List[Tuple[VerificationRow, asyncio.Future]] = []
+        self._has_pending: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_flush = 0.0
+        self._last_batch_size = 0
+
+    def start(self):
+        if self._task is None:
+            self._has_pending = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """남은 투표를 모두 기록한 뒤 종료"""
+        if self._task is not None:
+            self._stopping = True
+            self._has_pending.set()
+            self._batch_full.set()
+            await self._task
+            self._task = None
+        self._db.close()
+
+    async def submit(self, rows: List[VerificationRow]) -> List[Optional[str]]:
+        """검증된 투표를 버퍼에 넣고 커밋될 때까지 대기 - 투표별 오류(None이면 성공) 반환"""
+        if self._task is None or self._stopping:
+            raise RuntimeError("VerificationWriter가 실행 중이 아닙니다.")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for row in rows:
+            future = loop.create_future()
+            self._pending.append((row, future))
+            futures.append(future)
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch:
+            self._batch_full.set()
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not (self._stopping and not self._pending):
+            await self._has_pending.wait()
+            # 투표가 몰리는 중이면(직전 배치 2건 이상) 직전 기록 후 flush_interval이
+            # 지날 때까지 (또는 배치가 찰 때까지) 더 모음
+            delay = self._last_flush + self.flush_interval - loop.time()
+            if self._last_batch_size > 1 and delay > 0 and len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._last_flush = loop.time()
+            await self._flush()
+
+    async def _flush(self):
+        batch = self._pending[:self.max_batch]
+        self._pending = self._pending[self.max_batch:]
+        if not self._pending:
+            self._has_pending.clear()
+        if len(self._pending) < self.max_batch:
+            self._batch_full.clear()
+        self._last_batch_size = len(batch)
+        if not batch:
+            return
+
+        started = time.monotonic()
+        try:
+            errors = await self._db.run(self._write, [row for row, _ in batch])
+        except Exception as e:
+            logger.error(f"검증 일괄 기록 실패: {e}")
+            errors = [str(e)] * len(batch)
+        for (_, future), error in zip(batch, errors):
+            if not future.done():
+                future.set_result(error)
+
+        written = sum(error is None for error in errors)
+        metrics.inc("verification_flushes")
+        metrics.inc("verifications_written", written)
+        metrics.observe("verification_flush", time.monotonic() - started)
+
+    def _write(self, rows: List[VerificationRow]) -> List[Optional[str]]:
+        """한 트랜잭션으로 기록 - 제약 위반 행이 있으면 해당 행만 제외하고 나머지 커밋"""
+        conn = self._db.connection()
+        try:
+            with conn:
+                conn.executemany(_INSERT_VERIFICATION, rows)
+            errors: List[Optional[str]] = [None] * len(rows)
+        except sqlite3.IntegrityError:
+            errors = []
+            with conn:
+                for row in rows:
+                    try:
+                        conn.execute(_INSERT_VERIFICATION, row)
+                        errors.append(None)
+                    except sqlite3.IntegrityError as e:
+                        errors.append(str(e))
+        # 집계가 바뀐 기사의 캐시된 응답 무효화
+        content_versions.bump({row[0] for row, error in zip(rows, errors) if error is None})
+        return errors